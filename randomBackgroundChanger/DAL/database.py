@@ -1,27 +1,92 @@
 
 import os
+import threading
 
-from sqlalchemy import Column, Integer, String, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, create_engine, event, text
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
+_engine = None
+_enginePid = None
+_engineLock = threading.Lock()
+
+
+def _setSQLitePragmas(dbapiConnection, connectionRecord):
+    cursor = dbapiConnection.cursor()
+    # readers don't block the writer, and commits don't wait for a full sync to disk
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def _createEngine():
+    engine = create_engine(
+        f"sqlite:///{os.getcwd()}/fileHandler.db",
+        pool_size=5, max_overflow=10
+    )
+    event.listen(engine, "connect", _setSQLitePragmas)
+    return engine
+
 
 def getEngine():
-    return create_engine(f"sqlite:///{os.getcwd()}/fileHandler.db")
+    """ Lazily create a single engine for the process, engines aren't shared across a fork
+    """
+    global _engine, _enginePid
+    pid = os.getpid()
+    if _engine is not None and _enginePid == pid:
+        return _engine
+
+    engine = _createEngine()
+    # nothing inside the lock yields, so it can't block the event loop whether or not gevent patched it
+    with _engineLock:
+        if _engine is None or _enginePid != pid:
+            if _engine is not None:
+                # leave the parent's connections alone, only drop them from this process' pool
+                _engine.dispose(close=False)
+            _engine, _enginePid = engine, pid
+            return engine
+        sharedEngine = _engine
+    # another caller created the process' engine first
+    engine.dispose()
+    return sharedEngine
 
 
 class Token(Base):
     __tablename__ = "token"
 
     id = Column(Integer, primary_key=True)
-    token = Column(String)
-    expiryDate = Column(DateTime)
+    token = Column(String, unique=True, index=True)
+    expiryDate = Column(DateTime, index=True)
 
     def __repr__(self):
         return f"Token(id={self.id})"
 
 
+class RevokedToken(Base):
+    __tablename__ = "revoked_token"
+
+    id = Column(Integer, primary_key=True)
+    signature = Column(String, unique=True, index=True)
+    expiryDate = Column(DateTime, index=True)
+
+    def __repr__(self):
+        return f"RevokedToken(id={self.id})"
+
+
+def migrateTables(engine):
+    """ Add the indexes to token tables that were created before they existed
+    """
+    with engine.begin() as connection:
+        # the unique index can't be created while duplicate tokens exist
+        connection.execute(text(
+            "DELETE FROM token WHERE id NOT IN (SELECT MIN(id) FROM token GROUP BY token)"
+        ))
+        for index in Token.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+
 def createTables():
     engine = getEngine()
     Base.metadata.create_all(engine)
+    migrateTables(engine)
@@ -10,20 +10,32 @@ class InvalidToken(Exception):
     pass
 
 
-def validToken(token, validateDate=True):
-    with Session(database.getEngine()) as session:
-        selectTokens = select(database.Token).where(
-            database.Token.token == token
+def _selectTokens(token, validateDate):
+    selectTokens = select(database.Token).where(
+        database.Token.token == token
+    )
+
+    if validateDate:
+        selectTokens = selectTokens.where(
+            datetime.now() < database.Token.expiryDate
         )
 
-        if validateDate:
-            selectTokens.where(
-                datetime.now() < database.Token.expiryDate
-            )
+    return selectTokens
 
-        tokens = session.scalars(selectTokens)
 
-        return len(tokens.all()) != 0
+def validToken(token, validateDate=True):
+    with Session(database.getEngine()) as session:
+        # only check a row exists rather than loading every matching token
+        return session.scalar(select(_selectTokens(token, validateDate).exists()))
+
+
+def tokenExpiryDate(token):
+    """ Get the expiry date of a valid token, or None if the token is invalid
+    """
+    with Session(database.getEngine()) as session:
+        return session.scalar(
+            _selectTokens(token, validateDate=True).with_only_columns(database.Token.expiryDate)
+        )
 
 
 def addNewToken(token, validDays):
@@ -49,3 +61,44 @@ def revokeToken(token):
 
         session.execute(deleteStmt)
         session.commit()
+
+
+def addRevokedToken(signature, expiryDate):
+    with Session(database.getEngine()) as session:
+        revokedToken = select(database.RevokedToken).where(
+            database.RevokedToken.signature == signature
+        )
+        if session.scalar(select(revokedToken.exists())):
+            return
+
+        session.add(database.RevokedToken(signature=signature, expiryDate=expiryDate))
+        session.commit()
+
+
+def revokedTokenSignatures():
+    """ Get the signatures of revoked signed tokens that haven't expired yet
+    """
+    with Session(database.getEngine()) as session:
+        selectSignatures = select(database.RevokedToken.signature).where(
+            datetime.now() < database.RevokedToken.expiryDate
+        )
+        return set(session.scalars(selectSignatures))
+
+
+def deleteExpiredTokens(batchSize=500, tokenTable=database.Token):
+    """ Delete expired tokens in batches so the database isn't locked for long, returns the number deleted
+    """
+    deletedTokens = 0
+    with Session(database.getEngine()) as session:
+        while True:
+            expiredTokenIds = select(tokenTable.id).where(
+                tokenTable.expiryDate <= datetime.now()
+            ).limit(batchSize)
+            deleteStmt = delete(tokenTable).where(tokenTable.id.in_(expiredTokenIds))
+
+            deletedRows = session.execute(deleteStmt).rowcount
+            session.commit()
+
+            deletedTokens += deletedRows
+            if deletedRows < batchSize:
+                return deletedTokens
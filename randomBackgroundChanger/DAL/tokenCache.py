@@ -0,0 +1,50 @@
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class TokenCache:
+    """ LRU cache of validated tokens, entries expire at the token's expiry date or after the ttl,
+        whichever comes first
+    """
+
+    def __init__(self, maxSize=1024, ttl=60):
+        self._maxSize = maxSize
+        self._ttl = ttl
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def validToken(self, token):
+        with self._lock:
+            cachedToken = self._tokens.get(token)
+            if not cachedToken:
+                return False
+
+            cacheExpiry, expiryDate = cachedToken
+            if time.monotonic() >= cacheExpiry or datetime.now() >= expiryDate:
+                del self._tokens[token]
+                return False
+
+            self._tokens.move_to_end(token)
+            return True
+
+    def addToken(self, token, expiryDate):
+        with self._lock:
+            self._tokens[token] = (time.monotonic() + self._ttl, expiryDate)
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self._maxSize:
+                self._tokens.popitem(last=False)
+
+    def invalidate(self, token):
+        with self._lock:
+            self._tokens.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tokens)
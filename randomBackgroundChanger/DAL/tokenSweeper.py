@@ -0,0 +1,42 @@
+
+import threading
+import time
+
+from randomBackgroundChanger.DAL import database, queries
+
+
+class ExpiredTokenSweeper:
+    """ Periodically delete expired tokens from the database
+    """
+
+    def __init__(self, interval=60 * 60, batchSize=500):
+        self._interval = interval
+        self._batchSize = batchSize
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self.sweep()
+            time.sleep(self._interval)
+
+    def sweep(self):
+        try:
+            return sum(
+                queries.deleteExpiredTokens(self._batchSize, tokenTable)
+                for tokenTable in (database.Token, database.RevokedToken)
+            )
+        except Exception as e:
+            print("Could not delete expired tokens")
+            print(str(e))
+            return 0
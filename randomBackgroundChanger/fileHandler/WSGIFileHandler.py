@@ -19,6 +19,10 @@ class GunicornBase(ABC, BaseApplication):
     def load(self):
         return self._application.app
 
+    def postWorkerInit(self, worker):
+        # background threads don't survive the fork, so start them in the worker
+        self._application.startBackgroundTasks()
+
     @property
     @abstractmethod
     def options(self):
@@ -29,8 +33,11 @@ class WSGIFileHandler(GunicornBase):
 
     @property
     def options(self):
+        # sendfile is left out, gunicorn sends images straight from the file to the socket by default
+        # and setting the option to anything turns it off
         return {
             "bind": f"0.0.0.0:5000",
             "workers": 1,
-            "worker_class": "eventlet"
+            "worker_class": "eventlet",
+            "post_worker_init": self.postWorkerInit
         }
@@ -0,0 +1,158 @@
+
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class BackgroundSettingsUnavailable(Exception):
+    pass
+
+
+class BackgroundSettings(ABC):
+    """ Where the desktop keeps its background, listeners are called with the new picture URI when it is
+        changed outside the server
+    """
+
+    def __init__(self):
+        self._changeListeners = []
+
+    def addChangeListener(self, listener):
+        self._changeListeners.append(listener)
+
+    def _notifyChangeListeners(self, pictureUri):
+        for listener in self._changeListeners:
+            listener(pictureUri)
+
+    def start(self):
+        """ Start watching for changes made outside the server
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def pictureUri(self):
+        pass
+
+    @abstractmethod
+    def setBackground(self, pictureUri, pictureOptions):
+        pass
+
+
+class GioBackgroundSettings(BackgroundSettings):
+    """ Talk to GSettings in process over a single connection, rather than starting gsettings for every
+        read and write
+    """
+
+    schema = "org.gnome.desktop.background"
+    # seconds between dispatching change notifications
+    pollInterval = 1
+
+    def __init__(self):
+        super().__init__()
+        # PyGObject needs the system's GLib, so it is only imported when it is used
+        from gi.repository import Gio, GLib
+
+        # Gio.Settings.new aborts the whole process when the schema isn't installed
+        schemaSource = Gio.SettingsSchemaSource.get_default()
+        if not schemaSource or not schemaSource.lookup(self.schema, True):
+            raise BackgroundSettingsUnavailable(f"The {self.schema} GSettings schema isn't installed")
+
+        self._settings = Gio.Settings.new(self.schema)
+        # writes are held back until apply, so the picture and its options change together
+        self._settings.delay()
+        self._mainContext = GLib.MainContext.default()
+        self._pictureUri = self._settings.get_string("picture-uri")
+        self._settings.connect("changed::picture-uri", self._pictureUriChanged)
+        self._thread = None
+
+    @property
+    def pictureUri(self):
+        return self._pictureUri
+
+    def setBackground(self, pictureUri, pictureOptions):
+        self._settings.set_string("picture-uri", pictureUri)
+        self._settings.set_string("picture-options", pictureOptions)
+        self._settings.apply()
+        self._pictureUri = pictureUri
+
+    def _pictureUriChanged(self, settings, key):
+        pictureUri = settings.get_string(key)
+        if pictureUri == self._pictureUri:
+            # the server's own change coming back
+            return
+        self._pictureUri = pictureUri
+        self._notifyChangeListeners(pictureUri)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # signals are only dispatched while the GLib main context is iterated, which is done without
+        # blocking so the server's event loop keeps running
+        while True:
+            while self._mainContext.pending():
+                self._mainContext.iteration(False)
+            time.sleep(self.pollInterval)
+
+
+class GSettingsCommandBackgroundSettings(BackgroundSettings):
+    """ Run the gsettings command, for desktops without PyGObject
+    """
+
+    command = ["/usr/bin/gsettings"]
+    schema = "org.gnome.desktop.background"
+
+    @property
+    def pictureUri(self):
+        pictureUri = subprocess.run(
+            [*self.command, "get", self.schema, "picture-uri"], stdout=subprocess.PIPE
+        ).stdout
+        # remove fat from response
+        return pictureUri.decode().split("'")[1]
+
+    def setBackground(self, pictureUri, pictureOptions):
+        subprocess.run([*self.command, "set", self.schema, "picture-uri", pictureUri])
+        subprocess.run([*self.command, "set", self.schema, "picture-options", pictureOptions])
+
+
+class MemoryBackgroundSettings(BackgroundSettings):
+    """ Keep the background in memory, for tests and machines without a desktop
+    """
+
+    def __init__(self, pictureUri=""):
+        super().__init__()
+        self._pictureUri = pictureUri
+        self._pictureOptions = None
+
+    @property
+    def pictureUri(self):
+        return self._pictureUri
+
+    @property
+    def pictureOptions(self):
+        return self._pictureOptions
+
+    def setBackground(self, pictureUri, pictureOptions):
+        self._pictureUri = pictureUri
+        self._pictureOptions = pictureOptions
+
+    def changeBackground(self, pictureUri):
+        """ Act as if the background was changed outside the server
+        """
+        self._pictureUri = pictureUri
+        self._notifyChangeListeners(pictureUri)
+
+
+def createBackgroundSettings():
+    """ Use GSettings in process when PyGObject and the background schema are installed, otherwise fall
+        back to the gsettings command
+    """
+    try:
+        return GioBackgroundSettings()
+    except (ImportError, BackgroundSettingsUnavailable):
+        return GSettingsCommandBackgroundSettings()
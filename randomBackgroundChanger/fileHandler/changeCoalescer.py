@@ -0,0 +1,95 @@
+
+import copy
+import threading
+import time
+
+
+class _ChangeBatch:
+
+    def __init__(self):
+        self.requests = 0
+        self.jobIds = []
+        self.error = None
+        self.done = threading.Event()
+
+
+def _waiterError(error):
+    """ A copy of the batch's exception for one waiter, raising the same instance in several threads
+        would mix up their tracebacks
+    """
+    try:
+        return copy.copy(error)
+    except Exception:
+        return error
+
+
+class ChangeCoalescer:
+    """ Merge background changes requested within the same window into a single cycle, in "single" mode
+        the batch advances one image and in "count" mode it advances one image per request. A change
+        requested after a quiet spell cycles straight away, the window only gathers the changes that
+        arrive while a cycle is running or soon after one
+    """
+
+    modes = ("single", "count")
+
+    def __init__(self, fileHandler, window=0.25, mode="single"):
+        if window < 0:
+            raise ValueError("The coalesce window can't be negative")
+        if mode not in self.modes:
+            raise ValueError(f"The coalesce mode must be one of {', '.join(self.modes)}")
+
+        self._fileHandler = fileHandler
+        self._window = window
+        self._mode = mode
+        self._batch = None
+        self._batchLock = threading.Lock()
+        # a new batch can collect requests while the previous one is still cycling
+        self._cycleLock = threading.Lock()
+        self._quietAt = 0
+
+    def cycleBackgroundImage(self, jobIds=()):
+        """ Wait for the batch this request joined to cycle, every request in a batch gets the same
+            result or exception
+        """
+        with self._batchLock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = _ChangeBatch()
+                # with nothing else going on there is no one to wait for
+                gatherFollowers = self._cycleLock.locked() or time.monotonic() < self._quietAt
+                if gatherFollowers:
+                    self._batch = batch
+                else:
+                    # requests that arrive before this cycle starts gather behind it
+                    self._quietAt = time.monotonic() + self._window
+            batch.requests += 1
+            batch.jobIds.extend(jobIds)
+
+        if leader:
+            if gatherFollowers:
+                time.sleep(self._window)
+                with self._batchLock:
+                    self._batch = None
+            self._runBatch(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error:
+            if leader:
+                raise batch.error
+            raise _waiterError(batch.error) from batch.error
+
+    def _runBatch(self, batch):
+        count = batch.requests if self._mode == "count" else 1
+        updateDetails = {"jobIds": batch.jobIds} if batch.jobIds else {}
+        try:
+            with self._cycleLock:
+                try:
+                    self._fileHandler.cycleBackgroundImage(count=count, **updateDetails)
+                finally:
+                    self._quietAt = time.monotonic() + self._window
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
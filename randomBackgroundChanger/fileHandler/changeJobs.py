@@ -0,0 +1,59 @@
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from uuid import uuid4
+
+
+@dataclass
+class ChangeJob:
+
+    jobId: str = field(default_factory=lambda: str(uuid4()))
+    status: str = "queued"
+    createdAt: str = field(default_factory=lambda: datetime.now().isoformat())
+    finishedAt: str = None
+    error: str = None
+
+    def toJson(self):
+        return asdict(self)
+
+
+class ChangeJobManager:
+    """ Run background changes off the request, so requests can return straight away with a job ID
+    """
+
+    def __init__(self, fileHandler, maxJobs=100, concurrency=1):
+        self._fileHandler = fileHandler
+        self._maxJobs = maxJobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        # with one worker the changes run in the order they were requested, more workers are only
+        # useful when the file handler coalesces concurrent changes
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ChangeJobManager")
+
+    def submit(self):
+        job = ChangeJob()
+        with self._lock:
+            self._jobs[job.jobId] = job
+            while len(self._jobs) > self._maxJobs:
+                self._jobs.popitem(last=False)
+
+        self._executor.submit(self._runJob, job)
+        return job
+
+    def getJob(self, jobId):
+        with self._lock:
+            return self._jobs.get(jobId)
+
+    def _runJob(self, job):
+        job.status = "running"
+        try:
+            self._fileHandler.cycleBackgroundImage(jobIds=[job.jobId])
+            job.status = "complete"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e) or e.__class__.__name__
+        finally:
+            job.finishedAt = datetime.now().isoformat()
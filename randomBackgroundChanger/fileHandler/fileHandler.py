@@ -1,42 +1,65 @@
 
 import json
 import os
-from uuid import uuid4
+from datetime import datetime
 import secrets
-import subprocess
-import shutil
 from abc import abstractmethod, ABC
 
 import gevent.monkey
 # https://github.com/gevent/gevent/issues/941
 gevent.monkey.patch_all()
-import requests
-from multiprocessing import Process, Lock
-from werkzeug.exceptions import Unauthorized, TooManyRequests, BadRequest
+from multiprocessing import Lock
+from werkzeug.datastructures import ContentRange
+from werkzeug.exceptions import (
+    Unauthorized, TooManyRequests, BadRequest, NotFound, RequestedRangeNotSatisfiable
+)
 from flask import Flask, Response, request, send_file
 from flask_cors import cross_origin, CORS
 from flask_socketio import SocketIO, ConnectionRefusedError
 from functools import wraps
 
 from randomBackgroundChanger.DAL import queries
+from randomBackgroundChanger.DAL.tokenCache import TokenCache
+from randomBackgroundChanger.DAL.tokenSweeper import ExpiredTokenSweeper
+from randomBackgroundChanger.fileHandler.backgroundSettings import createBackgroundSettings
+from randomBackgroundChanger.fileHandler.changeCoalescer import ChangeCoalescer
+from randomBackgroundChanger.fileHandler.changeJobs import ChangeJobManager
+from randomBackgroundChanger.fileHandler.fileRange import fileRangeBody
+from randomBackgroundChanger.fileHandler.imageDownloader import ImageDownloader
+from randomBackgroundChanger.fileHandler.imageMetadata import ImageMetadataCache
+from randomBackgroundChanger.fileHandler.imagePreviews import ImagePreviews, PreviewUnavailable
+from randomBackgroundChanger.fileHandler.imagePrefetcher import (
+    AlreadyDownloadingImagesException, ImagePrefetcher
+)
+from randomBackgroundChanger.fileHandler.imageQueue import ImageDirectoryWatcher, ImageQueue
+from randomBackgroundChanger.fileHandler.imageScaler import ImageScaler
+from randomBackgroundChanger.fileHandler.rotationScheduler import RotationSchedule, RotationScheduler
+from randomBackgroundChanger.fileHandler.tokenSigner import TokenSigner
 from randomBackgroundChanger.imgur.imgurAuthenticator import InvalidPin
 
 PORT = 5000
 
+# the dashboard polls constantly, so avoid a database query for tokens that were recently validated
+tokenCache = TokenCache()
 
-def checkAuthorisationToken(request_):
+
+def checkAuthorisationToken(request_, tokenSigner=None):
     authorisationHeader = request_.headers.get("Authorization")
     if not authorisationHeader or len(authorisationHeader.split(" ")) == 1:
         return False
 
     authorisationToken = authorisationHeader.split(" ")[1]
-    if not queries.validToken(authorisationToken):
-        return False
-    return True
+    if tokenSigner and tokenSigner.isSignedToken(authorisationToken):
+        return tokenSigner.validToken(authorisationToken)
 
+    if tokenCache.validToken(authorisationToken):
+        return True
 
-class AlreadyDownloadingImagesException(Exception):
-    pass
+    expiryDate = queries.tokenExpiryDate(authorisationToken)
+    if not expiryDate or expiryDate <= datetime.now():
+        return False
+    tokenCache.addToken(authorisationToken, expiryDate)
+    return True
 
 
 class FileHandlerSubject:
@@ -50,83 +73,159 @@ class FileHandlerSubject:
     def removeListener(self, listener):
         self._listeners.remove(listener)
 
-    def notifyListeners(self):
+    def notifyListeners(self, **updateDetails):
         for listener in self._listeners:
-            listener.imageChangeUpdate()
+            listener.imageChangeUpdate(**updateDetails)
 
 
 class FileHandler(FileHandlerSubject):
 
-    def __init__(self, imgurController):
+    # seconds a cycle waits for the first image of a new batch when the queue has run dry
+    imageWaitTimeout = 60
+
+    def __init__(
+            self, imgurController, lowWatermark=5, highWatermark=20, watchImageDirectory=False,
+            downloadConcurrency=8, downloadLimits=None, imageRules=None, rotationSchedule=None,
+            previewCacheBytes=64 * 1024 * 1024, scaleSettings=None
+    ):
         super().__init__()
         self._imageController = imgurController
         self._downloadingImages = Lock()
-        self._listingImages = Lock()
+        self._imageDownloader = ImageDownloader(
+            self.getFilePath(".partial"), downloadConcurrency, downloadLimits, imageRules,
+            ImageScaler(scaleSettings) if scaleSettings else None
+        )
+        self._imageQueue = ImageQueue(self.directoryPath)
+        self._imagePrefetcher = ImagePrefetcher(self, self._imageQueue, lowWatermark, highWatermark)
+        self._imageDirectoryWatcher = ImageDirectoryWatcher(self._imageQueue) if watchImageDirectory else None
+        self._rotationScheduler = RotationScheduler(self, rotationSchedule)
+        self._imageMetadataCache = ImageMetadataCache()
+        self._imagePreviews = ImagePreviews(self.getFilePath(".previews"), previewCacheBytes)
+
+    @property
+    def rotationScheduler(self):
+        return self._rotationScheduler
+
+    @property
+    def imagePreviews(self):
+        return self._imagePreviews
+
+    def imageDetails(self, imagePath):
+        """ The metadata of an image along with its title, None if the image doesn't exist
+        """
+        imageMetadata = self.imageMetadata(imagePath)
+        if not imageMetadata:
+            return None
+        return {"title": os.path.basename(imagePath), **imageMetadata.toJson()}
+
+    def imageMetadata(self, imagePath):
+        """ The cached metadata of an image, None if the image doesn't exist
+        """
+        if not imagePath:
+            return None
+
+        try:
+            return self._imageMetadataCache.getMetadata(imagePath)
+        except FileNotFoundError:
+            # the image was cycled away while we were looking at it
+            return None
+
+    def queuedImagePath(self, imageHash):
+        """ The path of the queued image with the hash, None if there isn't one
+        """
+        imagePath = self._imageMetadataCache.findPath(imageHash)
+        return imagePath if imagePath in self._imageQueue else None
 
     @property
     def imageFilePaths(self):
-        with self._listingImages:
-            return sorted([
-                self.getFilePath(filePath) for filePath
-                in os.listdir(self.directoryPath)
-                if ".gitkeep" not in filePath
-            ])
+        return self._imageQueue.paths
 
     @property
     def currentImagePath(self):
-        if self.imageFilePaths:
-            return self.imageFilePaths[0]
+        return self._imageQueue.first
 
     @property
     def currentBackgroundImage(self):
-        if self.imageFilePaths:
-            return self.imageFilePaths[0]
+        return self._imageQueue.first
 
-    def cycleBackgroundImage(self):
-        """ Change the background to the next image in the queue
+    def cycleBackgroundImage(self, count=1, **updateDetails):
+        """ Advance the background by count images in the queue, the update details are passed on to
+            the listeners
         """
-        if len(self.imageFilePaths) <= 1:
-            if self._downloadingImages.acquire(block=False):
-                try:
-                    self.getImages()
-                finally:
-                    self._downloadingImages.release()
-            else:
+        if len(self._imageQueue) <= count:
+            # the prefetcher hasn't kept up, only wait for the first images of the next batch
+            self._imagePrefetcher.waitForImages(count + 1, timeout=self.imageWaitTimeout)
+            if len(self._imageQueue) <= 1:
                 raise AlreadyDownloadingImagesException
+            # skip as far as the images that did arrive
+            count = min(count, len(self._imageQueue) - 1)
 
         self._deleteLastImage()
-        self.notifyListeners()
+        for _ in range(count - 1):
+            self._deleteImage(self._imageQueue.first)
+        self.notifyListeners(image=self.imageDetails(self.currentImagePath), **updateDetails)
+        self._imagePrefetcher.checkQueue()
+
+    def prefetchImages(self):
+        """ Top up the queue in the background if it is running low
+        """
+        self._imagePrefetcher.checkQueue()
+
+    def refillImages(self):
+        """ Download a new batch of images, unless another batch is already being downloaded
+        """
+        if not self._downloadingImages.acquire(block=False):
+            raise AlreadyDownloadingImagesException
+
+        try:
+            self.getImages()
+        finally:
+            self._downloadingImages.release()
+
+    def refreshCurrentBackground(self):
+        """ Read the current background from the desktop again, there isn't a desktop to read from here
+        """
+        pass
+
+    def startBackgroundTasks(self):
+        self._imageDownloader.recoverPartialDownloads()
+        if self._imageDirectoryWatcher:
+            self._imageDirectoryWatcher.start()
+        self._imagePrefetcher.start()
+        self._rotationScheduler.start()
 
     def getImages(self):
         """ Request new image URLs from the image controller
         """
         imgurImages = self._imageController.requestNewImages()
-        runningProcesses = []
-        for imgurImage in imgurImages:
-            imageDownloadProcess = Process(target=self._downloadImage, args=(imgurImage, ))
-            imageDownloadProcess.start()
-            runningProcesses.append(imageDownloadProcess)
-
-        # ensure all images have downloaded before continuing
-        for runningProcess in runningProcesses:
-            runningProcess.join()
-
-    def _downloadImage(self, imgurImage):
-        response = requests.get(imgurImage.imageURL, stream=True)
-        fileName = self.getFilePath(imgurImage.imageTitle)
-        with open(fileName, "wb") as imageFile:
-            shutil.copyfileobj(response.raw, imageFile)
+        downloads = [
+            (imgurImage, self.getFilePath(imgurImage.imageTitle)) for imgurImage in imgurImages
+        ]
+        # publish each image as soon as it lands so waiting cycles don't wait for the whole batch
+        for filePath in self._imageDownloader.downloadImages(downloads):
+            self._imageQueue.add(filePath)
+            self._imagePreviews.warm(filePath, self._imageHash)
+
+    def _imageHash(self, imagePath):
+        return self._imageMetadataCache.getMetadata(imagePath).hash
 
     def _deleteLastImage(self):
-        if self.currentBackgroundImage not in self.imageFilePaths:
+        currentBackgroundImage = self.currentBackgroundImage
+        if currentBackgroundImage not in self._imageQueue:
             # Don't delete images that haven't been downloaded by the image controller
             return
 
+        self._deleteImage(currentBackgroundImage)
+
+    def _deleteImage(self, imagePath):
         try:
-            os.remove(self.currentBackgroundImage)
+            os.remove(imagePath)
         except Exception as e:
             print("Could not delete file")
             print(str(e))
+        finally:
+            self._imageQueue.remove(imagePath)
+            self._imageMetadataCache.discard(imagePath)
 
     def getFilePath(self, fileName):
         return os.path.join(self.directoryPath, fileName)
@@ -134,6 +233,10 @@ class FileHandler(FileHandlerSubject):
     def addPin(self, pin):
         self._imageController.imgurAuthenticator.addPin(pin)
 
+    @property
+    def creditBudget(self):
+        return self._imageController.creditBudget
+
     @property
     def directoryPath(self):
         return os.path.join(os.getcwd(), "backgroundImages")
@@ -141,17 +244,29 @@ class FileHandler(FileHandlerSubject):
 
 class HTTPAuthenticator(Flask):
 
-    def __init__(self, clientId, clientSecret, *args, **kwargs):
+    def __init__(self, clientId, clientSecret, *args, signedTokens=False, **kwargs):
         super().__init__(self.__class__.__name__, *args, **kwargs)
 
         self._clientId = clientId
         self._clientSecret = clientSecret
+        self._expiredTokenSweeper = ExpiredTokenSweeper()
+        # signed tokens are validated without a database lookup
+        self._tokenSigner = TokenSigner(clientSecret) if signedTokens else None
 
         self.add_url_rule("/token", view_func=self.addToken, methods=["POST"])
         self.add_url_rule("/token", view_func=self.revokeToken, methods=["DELETE"])
 
         CORS(self)
 
+    @property
+    def tokenSigner(self):
+        return self._tokenSigner
+
+    def startBackgroundTasks(self):
+        self._expiredTokenSweeper.start()
+        if self._tokenSigner:
+            self._tokenSigner.start()
+
     @staticmethod
     def tokenResponse(token):
         return Response(
@@ -161,8 +276,11 @@ class HTTPAuthenticator(Flask):
     @cross_origin(automatic_options=True)
     def addToken(self):
         self.checkValidSecretAndId()
-        token = secrets.token_urlsafe(64)
         validDays = min(request.json.get("validDays", 30), 120)
+        if self._tokenSigner:
+            return self.tokenResponse(self._tokenSigner.createToken(validDays))
+
+        token = secrets.token_urlsafe(64)
         queries.addNewToken(token, validDays)
         return self.tokenResponse(token)
 
@@ -170,7 +288,11 @@ class HTTPAuthenticator(Flask):
     def revokeToken(self):
         self.checkValidSecretAndId()
         token = request.json.get("token")
-        queries.revokeToken(token)
+        if self._tokenSigner and self._tokenSigner.isSignedToken(token):
+            self._tokenSigner.revokeToken(token)
+        else:
+            queries.revokeToken(token)
+            tokenCache.invalidate(token)
         return self.tokenResponse(token)
 
     def checkValidSecretAndId(self):
@@ -182,25 +304,44 @@ class HTTPAuthenticator(Flask):
     @staticmethod
     def checkTokenExists(func):
         @wraps(func)
-        def _innerFunc(self):
-            if not checkAuthorisationToken(request):
+        def _innerFunc(self, *args, **kwargs):
+            if not checkAuthorisationToken(request, self.tokenSigner):
                 raise Unauthorized
 
-            return func(self)
+            return func(self, *args, **kwargs)
         return _innerFunc
 
 
 class HTTPFileHandler(HTTPAuthenticator):
 
-    def __init__(self, fileHandler, clientId, clientSecret, *args, **kwargs):
+    def __init__(
+            self, fileHandler, clientId, clientSecret, *args, coalesceWindow=0, coalesceMode="single", **kwargs
+    ):
         super().__init__(clientId, clientSecret, *args, **kwargs)
 
         self.add_url_rule("/", view_func=self.homePage, methods=["GET"])
         self.add_url_rule("/change-background", view_func=self.changeBackground, methods=["POST", "GET"])
+        self.add_url_rule("/change-background/<jobId>", view_func=self.changeBackgroundJob, methods=["GET"])
+        self.add_url_rule("/refresh-background", view_func=self.refreshBackground, methods=["POST"])
         self.add_url_rule("/current-image", view_func=self.currentImage, methods=["GET"])
+        self.add_url_rule("/current-image-hash", view_func=self.currentImageHash, methods=["GET"])
+        self.add_url_rule("/image-preview", view_func=self.imagePreview, methods=["GET"])
+        self.add_url_rule("/image-preview/placeholder", view_func=self.imagePreviewPlaceholder, methods=["GET"])
         self.add_url_rule("/imgur-pin", view_func=self.imgurPin, methods=["POST"])
+        self.add_url_rule("/imgur-credits", view_func=self.imgurCredits, methods=["GET"])
+        self.add_url_rule("/schedule", view_func=self.getSchedule, methods=["GET"])
+        self.add_url_rule("/schedule", view_func=self.setSchedule, methods=["PUT"])
+        self.add_url_rule("/schedule", view_func=self.deleteSchedule, methods=["DELETE"])
 
         self._fileHandler = fileHandler
+        if coalesceWindow:
+            # changes requested close together share a single cycle
+            self._backgroundCycler = ChangeCoalescer(fileHandler, coalesceWindow, coalesceMode)
+            self._changeJobManager = ChangeJobManager(self._backgroundCycler, concurrency=8)
+            fileHandler.rotationScheduler.setBackgroundCycler(self._backgroundCycler)
+        else:
+            self._backgroundCycler = fileHandler
+            self._changeJobManager = ChangeJobManager(fileHandler)
 
     @cross_origin(automatic_options=True)
     def homePage(self):
@@ -219,35 +360,231 @@ class HTTPFileHandler(HTTPAuthenticator):
             raise BadRequest(str(e))
         return Response(status=200)
 
+    @cross_origin(automatic_options=True)
+    @HTTPAuthenticator.checkTokenExists
+    def imgurCredits(self):
+        creditBudget = self._fileHandler.creditBudget
+        if not creditBudget:
+            raise NotFound("Imgur credits aren't being tracked")
+        return Response(response=json.dumps(creditBudget.toJson()), mimetype="application/json", status=200)
+
+    def scheduleResponse(self):
+        rotationScheduler = self._fileHandler.rotationScheduler
+        schedule = rotationScheduler.schedule
+        nextRun = rotationScheduler.nextRun
+        return Response(
+            response=json.dumps({
+                "schedule": schedule.toJson() if schedule else None,
+                "nextRun": nextRun.isoformat() if schedule and nextRun else None
+            }),
+            mimetype="application/json", status=200
+        )
+
+    @cross_origin(automatic_options=True)
+    @HTTPAuthenticator.checkTokenExists
+    def getSchedule(self):
+        return self.scheduleResponse()
+
+    @cross_origin(automatic_options=True)
+    @HTTPAuthenticator.checkTokenExists
+    def setSchedule(self):
+        try:
+            schedule = RotationSchedule(
+                interval=request.json.get("interval"),
+                cron=request.json.get("cron"),
+                jitter=request.json.get("jitter", 0)
+            )
+        except (TypeError, ValueError) as e:
+            raise BadRequest(str(e))
+
+        self._fileHandler.rotationScheduler.setSchedule(schedule)
+        return self.scheduleResponse()
+
+    @cross_origin(automatic_options=True)
+    @HTTPAuthenticator.checkTokenExists
+    def deleteSchedule(self):
+        self._fileHandler.rotationScheduler.setSchedule(None)
+        return self.scheduleResponse()
+
     @cross_origin(automatic_options=True)
     @HTTPAuthenticator.checkTokenExists
     def changeBackground(self):
+        if request.args.get("async", "").lower() in ("1", "true"):
+            # don't hold the request open while the next image downloads
+            job = self._changeJobManager.submit()
+            return Response(
+                response=json.dumps(job.toJson()), mimetype="application/json", status=202,
+                headers={"Location": f"/change-background/{job.jobId}"}
+            )
+
         try:
-            self._fileHandler.cycleBackgroundImage()
+            self._backgroundCycler.cycleBackgroundImage()
         except AlreadyDownloadingImagesException:
             raise TooManyRequests
         return Response(status=200)
 
+    @cross_origin(automatic_options=True)
+    @HTTPAuthenticator.checkTokenExists
+    def refreshBackground(self):
+        self._fileHandler.refreshCurrentBackground()
+        return Response(status=200)
+
+    @cross_origin(automatic_options=True)
+    @HTTPAuthenticator.checkTokenExists
+    def changeBackgroundJob(self, jobId):
+        job = self._changeJobManager.getJob(jobId)
+        if not job:
+            raise NotFound(f"No change job with the ID {jobId}")
+        return Response(response=json.dumps(job.toJson()), mimetype="application/json", status=200)
+
     @cross_origin(automatic_options=True)
     @HTTPAuthenticator.checkTokenExists
     def currentImage(self):
-        return send_file(
-            self._fileHandler.currentImagePath,
-            mimetype="image/gif",
-            # set a random download name as the name can effect the headers
-            download_name=str(uuid4())
+        currentImagePath = self._fileHandler.currentImagePath
+        imageMetadata = self._fileHandler.imageMetadata(currentImagePath)
+        if not imageMetadata:
+            raise NotFound("There isn't a current image")
+
+        try:
+            byteRange = self.requestedByteRange(imageMetadata)
+            if byteRange:
+                return self.byteRangeResponse(currentImagePath, imageMetadata, *byteRange)
+
+            return self.imageResponse(currentImagePath, imageMetadata)
+        except FileNotFoundError:
+            raise NotFound("There isn't a current image")
+
+    @staticmethod
+    def imageResponse(imagePath, imageMetadata):
+        """ The whole image, clients that already have it get a 304 instead, anything the byte range
+            response doesn't handle is also left to this response
+        """
+        # send_file would add the file's mtime as a Last-Modified, but that is when the image was downloaded
+        # rather than when it became the current image, so the hash is the only validator
+        response = Response(
+            fileRangeBody(request.environ, imagePath, 0, imageMetadata.size),
+            mimetype=imageMetadata.mimeType, direct_passthrough=True
+        )
+        response.content_length = imageMetadata.size
+        # name the file after its hash as the original name can effect the headers
+        response.headers.set("Content-Disposition", "inline", filename=imageMetadata.hash)
+        response.set_etag(imageMetadata.hash)
+        response.cache_control.no_cache = True
+        # without the length werkzeug leaves ranges to the byte range response, it would honour weak If-Ranges
+        return response.make_conditional(request.environ, accept_ranges=True)
+
+    @staticmethod
+    def requestedByteRange(imageMetadata):
+        """ The (start, stop) of a single satisfiable byte range request for the image, otherwise None
+        """
+        if not request.range or len(request.range.ranges) != 1 or request.if_none_match.contains(imageMetadata.hash):
+            return None
+
+        # only a strong ETag shows the client's part came from this image, dates can't as no Last-Modified
+        # is sent, so anything else gets the whole image
+        ifRange = request.headers.get("If-Range")
+        if ifRange and (ifRange.startswith("W/") or request.if_range.etag != imageMetadata.hash):
+            return None
+
+        byteRange = request.range.range_for_length(imageMetadata.size)
+        if not byteRange:
+            raise RequestedRangeNotSatisfiable(length=imageMetadata.size)
+        return byteRange
+
+    @staticmethod
+    def byteRangeResponse(imagePath, imageMetadata, start, stop):
+        # werkzeug wraps ranges of files in an iterator, which stops gunicorn from using sendfile
+        response = Response(
+            fileRangeBody(request.environ, imagePath, start, stop), status=206,
+            mimetype=imageMetadata.mimeType, direct_passthrough=True
+        )
+        response.content_length = stop - start
+        response.content_range = ContentRange("bytes", start, stop, imageMetadata.size)
+        response.accept_ranges = "bytes"
+        response.set_etag(imageMetadata.hash)
+        return response
+
+    def requestedImage(self):
+        """ The queued image with the hash query parameter, or at the index query parameter, and its
+            metadata, the current image by default
+        """
+        imageHash = request.args.get("hash")
+        if imageHash:
+            imagePath = self._fileHandler.queuedImagePath(imageHash)
+            imageMetadata = self._fileHandler.imageMetadata(imagePath)
+            if not imageMetadata or imageMetadata.hash != imageHash:
+                raise NotFound(f"There isn't a queued image with the hash {imageHash}")
+            return imagePath, imageMetadata
+
+        index = request.args.get("index", 0, type=int)
+        if index < 0:
+            raise BadRequest("The image index can't be negative")
+
+        imageFilePaths = self._fileHandler.imageFilePaths
+        imagePath = imageFilePaths[index] if index < len(imageFilePaths) else None
+        imageMetadata = self._fileHandler.imageMetadata(imagePath)
+        if not imageMetadata:
+            raise NotFound(f"There isn't an image at index {index}")
+        return imagePath, imageMetadata
+
+    @cross_origin(automatic_options=True)
+    @HTTPAuthenticator.checkTokenExists
+    def imagePreview(self):
+        imagePath, imageMetadata = self.requestedImage()
+        width = request.args.get("width", type=int)
+        try:
+            previewPath = self._fileHandler.imagePreviews.getPreview(imagePath, imageMetadata.hash, width)
+        except ValueError as e:
+            raise BadRequest(str(e))
+        except PreviewUnavailable as e:
+            raise NotFound(f"Could not create a preview of the image: {e}")
+
+        previewName = os.path.basename(previewPath)
+        try:
+            # previews are keyed by the image hash so they never change
+            return send_file(
+                previewPath, mimetype="image/jpeg", download_name=previewName, etag=previewName,
+                conditional=True, max_age=86400
+            )
+        except FileNotFoundError:
+            raise NotFound("The preview was removed from the cache")
+
+    @cross_origin(automatic_options=True)
+    @HTTPAuthenticator.checkTokenExists
+    def imagePreviewPlaceholder(self):
+        imagePath, imageMetadata = self.requestedImage()
+        try:
+            placeholder = self._fileHandler.imagePreviews.getPlaceholder(imagePath, imageMetadata.hash)
+        except (PreviewUnavailable, FileNotFoundError) as e:
+            raise NotFound(f"Could not create a placeholder of the image: {e}")
+        return Response(
+            response=json.dumps({"hash": imageMetadata.hash, "placeholder": placeholder}),
+            mimetype="application/json", status=200
+        )
+
+    @cross_origin(automatic_options=True)
+    @HTTPAuthenticator.checkTokenExists
+    def currentImageHash(self):
+        imageMetadata = self._fileHandler.imageMetadata(self._fileHandler.currentImagePath)
+        if not imageMetadata:
+            raise NotFound("There isn't a current image")
+        return Response(
+            response=json.dumps({"hash": imageMetadata.hash}), mimetype="application/json", status=200
         )
 
 
 class FileHandlerListener(ABC):
 
     @abstractmethod
-    def imageChangeUpdate(self):
+    def imageChangeUpdate(self, **updateDetails):
         pass
 
 
 class WSFileHandler(SocketIO, FileHandlerListener):
 
+    # width of the preview linked from change events
+    previewWidth = 320
+
     def __init__(self, fileHandler, httpFileHandler):
         self._httpFileHandler = httpFileHandler
         super().__init__(self._httpFileHandler, cors_allowed_origins="*")
@@ -257,20 +594,30 @@ class WSFileHandler(SocketIO, FileHandlerListener):
         fileHandler.addListener(self)
 
     def connect(self):
-        if not checkAuthorisationToken(request):
+        if not checkAuthorisationToken(request, self._httpFileHandler.tokenSigner):
             raise ConnectionRefusedError("Unauthorised!")
 
-    def imageChangeUpdate(self):
-        self.emit("image-change-update", {})
+    def imageChangeUpdate(self, **updateDetails):
+        image = updateDetails.get("image")
+        if image:
+            # the hash keeps pointing at the same image after the next change, unlike an index
+            image["previewUrl"] = f"/image-preview?hash={image['hash']}&width={self.previewWidth}"
+        self.emit("image-change-update", updateDetails)
 
 
 class WebFileHandler:
 
     def __init__(self, fileHandler, *args, **kwargs):
+        self._fileHandler = fileHandler
         self._httpFileHandler = HTTPFileHandler(fileHandler, *args, **kwargs)
         self._wsFileHandler = WSFileHandler(fileHandler, self._httpFileHandler)
 
+    def startBackgroundTasks(self):
+        self._httpFileHandler.startBackgroundTasks()
+        self._fileHandler.startBackgroundTasks()
+
     def start(self):
+        self.startBackgroundTasks()
         self._wsFileHandler.run(self._httpFileHandler)
 
     @property
@@ -280,16 +627,41 @@ class WebFileHandler:
 
 class BackgroundChanger(FileHandler, ABC):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the image applied to the desktop, only read from the desktop when it may have changed elsewhere
+        self._currentBackgroundImage = None
+        self._currentBackgroundLoaded = False
+
     @property
     def currentBackgroundImage(self):
-        return self._getCurrentImage()
-
-    def cycleBackgroundImage(self):
-        super().cycleBackgroundImage()
-        self._setCurrentImage()
+        if not self._currentBackgroundLoaded:
+            self.refreshCurrentBackground()
+        return self._currentBackgroundImage
+
+    def refreshCurrentBackground(self):
+        self._currentBackgroundImage = self._getCurrentImage()
+        self._currentBackgroundLoaded = True
+
+    def startBackgroundTasks(self):
+        super().startBackgroundTasks()
+        self.refreshCurrentBackground()
+
+    def cycleBackgroundImage(self, count=1, **updateDetails):
+        super().cycleBackgroundImage(count, **updateDetails)
+        currentImagePath = self.currentImagePath
+        self._setCurrentImage(currentImagePath)
+        self._currentBackgroundImage = currentImagePath
+        self._currentBackgroundLoaded = True
+
+    def _backgroundChanged(self, imagePath):
+        """ Called when the background was changed outside the server
+        """
+        self._currentBackgroundImage = imagePath
+        self._currentBackgroundLoaded = True
 
     @abstractmethod
-    def _setCurrentImage(self):
+    def _setCurrentImage(self, imagePath):
         pass
 
     @abstractmethod
@@ -299,17 +671,26 @@ class BackgroundChanger(FileHandler, ABC):
 
 class GSettingsHTTPBackgroundChanger(BackgroundChanger):
 
-    def _setCurrentImage(self):
-        subprocess.run(
-            ["/usr/bin/gsettings", "set", "org.gnome.desktop.background", "picture-uri", self.currentImagePath]
-        )
-        subprocess.run(
-            ["/usr/bin/gsettings", "set", "org.gnome.desktop.background", "picture-options", "scaled"]
-        )
+    def __init__(self, *args, backgroundSettingsFactory=createBackgroundSettings, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._backgroundSettingsFactory = backgroundSettingsFactory
+        self._backgroundSettings = None
+
+    @property
+    def backgroundSettings(self):
+        # created on first use in the worker, the GSettings connection's D-Bus thread doesn't survive
+        # gunicorn forking the worker from the master
+        if not self._backgroundSettings:
+            self._backgroundSettings = self._backgroundSettingsFactory()
+            self._backgroundSettings.addChangeListener(self._backgroundChanged)
+        return self._backgroundSettings
+
+    def startBackgroundTasks(self):
+        super().startBackgroundTasks()
+        self.backgroundSettings.start()
+
+    def _setCurrentImage(self, imagePath):
+        self.backgroundSettings.setBackground(imagePath, "scaled")
 
     def _getCurrentImage(self):
-        currentBackground = subprocess.run(
-            ["/usr/bin/gsettings", "get", "org.gnome.desktop.background", "picture-uri"], stdout=subprocess.PIPE
-        ).stdout
-        # remove fat from response
-        return currentBackground.decode().split("'")[1]
+        return self.backgroundSettings.pictureUri
@@ -1,55 +1,93 @@
-from contextlib import contextmanager
+
+import json
+import os
+from datetime import datetime, timedelta
 
 import requests
 
 
 class FileHandlerClient:
 
-    def __init__(self, port, clientId, clientSecret):
+    tokenValidDays = 30
+    # get a new token before the cached one gets close to expiring
+    tokenRefreshMargin = timedelta(days=1)
+
+    def __init__(self, port, clientId, clientSecret, tokenFile=None):
         self._port = port
         self._clientId = clientId
         self._clientSecret = clientSecret
+        self._tokenFile = tokenFile if tokenFile else os.path.join(
+            os.path.expanduser("~"), ".cache", "randomBackgroundChanger", f"token-{port}.json"
+        )
         self._token = None
+        # reuse the same connection for the token and the actual request
+        self._session = requests.Session()
 
-    @contextmanager
-    def _withAuth(self):
-        """ Create temporary token
-        """
+    @property
+    def _baseURL(self):
+        return f"http://localhost:{self._port}"
+
+    def _loadToken(self):
         try:
-            tokenRequest = requests.post(
-                f"http://localhost:{self._port}/token",
-                json={
-                    "clientId": self._clientId,
-                    "clientSecret": self._clientSecret
-                }
-            )
-            self._token = tokenRequest.json().get("token")
-            yield
-        finally:
-            requests.delete(
-                f"http://localhost:{self._port}/token",
-                json={
-                    "clientId": self._clientId,
-                    "clientSecret": self._clientSecret,
-                    "token": self._token
-                }
-            )
-            self._token = None
+            with open(self._tokenFile, "r") as tokenFile:
+                cachedToken = json.load(tokenFile)
+            expiryDate = datetime.fromisoformat(cachedToken["expiryDate"])
+        except (FileNotFoundError, KeyError, ValueError):
+            return None
+
+        if datetime.now() + self.tokenRefreshMargin >= expiryDate:
+            return None
+        return cachedToken["token"]
+
+    def _saveToken(self, token, expiryDate):
+        os.makedirs(os.path.dirname(self._tokenFile), mode=0o700, exist_ok=True)
+        # only the current user should be able to read the token
+        tokenFileDescriptor = os.open(self._tokenFile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.chmod(self._tokenFile, 0o600)
+        with open(tokenFileDescriptor, "w") as tokenFile:
+            json.dump({"token": token, "expiryDate": expiryDate.isoformat()}, tokenFile)
+
+    def _requestToken(self):
+        expiryDate = datetime.now() + timedelta(days=self.tokenValidDays)
+        tokenResponse = self._session.post(
+            f"{self._baseURL}/token",
+            json={
+                "clientId": self._clientId,
+                "clientSecret": self._clientSecret,
+                "validDays": self.tokenValidDays
+            }
+        )
+        tokenResponse.raise_for_status()
+        self._token = tokenResponse.json().get("token")
+        self._saveToken(self._token, expiryDate)
+
+    def _getToken(self):
+        if not self._token:
+            self._token = self._loadToken()
+        if not self._token:
+            self._requestToken()
+        return self._token
+
+    def _postWithToken(self, url, json):
+        return self._session.post(
+            url, json=json, headers={"Authorization": f"Bearer: {self._getToken()}"}
+        )
 
     def _sendRequest(self, url, json=None):
         json = json if json else {}
-        with self._withAuth():
-            response = requests.post(
-                url, json=json, headers={"Authorization": f"Bearer: {self._token}"}
-            )
-            response.raise_for_status()
+        response = self._postWithToken(url, json)
+        if response.status_code == 401:
+            # the cached token was revoked or the server's tokens were reset
+            self._requestToken()
+            response = self._postWithToken(url, json)
+        response.raise_for_status()
 
     def nextBackgroundImage(self):
         self._sendRequest(
-            f"http://localhost:{self._port}/change-background"
+            f"{self._baseURL}/change-background"
         )
 
     def addPin(self, pin):
         self._sendRequest(
-            f"http://localhost:{self._port}/imgur-pin", json={"pin": pin}
+            f"{self._baseURL}/imgur-pin", json={"pin": pin}
         )
@@ -0,0 +1,33 @@
+
+class FileRange:
+    """ Iterate over part of a file, for servers without a wsgi.file_wrapper
+    """
+
+    chunkSize = 64 * 1024
+
+    def __init__(self, file, length):
+        self._file = file
+        self._remaining = length
+
+    def __iter__(self):
+        while self._remaining > 0:
+            data = self._file.read(min(self.chunkSize, self._remaining))
+            if not data:
+                break
+            self._remaining -= len(data)
+            yield data
+
+    def close(self):
+        self._file.close()
+
+
+def fileRangeBody(environ, filePath, start, stop):
+    """ The body of a range response, gunicorn sends a wrapped file with sendfile from the current offset
+        for the response's Content-Length, so the range never passes through Python
+    """
+    rangeFile = open(filePath, "rb")
+    rangeFile.seek(start)
+    fileWrapper = environ.get("wsgi.file_wrapper")
+    if fileWrapper:
+        return fileWrapper(rangeFile)
+    return FileRange(rangeFile, stop - start)
@@ -0,0 +1,163 @@
+
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from randomBackgroundChanger.fileHandler.imageProbe import ImageRules, parseImageHeader
+
+
+class DownloadLimitExceeded(Exception):
+    pass
+
+
+@dataclass
+class DownloadLimits:
+
+    connectTimeout: float = 5
+    readTimeout: float = 30
+    maxBytes: int = 50 * 1024 * 1024
+    batchTimeout: float = 300
+
+
+class ImageDownloader:
+
+    chunkSize = 16 * 1024
+    # JPEGs can hold large metadata segments before the dimensions
+    probeBytes = 128 * 1024
+
+    def __init__(self, stagingDirectory, concurrency=8, limits=None, rules=None, imageScaler=None):
+        if concurrency < 1:
+            raise ValueError("At least one download worker is required")
+
+        self._stagingDirectory = stagingDirectory
+        self._concurrency = concurrency
+        self._limits = limits if limits else DownloadLimits()
+        self._rules = rules if rules else ImageRules()
+        self._imageScaler = imageScaler
+        self._session = requests.Session()
+        # keep a connection open to the image host for every worker
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        # threads are patched by gevent, so the workers cooperate with the server's event loop
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ImageDownloader")
+
+    @property
+    def concurrency(self):
+        return self._concurrency
+
+    @property
+    def limits(self):
+        return self._limits
+
+    @property
+    def rules(self):
+        return self._rules
+
+    @property
+    def stagingDirectory(self):
+        return self._stagingDirectory
+
+    def recoverPartialDownloads(self):
+        """ Remove downloads that were interrupted before they were published
+        """
+        os.makedirs(self._stagingDirectory, exist_ok=True)
+        for fileName in os.listdir(self._stagingDirectory):
+            try:
+                os.remove(os.path.join(self._stagingDirectory, fileName))
+            except OSError as e:
+                print("Could not remove partial download")
+                print(str(e))
+
+    def downloadImages(self, downloads):
+        """ Download (imgurImage, filePath) pairs concurrently, yielding each path as soon as it is written
+        """
+        os.makedirs(self._stagingDirectory, exist_ok=True)
+        deadline = time.monotonic() + self._limits.batchTimeout
+        futures = {
+            self._executor.submit(self._downloadImage, imgurImage, filePath, deadline): imgurImage
+            for imgurImage, filePath in downloads
+        }
+
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                print(f"Could not download {futures[future].imageURL}")
+                print(str(e))
+
+    def _checkDeadline(self, deadline):
+        if time.monotonic() > deadline:
+            raise DownloadLimitExceeded("The download batch ran out of time")
+
+    def _downloadImage(self, imgurImage, filePath, deadline):
+        self._checkDeadline(deadline)
+        response = self._session.get(
+            imgurImage.imageURL, stream=True,
+            timeout=(self._limits.connectTimeout, self._limits.readTimeout)
+        )
+        with response:
+            response.raise_for_status()
+            contentLength = response.headers.get("Content-Length")
+            contentLength = int(contentLength) if contentLength else None
+            if contentLength and contentLength > self._limits.maxBytes:
+                raise DownloadLimitExceeded(f"Image is larger than {self._limits.maxBytes} bytes")
+
+            chunks = iter(response.iter_content(self.chunkSize))
+            # reject unsuitable images before the rest of the body is downloaded
+            probedData, imageHeader = self._probeImage(chunks, contentLength)
+
+            # write to the staging directory so a half written image is never in the queue
+            stagingFileDescriptor, stagingFilePath = tempfile.mkstemp(
+                dir=self._stagingDirectory, suffix=".part"
+            )
+            try:
+                with open(stagingFileDescriptor, "wb") as imageFile:
+                    self._writeImage(itertools.chain([probedData], chunks), imageFile, deadline, imageHeader)
+                    imageFile.flush()
+                    os.fsync(imageFile.fileno())
+            except BaseException:
+                os.remove(stagingFilePath)
+                raise
+
+        try:
+            if self._imageScaler:
+                # the connection is back in the pool before the slower scaling stage
+                self._imageScaler.scaleImage(stagingFilePath)
+            os.replace(stagingFilePath, filePath)
+        except BaseException:
+            os.remove(stagingFilePath)
+            raise
+        return filePath
+
+    def _probeImage(self, chunks, contentLength):
+        """ Read just enough of the image to check it against the rules, returning the data read and the
+            image's header
+        """
+        probedData = b""
+        imageHeader = None
+        for chunk in chunks:
+            probedData += chunk
+            imageHeader = parseImageHeader(probedData)
+            if imageHeader or len(probedData) >= self.probeBytes:
+                break
+
+        self._rules.checkImage(imageHeader, contentLength)
+        return probedData, imageHeader
+
+    def _writeImage(self, chunks, imageFile, deadline, imageHeader=None):
+        # the content length can be missing or wrong, so enforce the limits while streaming
+        bytesWritten = 0
+        for chunk in chunks:
+            bytesWritten += len(chunk)
+            if bytesWritten > self._limits.maxBytes:
+                raise DownloadLimitExceeded(f"Image is larger than {self._limits.maxBytes} bytes")
+            self._rules.checkSize(imageHeader, bytesWritten)
+            self._checkDeadline(deadline)
+            imageFile.write(chunk)
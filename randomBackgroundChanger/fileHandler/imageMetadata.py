@@ -0,0 +1,115 @@
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+
+from randomBackgroundChanger.fileHandler.imageProbe import parseImageHeader
+
+
+@dataclass
+class ImageMetadata:
+
+    hash: str
+    size: int
+    modified: datetime
+    mimeType: str
+    width: int = None
+    height: int = None
+
+    def toJson(self):
+        metadata = asdict(self)
+        metadata["modified"] = self.modified.isoformat()
+        return metadata
+
+
+class ImageMetadataCache:
+    """ Hash and sniff the format and dimensions of each image once, entries are keyed by the file's size and
+        modification time so a replaced file is read again. The path of each hash is also remembered until the
+        image is discarded, so images can be looked up by hash without hashing them again
+    """
+
+    chunkSize = 64 * 1024
+    probeBytes = 128 * 1024
+    # served when the format can't be sniffed from the start of the file
+    defaultMimeType = "application/octet-stream"
+
+    def __init__(self, maxSize=256):
+        self._maxSize = maxSize
+        self._metadata = OrderedDict()
+        # kept beyond the metadata's LRU bound until the image is discarded, it only holds a path per image
+        self._pathsByHash = {}
+        self._hashesByPath = {}
+        self._lock = threading.Lock()
+
+    def getMetadata(self, imagePath):
+        fileStat = os.stat(imagePath)
+        fileKey = (fileStat.st_mtime_ns, fileStat.st_size)
+        with self._lock:
+            cached = self._metadata.get(imagePath)
+            if cached and cached[0] == fileKey:
+                self._metadata.move_to_end(imagePath)
+                return cached[1]
+
+        fileHash, imageHeader = self._readFile(imagePath)
+        metadata = ImageMetadata(
+            hash=fileHash,
+            size=fileStat.st_size,
+            modified=datetime.fromtimestamp(fileStat.st_mtime, timezone.utc),
+            mimeType=imageHeader.mimeType if imageHeader else self.defaultMimeType,
+            width=imageHeader.width if imageHeader else None,
+            height=imageHeader.height if imageHeader else None
+        )
+        with self._lock:
+            self._metadata[imagePath] = (fileKey, metadata)
+            self._metadata.move_to_end(imagePath)
+            self._forgetPath(imagePath)
+            self._pathsByHash[fileHash] = imagePath
+            self._hashesByPath[imagePath] = fileHash
+            while len(self._metadata) > self._maxSize:
+                self._metadata.popitem(last=False)
+        return metadata
+
+    def findPath(self, imageHash):
+        """ The path of the image with the hash, None if no image with the hash has been read
+        """
+        with self._lock:
+            imagePath = self._pathsByHash.get(imageHash)
+        if not imagePath:
+            return None
+
+        try:
+            imageMetadata = self.getMetadata(imagePath)
+        except FileNotFoundError:
+            self.discard(imagePath)
+            return None
+        # a replaced file is indexed under its new hash
+        return imagePath if imageMetadata.hash == imageHash else None
+
+    def discard(self, imagePath):
+        with self._lock:
+            self._metadata.pop(imagePath, None)
+            self._forgetPath(imagePath)
+
+    def _forgetPath(self, imagePath):
+        imageHash = self._hashesByPath.pop(imagePath, None)
+        if imageHash and self._pathsByHash.get(imageHash) == imagePath:
+            del self._pathsByHash[imageHash]
+
+    def __len__(self):
+        return len(self._metadata)
+
+    @classmethod
+    def _readFile(cls, imagePath):
+        """ Hash the whole file, the header is parsed from the start of the file on the way through
+        """
+        fileHash = hashlib.sha256()
+        with open(imagePath, "rb") as imageFile:
+            # JPEGs can hold large metadata segments before the dimensions
+            probedData = imageFile.read(cls.probeBytes)
+            fileHash.update(probedData)
+            for chunk in iter(lambda: imageFile.read(cls.chunkSize), b""):
+                fileHash.update(chunk)
+        return fileHash.hexdigest(), parseImageHeader(probedData)
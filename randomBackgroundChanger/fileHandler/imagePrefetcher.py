@@ -0,0 +1,99 @@
+
+import threading
+
+
+class AlreadyDownloadingImagesException(Exception):
+    pass
+
+
+class ImagePrefetcher:
+
+    def __init__(self, fileHandler, imageQueue, lowWatermark=5, highWatermark=20):
+        if lowWatermark >= highWatermark:
+            raise ValueError("The low watermark must be lower than the high watermark")
+
+        self._fileHandler = fileHandler
+        self._imageQueue = imageQueue
+        self._lowWatermark = lowWatermark
+        self._highWatermark = highWatermark
+        self._refillRequested = threading.Event()
+        self._refillsStarted = 0
+        self._refillsFinished = 0
+        self._thread = None
+
+    @property
+    def lowWatermark(self):
+        return self._lowWatermark
+
+    @property
+    def highWatermark(self):
+        return self._highWatermark
+
+    @property
+    def queueLength(self):
+        return len(self._imageQueue)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """ Start the background refill thread, this must be called from the process serving requests
+        """
+        if self.running:
+            return
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        # fill the queue straight away rather than waiting for the first cycle
+        self._refillRequested.set()
+
+    def checkQueue(self):
+        """ Request a background refill if the queue has dropped below the low watermark
+        """
+        if self.queueLength < self._lowWatermark:
+            self._refillRequested.set()
+
+    def waitForImages(self, count, timeout=None):
+        """ Request a refill and block until the queue holds count images, images are published as
+            soon as they are downloaded so this doesn't wait for the rest of the batch
+        """
+        # a refill that is already running may finish without reaching count, so wait for the next one
+        refillsStarted = self._refillsStarted
+        self.start()
+        self._refillRequested.set()
+        self._imageQueue.waitFor(
+            lambda: self.queueLength >= count or self._refillsFinished > refillsStarted, timeout
+        )
+        return self.queueLength >= count
+
+    def _run(self):
+        while True:
+            self._refillRequested.wait()
+            self._refillRequested.clear()
+            self._refillsStarted += 1
+            try:
+                self.refill()
+            finally:
+                self._refillsFinished += 1
+                # wake any requests waiting on images that never arrived
+                self._imageQueue.notifyWaiters()
+
+    def refill(self):
+        """ Download images until the queue reaches the high watermark
+        """
+        while self.queueLength < self._highWatermark:
+            queueLength = self.queueLength
+            try:
+                self._fileHandler.refillImages()
+            except AlreadyDownloadingImagesException:
+                # another refill is already filling the queue
+                return
+            except Exception as e:
+                print("Could not prefetch images")
+                print(str(e))
+                return
+
+            if self.queueLength <= queueLength:
+                # no new images were added, try again on the next check
+                return
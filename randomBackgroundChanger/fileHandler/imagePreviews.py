@@ -0,0 +1,208 @@
+
+import base64
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from PIL import Image
+
+
+class PreviewUnavailable(Exception):
+    pass
+
+
+def createStill(imagePath, outputPath, width=None, quality=80):
+    """ Save the first frame of an image as a JPEG no wider than width, keeping the aspect ratio
+    """
+    with Image.open(imagePath) as image:
+        if width and image.width > width:
+            # lets the JPEG decoder scale down while decoding, rather than decoding the full image
+            image.draft("RGB", (width, image.height * width // image.width))
+        # animations start on their first frame
+        image.seek(0)
+        if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+            rgbaImage = image.convert("RGBA")
+            still = Image.new("RGB", rgbaImage.size, (255, 255, 255))
+            still.paste(rgbaImage, mask=rgbaImage.getchannel("A"))
+        else:
+            still = image.convert("RGB")
+
+    if width and still.width > width:
+        still.thumbnail((width, still.height), Image.Resampling.LANCZOS)
+    still.save(outputPath, "JPEG", quality=quality, optimize=True)
+
+
+class ImagePreviews:
+    """ Resized stills of the images, generated in a pool of background processes and kept in a size
+        bounded cache on disk keyed by the image hash
+    """
+
+    maxWidth = 2048
+    placeholderWidth = 16
+    # widths generated as soon as an image is downloaded
+    warmWidths = (320,)
+
+    def __init__(self, cacheDirectory, maxBytes=64 * 1024 * 1024, workers=2, quality=80):
+        self._cacheDirectory = cacheDirectory
+        self._maxBytes = maxBytes
+        self._quality = quality
+        self._workers = workers
+        self._executor = None
+        self._executorLock = threading.Lock()
+        self._lock = threading.Lock()
+        self._cachedFiles = None
+        self._cachedBytes = 0
+        self._pending = {}
+
+    @property
+    def cacheDirectory(self):
+        return self._cacheDirectory
+
+    @property
+    def cachedBytes(self):
+        return self._cachedBytes
+
+    def getPreview(self, imagePath, imageHash, width=None):
+        """ Get the path to a still of the image no wider than width, or full size when no width is given,
+            waiting for it to be generated if it isn't cached yet
+        """
+        if width is not None and not 0 < width <= self.maxWidth:
+            raise ValueError(f"The preview width must be between 1 and {self.maxWidth}")
+
+        try:
+            return self._preview(imagePath, imageHash, width).result()
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+            # Pillow couldn't read the image
+            raise PreviewUnavailable(str(e))
+
+    def getPlaceholder(self, imagePath, imageHash):
+        """ A tiny blurry version of the image as a data URI, to show while the full image loads
+        """
+        placeholderPath = self.getPreview(imagePath, imageHash, self.placeholderWidth)
+        with open(placeholderPath, "rb") as placeholderFile:
+            return "data:image/jpeg;base64," + base64.b64encode(placeholderFile.read()).decode()
+
+    def warm(self, imagePath, getImageHash):
+        """ Start generating the common previews of a new image in the background
+        """
+        try:
+            imageHash = getImageHash(imagePath)
+        except OSError:
+            return
+        for width in (*self.warmWidths, self.placeholderWidth):
+            self._preview(imagePath, imageHash, width)
+
+    def _getExecutor(self):
+        # started on first use, after gunicorn has forked the worker, and spawned so decoding and resizing
+        # don't hold up the server's patched event loop
+        with self._executorLock:
+            if not self._executor:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    @staticmethod
+    def _previewName(imageHash, width):
+        return f"{imageHash}-{f'w{width}' if width else 'full'}.jpg"
+
+    def _previewPath(self, previewName):
+        return os.path.join(self._cacheDirectory, previewName)
+
+    def _preview(self, imagePath, imageHash, width):
+        previewName = self._previewName(imageHash, width)
+        future = Future()
+        with self._lock:
+            self._loadCache()
+            if previewName in self._cachedFiles:
+                self._cachedFiles.move_to_end(previewName)
+                future.set_result(self._previewPath(previewName))
+                return future
+            # requests for a preview that is already being generated share the same work
+            if previewName in self._pending:
+                return self._pending[previewName]
+            self._pending[previewName] = future
+
+        try:
+            self._createPreview(imagePath, previewName, width, future)
+        except Exception as e:
+            self._previewFailed(previewName, future, e)
+        return future
+
+    def _loadCache(self):
+        if self._cachedFiles is not None:
+            return
+
+        os.makedirs(self._cacheDirectory, exist_ok=True)
+        cachedFiles = []
+        for fileName in os.listdir(self._cacheDirectory):
+            filePath = self._previewPath(fileName)
+            try:
+                if fileName.endswith(".part"):
+                    # left behind by an interrupted worker
+                    os.remove(filePath)
+                    continue
+                fileStat = os.stat(filePath)
+            except OSError:
+                continue
+            cachedFiles.append((fileStat.st_mtime_ns, fileName, fileStat.st_size))
+
+        self._cachedFiles = OrderedDict(
+            (fileName, fileSize) for _, fileName, fileSize in sorted(cachedFiles)
+        )
+        self._cachedBytes = sum(self._cachedFiles.values())
+
+    def _createPreview(self, imagePath, previewName, width, future):
+        temporaryFileDescriptor, temporaryPath = tempfile.mkstemp(dir=self._cacheDirectory, suffix=".part")
+        os.close(temporaryFileDescriptor)
+        try:
+            stillFuture = self._getExecutor().submit(createStill, imagePath, temporaryPath, width, self._quality)
+        except BaseException:
+            os.remove(temporaryPath)
+            raise
+        stillFuture.add_done_callback(
+            lambda stillFuture: self._stillCreated(stillFuture, temporaryPath, previewName, future)
+        )
+
+    def _stillCreated(self, stillFuture, temporaryPath, previewName, future):
+        previewPath = self._previewPath(previewName)
+        try:
+            try:
+                stillFuture.result()
+                os.replace(temporaryPath, previewPath)
+                previewSize = os.path.getsize(previewPath)
+            except BaseException:
+                try:
+                    os.remove(temporaryPath)
+                except FileNotFoundError:
+                    pass
+                raise
+        except Exception as e:
+            self._previewFailed(previewName, future, e)
+            return
+
+        with self._lock:
+            self._cachedFiles[previewName] = previewSize
+            self._cachedBytes += previewSize
+            self._evict()
+            self._pending.pop(previewName, None)
+        future.set_result(previewPath)
+
+    def _previewFailed(self, previewName, future, error):
+        with self._lock:
+            self._pending.pop(previewName, None)
+        future.set_exception(error)
+
+    def _evict(self):
+        # the newest preview is kept even if it is larger than the cache on its own
+        while self._cachedBytes > self._maxBytes and len(self._cachedFiles) > 1:
+            previewName, fileSize = self._cachedFiles.popitem(last=False)
+            self._cachedBytes -= fileSize
+            try:
+                os.remove(self._previewPath(previewName))
+            except OSError as e:
+                print("Could not remove cached preview")
+                print(str(e))
@@ -0,0 +1,123 @@
+
+import struct
+from dataclasses import dataclass
+
+
+class ImageRejected(Exception):
+    pass
+
+
+@dataclass
+class ImageHeader:
+
+    mimeType: str
+    width: int
+    height: int
+
+    @property
+    def aspectRatio(self):
+        return self.width / self.height
+
+
+def _parsePNG(data):
+    # the IHDR chunk always comes first, straight after the signature
+    if len(data) < 24:
+        return None
+    width, height = struct.unpack(">II", data[16:24])
+    return ImageHeader("image/png", width, height)
+
+
+def _parseGIF(data):
+    if len(data) < 10:
+        return None
+    width, height = struct.unpack("<HH", data[6:10])
+    return ImageHeader("image/gif", width, height)
+
+
+def _parseJPEG(data):
+    # walk the segments until the start of frame, which holds the dimensions
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # padding before a marker
+            offset += 1
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+            return ImageHeader("image/jpeg", width, height)
+        segmentLength, = struct.unpack(">H", data[offset + 2:offset + 4])
+        offset += 2 + segmentLength
+    return None
+
+
+def _parseWEBP(data):
+    if len(data) < 30:
+        return None
+    chunkType = data[12:16]
+    if chunkType == b"VP8X":
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+    elif chunkType == b"VP8 ":
+        width, height = struct.unpack("<HH", data[26:30])
+        width, height = width & 0x3FFF, height & 0x3FFF
+    elif chunkType == b"VP8L":
+        bits = int.from_bytes(data[21:25], "little")
+        width, height = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    else:
+        return None
+    return ImageHeader("image/webp", width, height)
+
+
+def parseImageHeader(data):
+    """ Read the format and dimensions from the start of an image, returns None if they can't be found
+    """
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return _parsePNG(data)
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return _parseGIF(data)
+    if data.startswith(b"\xff\xd8"):
+        return _parseJPEG(data)
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return _parseWEBP(data)
+    return None
+
+
+@dataclass
+class ImageRules:
+    """ Rules for which images are downloaded, nothing is filtered out unless a rule is set
+    """
+
+    minWidth: int = 0
+    minHeight: int = 0
+    minAspectRatio: float = None
+    maxAspectRatio: float = None
+    maxGifBytes: int = None
+
+    def checkImage(self, imageHeader, contentLength=None):
+        """ Raise ImageRejected if the image wouldn't make a good background, images that couldn't be
+            probed are let through
+        """
+        if not imageHeader:
+            return
+
+        if imageHeader.width < self.minWidth or imageHeader.height < self.minHeight:
+            raise ImageRejected(f"Image is too small ({imageHeader.width}x{imageHeader.height})")
+        if self.minAspectRatio is not None or self.maxAspectRatio is not None:
+            minAspectRatio = self.minAspectRatio if self.minAspectRatio is not None else 0
+            maxAspectRatio = self.maxAspectRatio if self.maxAspectRatio is not None else float("inf")
+            if imageHeader.height == 0 or not minAspectRatio <= imageHeader.aspectRatio <= maxAspectRatio:
+                raise ImageRejected(
+                    f"Image has an unsuitable aspect ratio ({imageHeader.width}x{imageHeader.height})"
+                )
+        if contentLength:
+            self.checkSize(imageHeader, contentLength)
+
+    def checkSize(self, imageHeader, size):
+        """ Raise ImageRejected if the image has grown past its size limit, the content length can be
+            missing so this is also checked as the image is downloaded
+        """
+        if imageHeader and imageHeader.mimeType == "image/gif" and self.maxGifBytes and size > self.maxGifBytes:
+            raise ImageRejected(f"GIF is larger than {self.maxGifBytes} bytes")
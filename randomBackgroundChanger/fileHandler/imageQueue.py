@@ -0,0 +1,135 @@
+
+import bisect
+import os
+import threading
+import time
+
+
+class ImageQueue:
+    """ Ordered in-memory index of the images waiting in the image directory
+    """
+
+    ignoredFiles = {".gitkeep", ".partial", ".previews"}
+
+    def __init__(self, directoryPath):
+        self._directoryPath = directoryPath
+        self._paths = []
+        self._pathSet = set()
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._loaded = False
+
+    @property
+    def directoryPath(self):
+        return self._directoryPath
+
+    def _ensureLoaded(self):
+        if not self._loaded:
+            self.rescan()
+
+    def rescan(self):
+        """ Rebuild the index from the files in the image directory
+        """
+        paths = sorted(
+            os.path.join(self._directoryPath, fileName) for fileName
+            in os.listdir(self._directoryPath)
+            if fileName not in self.ignoredFiles
+        )
+        with self._lock:
+            self._paths = paths
+            self._pathSet = set(paths)
+            self._loaded = True
+            self._changed.notify_all()
+
+    @property
+    def paths(self):
+        with self._lock:
+            self._ensureLoaded()
+            return list(self._paths)
+
+    @property
+    def first(self):
+        with self._lock:
+            self._ensureLoaded()
+            if self._paths:
+                return self._paths[0]
+
+    def add(self, path):
+        with self._lock:
+            self._ensureLoaded()
+            if path in self._pathSet:
+                return
+            bisect.insort(self._paths, path)
+            self._pathSet.add(path)
+            self._changed.notify_all()
+
+    def remove(self, path):
+        with self._lock:
+            self._ensureLoaded()
+            if path not in self._pathSet:
+                return
+            self._paths.remove(path)
+            self._pathSet.remove(path)
+
+    def waitFor(self, predicate, timeout=None):
+        """ Block until predicate is true, it is checked every time an image is added to the queue
+        """
+        with self._changed:
+            return self._changed.wait_for(predicate, timeout)
+
+    def notifyWaiters(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def __len__(self):
+        with self._lock:
+            self._ensureLoaded()
+            return len(self._paths)
+
+    def __contains__(self, path):
+        with self._lock:
+            self._ensureLoaded()
+            return path in self._pathSet
+
+
+class ImageDirectoryWatcher:
+    """ Rescan the image queue when the image directory is changed by something else
+    """
+
+    def __init__(self, imageQueue, interval=5):
+        self._imageQueue = imageQueue
+        self._interval = interval
+        self._lastModified = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+
+        self._lastModified = self._directoryModified()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _directoryModified(self):
+        return os.stat(self._imageQueue.directoryPath).st_mtime_ns
+
+    def _run(self):
+        while True:
+            time.sleep(self._interval)
+            self.checkDirectory()
+
+    def checkDirectory(self):
+        """ Only list the directory when its modification time has changed
+        """
+        try:
+            lastModified = self._directoryModified()
+            if lastModified != self._lastModified:
+                self._lastModified = lastModified
+                self._imageQueue.rescan()
+        except OSError as e:
+            print("Could not check the image directory")
+            print(str(e))
@@ -0,0 +1,127 @@
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from PIL import Image, ImageSequence
+
+
+@dataclass
+class ScaleSettings:
+    """ The display resolution to scale images down to. "contain" fits the whole image inside the display
+        and "cover" fills the display, the aspect ratio is always kept and images are never scaled up
+    """
+
+    width: int
+    height: int
+    fitMode: str = "cover"
+    # animated GIFs are left as they are ("keep"), replaced by their first frame ("firstFrame"), or have
+    # every frame scaled ("scale")
+    gifPolicy: str = "keep"
+
+    fitModes = ("contain", "cover")
+    gifPolicies = ("keep", "firstFrame", "scale")
+
+    def __post_init__(self):
+        if self.width < 1 or self.height < 1:
+            raise ValueError("The display resolution must be positive")
+        if self.fitMode not in self.fitModes:
+            raise ValueError(f"The fit mode must be one of {', '.join(self.fitModes)}")
+        if self.gifPolicy not in self.gifPolicies:
+            raise ValueError(f"The GIF policy must be one of {', '.join(self.gifPolicies)}")
+
+    def scaledSize(self, width, height):
+        """ The size to scale an image to, None if it is already small enough
+        """
+        widthRatio, heightRatio = self.width / width, self.height / height
+        ratio = max(widthRatio, heightRatio) if self.fitMode == "cover" else min(widthRatio, heightRatio)
+        if ratio >= 1:
+            return None
+        return max(round(width * ratio), 1), max(round(height * ratio), 1)
+
+
+def _scaleFrames(image, size):
+    frames = []
+    durations = []
+    for frame in ImageSequence.Iterator(image):
+        durations.append(frame.info.get("duration", 100))
+        frames.append(frame.convert("RGBA").resize(size, Image.Resampling.LANCZOS))
+    return frames, durations
+
+
+def scaleImage(imagePath, settings):
+    """ Scale an image in place to the display resolution, returns True if the image was changed
+    """
+    scaledPath = imagePath + ".scaled"
+    with Image.open(imagePath) as image:
+        imageFormat = image.format
+        animated = getattr(image, "is_animated", False)
+        if animated and settings.gifPolicy == "keep":
+            return False
+
+        size = settings.scaledSize(*image.size)
+        if animated and settings.gifPolicy == "scale":
+            if not size:
+                return False
+            frames, durations = _scaleFrames(image, size)
+            frames[0].save(
+                scaledPath, imageFormat, save_all=True, append_images=frames[1:], duration=durations,
+                loop=image.info.get("loop", 0), disposal=2
+            )
+        else:
+            if not size and not animated:
+                return False
+            image.seek(0)
+            if size:
+                # lets the JPEG decoder scale down while decoding
+                image.draft(image.mode, size)
+                # palette images can only be resized with the nearest pixel
+                frame = image.convert("RGBA") if image.mode in ("1", "P") else image
+                still = frame.resize(size, Image.Resampling.LANCZOS)
+            else:
+                still = image.copy()
+            if animated:
+                # the first frame is saved on its own, the name of the file doesn't carry the format
+                imageFormat = "PNG"
+            still.save(scaledPath, imageFormat, **({"quality": 90} if imageFormat == "JPEG" else {}))
+
+    os.replace(scaledPath, imagePath)
+    return True
+
+
+class ImageScaler:
+    """ Scale downloaded images in a pool of processes, so the resizing doesn't hold up the server
+    """
+
+    def __init__(self, settings, workers=2):
+        self._settings = settings
+        self._workers = workers
+        self._executor = None
+
+    @property
+    def settings(self):
+        return self._settings
+
+    def _getExecutor(self):
+        # started on first use, after gunicorn has forked the worker, and spawned so the pool doesn't
+        # inherit the server's patched event loop
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def scaleImage(self, imagePath):
+        """ Scale the image in place, images that can't be scaled are left as they are
+        """
+        try:
+            return self._getExecutor().submit(scaleImage, imagePath, self._settings).result()
+        except Exception as e:
+            print(f"Could not scale {imagePath}")
+            print(str(e))
+            try:
+                os.remove(imagePath + ".scaled")
+            except FileNotFoundError:
+                pass
+            return False
@@ -0,0 +1,194 @@
+
+import random
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+
+
+class CronExpression:
+    """ Standard five field cron expression: minute hour day-of-month month day-of-week
+    """
+
+    fieldRanges = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression}")
+
+        self.expression = expression
+        self._minutes, self._hours, self._days, self._months, self._weekdays = [
+            self._parseField(field, minimum, maximum)
+            for field, (minimum, maximum) in zip(fields, self.fieldRanges)
+        ]
+        # cron matches either day field when both are restricted
+        self._anyDay = fields[2] == "*"
+        self._anyWeekday = fields[4] == "*"
+
+    @staticmethod
+    def _parseField(field, minimum, maximum):
+        values = set()
+        for part in field.split(","):
+            valueRange, _, step = part.partition("/")
+            step = int(step) if step else 1
+            if valueRange == "*":
+                start, end = minimum, maximum
+            elif "-" in valueRange:
+                start, end = (int(value) for value in valueRange.split("-"))
+            else:
+                start = end = int(valueRange)
+                if step != 1:
+                    end = maximum
+
+            if step < 1 or start < minimum or end > maximum or start > end:
+                raise ValueError(f"Invalid cron field: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _matchesDay(self, time):
+        dayMatches = time.day in self._days
+        # cron counts the week from Sunday
+        weekdayMatches = (time.weekday() + 1) % 7 in self._weekdays
+        if self._anyDay:
+            return weekdayMatches
+        if self._anyWeekday:
+            return dayMatches
+        return dayMatches or weekdayMatches
+
+    def nextTime(self, after):
+        """ Get the first matching minute after the given time
+        """
+        time = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = time + timedelta(days=366 * 5)
+        while time < limit:
+            if time.month not in self._months or not self._matchesDay(time):
+                time = time.replace(hour=0, minute=0) + timedelta(days=1)
+            elif time.hour not in self._hours:
+                time = time.replace(minute=0) + timedelta(hours=1)
+            elif time.minute not in self._minutes:
+                time += timedelta(minutes=1)
+            else:
+                return time
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+
+@dataclass
+class RotationSchedule:
+
+    interval: float = None
+    cron: str = None
+    jitter: float = 0
+
+    def __post_init__(self):
+        if (self.interval is None) == (self.cron is None):
+            raise ValueError("Either an interval or a cron expression must be given")
+        if self.cron is not None and not isinstance(self.cron, str):
+            raise TypeError("The cron expression must be a string")
+        if self.interval is not None and self.interval <= 0:
+            raise ValueError("The interval must be positive")
+        if self.jitter < 0:
+            raise ValueError("The jitter can't be negative")
+        self._cronExpression = CronExpression(self.cron) if self.cron is not None else None
+        if self._cronExpression:
+            # an expression like "0 0 30 2 *" parses but would stop the scheduler the first time it is used
+            self._cronExpression.nextTime(datetime.now())
+
+    def nextRun(self, after):
+        if self._cronExpression:
+            nextRun = self._cronExpression.nextTime(after)
+        else:
+            nextRun = after + timedelta(seconds=self.interval)
+        return nextRun + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def toJson(self):
+        return asdict(self)
+
+
+class RotationScheduler:
+    """ Cycle the background image on a schedule from inside the server process
+    """
+
+    # seconds to wait before trying again when working out the next run fails
+    errorRetryDelay = 60
+
+    def __init__(self, fileHandler, schedule=None, prefetchLead=60, clock=datetime.now):
+        self._fileHandler = fileHandler
+        # changes go through the same path as requested changes, so they can't race them
+        self._backgroundCycler = fileHandler
+        self._schedule = schedule
+        self._prefetchLead = prefetchLead
+        self._clock = clock
+        self._nextRun = None
+        self._scheduleChanged = threading.Event()
+        self._thread = None
+
+    @property
+    def schedule(self):
+        return self._schedule
+
+    @property
+    def nextRun(self):
+        return self._nextRun
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def setBackgroundCycler(self, backgroundCycler):
+        """ Cycle the background through backgroundCycler rather than the file handler directly
+        """
+        self._backgroundCycler = backgroundCycler
+
+    def setSchedule(self, schedule):
+        """ Replace the schedule, None stops the rotation
+        """
+        self._schedule = schedule
+        self._scheduleChanged.set()
+
+    def start(self):
+        if self.running:
+            return
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _waitUntil(self, time):
+        """ Sleep until the given time, returns False if the schedule changed in the meantime
+        """
+        seconds = (time - self._clock()).total_seconds()
+        return not self._scheduleChanged.wait(max(seconds, 0))
+
+    def _run(self):
+        while True:
+            self._scheduleChanged.clear()
+            try:
+                self._runOnce()
+            except Exception as e:
+                # keep the rotation going, a new schedule is picked up straight away
+                print("Could not run the rotation schedule")
+                print(str(e))
+                self._nextRun = None
+                self._scheduleChanged.wait(self.errorRetryDelay)
+
+    def _runOnce(self):
+        schedule = self._schedule
+        if not schedule:
+            self._nextRun = None
+            self._scheduleChanged.wait()
+            return
+
+        self._nextRun = schedule.nextRun(self._clock())
+        # top up the queue ahead of the tick so the cycle doesn't wait on a download
+        if not self._waitUntil(self._nextRun - timedelta(seconds=self._prefetchLead)):
+            return
+        self._fileHandler.prefetchImages()
+        if not self._waitUntil(self._nextRun):
+            return
+        self.rotate()
+
+    def rotate(self):
+        try:
+            self._backgroundCycler.cycleBackgroundImage()
+        except Exception as e:
+            print("Could not rotate the background image")
+            print(str(e))
@@ -0,0 +1,106 @@
+
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from datetime import datetime
+
+from randomBackgroundChanger.DAL import queries
+
+
+class TokenSigner:
+    """ Create and validate tokens that carry their own expiry, signed with a key derived from the
+        client secret so they can be checked without a database lookup
+    """
+
+    version = "s1"
+
+    def __init__(self, clientSecret, keyId="1", revocationRefreshInterval=30):
+        if "." in keyId:
+            raise ValueError("The key ID can't contain a '.'")
+
+        self._keyId = keyId
+        self._key = hmac.new(
+            clientSecret.encode(), f"randomBackgroundChanger-token:{keyId}".encode(), hashlib.sha256
+        ).digest()
+        self._revocationRefreshInterval = revocationRefreshInterval
+        self._revokedSignatures = set()
+        self._thread = None
+
+    def _sign(self, payload):
+        signature = hmac.new(self._key, payload.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(signature).decode().rstrip("=")
+
+    def isSignedToken(self, token):
+        return token.startswith(f"{self.version}.")
+
+    def createToken(self, validDays):
+        expiry = int(time.time() + validDays * 24 * 60 * 60)
+        payload = f"{self.version}.{self._keyId}.{expiry}.{secrets.token_urlsafe(16)}"
+        return f"{payload}.{self._sign(payload)}"
+
+    def _verifiedToken(self, token):
+        """ Get the signature and expiry date of a correctly signed token, or None if it isn't
+        """
+        if not token.isascii():
+            # compare_digest only takes ASCII strings, and no signed token has anything else
+            return None
+
+        tokenParts = token.split(".")
+        if len(tokenParts) != 5:
+            return None
+
+        version, keyId, expiry, _, signature = tokenParts
+        if version != self.version or keyId != self._keyId or not expiry.isdigit():
+            return None
+        if not hmac.compare_digest(signature, self._sign(token.rsplit(".", 1)[0])):
+            return None
+        return signature, datetime.fromtimestamp(int(expiry))
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """ Reload the revoked tokens in the background, so revocations made by other workers are picked up
+            at most one interval later without a database query while validating a token
+        """
+        if self.running:
+            return
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refreshRevocations()
+            time.sleep(self._revocationRefreshInterval)
+
+    def refreshRevocations(self):
+        try:
+            self._revokedSignatures = queries.revokedTokenSignatures()
+        except Exception as e:
+            print("Could not load revoked tokens")
+            print(str(e))
+
+    def validToken(self, token):
+        verifiedToken = self._verifiedToken(token)
+        if not verifiedToken:
+            return False
+
+        signature, expiryDate = verifiedToken
+        if datetime.now() >= expiryDate:
+            return False
+
+        return signature not in self._revokedSignatures
+
+    def revokeToken(self, token):
+        verifiedToken = self._verifiedToken(token)
+        if not verifiedToken:
+            raise queries.InvalidToken("Token wasn't signed by this server")
+
+        signature, expiryDate = verifiedToken
+        self._revokedSignatures.add(signature)
+        queries.addRevokedToken(signature, expiryDate)
@@ -0,0 +1,207 @@
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone, timedelta
+
+
+class CreditBudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class CreditState:
+
+    clientLimit: int = None
+    clientRemaining: int = None
+    userLimit: int = None
+    userRemaining: int = None
+    # unix time the user credits are topped back up
+    userReset: int = None
+    # unix time the credits were last reported
+    updatedAt: float = None
+    # unix times of the gallery requests made in the last hour
+    galleryCalls: list = field(default_factory=list)
+    imagesPerCall: float = None
+
+
+class CreditBudget:
+    """ Keep track of the credits Imgur reports and spread gallery requests out so the daily client credits
+        and hourly user credits last until they are topped up, the state is saved so restarts don't forget it
+    """
+
+    rateLimitHeaders = {
+        "x-ratelimit-clientlimit": "clientLimit",
+        "x-ratelimit-clientremaining": "clientRemaining",
+        "x-ratelimit-userlimit": "userLimit",
+        "x-ratelimit-userremaining": "userRemaining",
+        "x-ratelimit-userreset": "userReset"
+    }
+    # weight of the latest gallery response in the images per call average
+    imagesPerCallWeight = 0.3
+    # seconds between saving the credits, they are reported by every response
+    saveInterval = 60
+
+    def __init__(self, stateFile="imgurCredits.json", reserveFraction=0.1):
+        if not 0 <= reserveFraction < 1:
+            raise ValueError("The credit reserve must be at least 0 and below 1")
+
+        self._stateFile = stateFile
+        self._reserveFraction = reserveFraction
+        self._lock = threading.Lock()
+        self._state = self._loadState()
+        self._savedAt = None
+
+    def recordRateLimits(self, rateLimits):
+        """ Update the remaining credits from the X-RateLimit-* headers of a response
+        """
+        with self._lock:
+            for header, attribute in self.rateLimitHeaders.items():
+                try:
+                    setattr(self._state, attribute, int(rateLimits[header]))
+                except (KeyError, ValueError):
+                    pass
+            self._state.updatedAt = time.time()
+            if self._savedAt is None or self._state.updatedAt - self._savedAt >= self.saveInterval:
+                self._saveState()
+
+    def recordGalleryCall(self, imageCount):
+        with self._lock:
+            now = time.time()
+            self._state.galleryCalls = [*self._recentCalls(now), now]
+            if self._state.imagesPerCall is None:
+                self._state.imagesPerCall = float(imageCount)
+            else:
+                self._state.imagesPerCall += self.imagesPerCallWeight * (imageCount - self._state.imagesPerCall)
+            self._saveState()
+
+    def checkGalleryCall(self):
+        """ Raise CreditBudgetExceeded if a gallery request now would use credits that are meant for later
+        """
+        with self._lock:
+            now = time.time()
+            nextGalleryCall = self._nextGalleryCall(now)
+        if nextGalleryCall > now:
+            raise CreditBudgetExceeded(
+                f"The next Imgur gallery request is allowed in {math.ceil(nextGalleryCall - now)} seconds"
+            )
+
+    @property
+    def galleryCallsPerHour(self):
+        with self._lock:
+            return self._galleryCallsPerHour(time.time())
+
+    @property
+    def downloadsPerHour(self):
+        with self._lock:
+            return self._downloadsPerHour(time.time())
+
+    def toJson(self):
+        with self._lock:
+            now = time.time()
+            nextGalleryCall = self._nextGalleryCall(now)
+            return {
+                "clientLimit": self._state.clientLimit,
+                "clientRemaining": self._state.clientRemaining,
+                "userLimit": self._state.userLimit,
+                "userRemaining": self._state.userRemaining,
+                "userReset": self._isoTime(self._state.userReset),
+                "updatedAt": self._isoTime(self._state.updatedAt),
+                "galleryCallsLastHour": len(self._recentCalls(now)),
+                "galleryCallsPerHour": self._galleryCallsPerHour(now),
+                "downloadsPerHour": self._downloadsPerHour(now),
+                "nextGalleryCall": self._isoTime(max(nextGalleryCall, now))
+            }
+
+    def _recentCalls(self, now):
+        return [callTime for callTime in self._state.galleryCalls if callTime > now - 3600]
+
+    @staticmethod
+    def _clientReset(now):
+        # Imgur doesn't say when the daily client credits are topped up, midnight UTC is assumed
+        today = datetime.fromtimestamp(now, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (today + timedelta(days=1)).timestamp()
+
+    def _reserve(self, limit):
+        return math.ceil(limit * self._reserveFraction) if limit else 0
+
+    def _allowances(self, now):
+        """ The credits per hour each limit allows until it is topped up, paired with the time it is topped up
+        """
+        allowances = []
+        clientReset = self._clientReset(now)
+        updatedAt = self._state.updatedAt
+        # credits reported before the last top up are out of date
+        if self._state.clientRemaining is not None and updatedAt and updatedAt > clientReset - 86400:
+            credits = self._state.clientRemaining - self._reserve(self._state.clientLimit)
+            allowances.append((credits, clientReset))
+        userReset = self._state.userReset
+        if self._state.userRemaining is not None and userReset and userReset > now:
+            credits = self._state.userRemaining - self._reserve(self._state.userLimit)
+            allowances.append((credits, userReset))
+
+        return [
+            (max(credits, 0) / max((reset - now) / 3600, 1 / 60), reset) for credits, reset in allowances
+        ]
+
+    def _galleryCallsPerHour(self, now):
+        allowances = self._allowances(now)
+        if not allowances:
+            # nothing is known about the credits yet
+            return None
+        return math.floor(min(allowance for allowance, _ in allowances))
+
+    def _downloadsPerHour(self, now):
+        galleryCallsPerHour = self._galleryCallsPerHour(now)
+        if galleryCallsPerHour is None or self._state.imagesPerCall is None:
+            return None
+        return math.floor(galleryCallsPerHour * self._state.imagesPerCall)
+
+    def _nextGalleryCall(self, now):
+        allowances = self._allowances(now)
+        if not allowances:
+            return now
+
+        allowance, reset = min(allowances)
+        if allowance < 1:
+            # wait for the limit that ran out to be topped up
+            return reset
+        recentCalls = self._recentCalls(now)
+        if not recentCalls:
+            return now
+        # space the calls evenly rather than spending the hour's credits at once
+        return recentCalls[-1] + 3600 / allowance
+
+    @staticmethod
+    def _isoTime(timestamp):
+        return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+    def _loadState(self):
+        try:
+            with open(self._stateFile, "r") as stateFile:
+                return CreditState(**json.load(stateFile))
+        except (FileNotFoundError, TypeError, ValueError):
+            return CreditState()
+
+    def _saveState(self):
+        # this runs inside every Imgur request, so failing to save mustn't fail the request
+        self._savedAt = time.time()
+        stateDirectory = os.path.dirname(os.path.abspath(self._stateFile))
+        temporaryPath = None
+        try:
+            stateFileDescriptor, temporaryPath = tempfile.mkstemp(dir=stateDirectory, suffix=".part")
+            with open(stateFileDescriptor, "w") as stateFile:
+                json.dump(asdict(self._state), stateFile)
+            os.replace(temporaryPath, self._stateFile)
+        except OSError as e:
+            print("Could not save the Imgur credit state")
+            print(str(e))
+            if temporaryPath:
+                try:
+                    os.remove(temporaryPath)
+                except OSError:
+                    pass
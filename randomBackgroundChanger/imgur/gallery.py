@@ -0,0 +1,73 @@
+
+import time
+
+
+class GalleryCursor:
+    """ Walk the pages of each gallery section in turn, moving to the next section once a section runs out
+        of pages or returns a page without new images. A section that has been walked is left alone for
+        restSeconds, as its pages would mostly hold images that have already been seen
+    """
+
+    baseURL = "https://api.imgur.com/3/gallery"
+    validSections = ("hot", "top", "user")
+    validSorts = ("viral", "top", "time", "rising")
+    validWindows = ("day", "week", "month", "year", "all")
+
+    def __init__(
+            self, sections=("hot", "top", "user"), sort="viral", window="day", maxPages=5,
+            restSeconds=300
+    ):
+        if not sections:
+            raise ValueError("At least one gallery section is needed")
+        for section in sections:
+            if section not in self.validSections:
+                raise ValueError(f"Gallery section must be one of {', '.join(self.validSections)}")
+        if sort not in self.validSorts:
+            raise ValueError(f"Gallery sort must be one of {', '.join(self.validSorts)}")
+        if window not in self.validWindows:
+            raise ValueError(f"Gallery window must be one of {', '.join(self.validWindows)}")
+        if maxPages < 1:
+            raise ValueError("At least one gallery page is needed")
+        if restSeconds < 0:
+            raise ValueError("The gallery rest time can't be negative")
+
+        self._sections = tuple(sections)
+        self._sort = sort
+        self._window = window
+        self._maxPages = maxPages
+        self._sectionIndex = 0
+        self._page = 0
+        self._restSeconds = restSeconds
+        self._restingUntil = {}
+
+    @property
+    def section(self):
+        return self._sections[self._sectionIndex]
+
+    @property
+    def page(self):
+        return self._page
+
+    @property
+    def url(self):
+        return f"{self.baseURL}/{self.section}/{self._sort}/{self._window}/{self._page}"
+
+    def nextURL(self):
+        """ Move past resting sections and return the URL of the next page, or None while every section is
+            resting
+        """
+        now = time.monotonic()
+        for _ in range(len(self._sections)):
+            if self._restingUntil.get(self.section, 0) <= now:
+                return self.url
+            self._sectionIndex = (self._sectionIndex + 1) % len(self._sections)
+            self._page = 0
+        return None
+
+    def advance(self, newImages=True):
+        self._page += 1
+        if not newImages or self._page >= self._maxPages:
+            self._restingUntil[self.section] = time.monotonic() + self._restSeconds
+            # start again from the first section once every section has been walked
+            self._sectionIndex = (self._sectionIndex + 1) % len(self._sections)
+            self._page = 0
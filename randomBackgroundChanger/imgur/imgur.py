@@ -1,31 +1,103 @@
 
+import threading
+from collections import deque, OrderedDict
+
 import requests
 from dataclasses import dataclass
 
+from randomBackgroundChanger.imgur.creditBudget import CreditBudgetExceeded
+from randomBackgroundChanger.imgur.gallery import GalleryCursor
+
 
 class ImgurController:
 
-    def __init__(self, imgurAuthenticator):
+    # statuses Imgur answers with when the access token has expired
+    unauthorisedStatuses = {401, 403}
+    # gallery pages that may be fetched for one batch when earlier pages were already seen
+    maxPagesPerBatch = 3
+    # image links remembered so the same image isn't handed out twice
+    maxSeenImages = 5000
+
+    def __init__(
+            self, imgurAuthenticator, imgurClient=None, creditBudget=None, galleryCursor=None, batchSize=20
+    ):
         self.imgurAuthenticator = imgurAuthenticator
+        # share the authenticator's connections unless told otherwise
+        self._imgurClient = imgurClient if imgurClient else imgurAuthenticator.imgurClient
+        self._creditBudget = creditBudget
+        if creditBudget:
+            self._imgurClient.addRateLimitListener(creditBudget.recordRateLimits)
+        self._galleryCursor = galleryCursor if galleryCursor else GalleryCursor()
+        self._batchSize = batchSize
+        self._candidates = deque()
+        self._seenImages = OrderedDict()
+        self._candidatesLock = threading.Lock()
+
+    @property
+    def creditBudget(self):
+        return self._creditBudget
 
     def _makeRequest(self, url, data=None, retryRefresh=True):
         headers = {"Authorization": f"Bearer {self.imgurAuthenticator.accessToken}"}
-        response = requests.get(url, data, headers=headers)
+        # rate limits and server errors are retried by the client
+        response = self._imgurClient.get(url, params=data, headers=headers)
         try:
             response.raise_for_status()
         except requests.HTTPError:
-            if not retryRefresh:
+            if not retryRefresh or response.status_code not in self.unauthorisedStatuses:
                 raise
             self.imgurAuthenticator.refreshToken()
             # retry the request with a refreshed access token
-            self._makeRequest(url, data=data, retryRefresh=False)
+            return self._makeRequest(url, data=data, retryRefresh=False)
         return response
 
     def requestNewImages(self):
-        requestURL = "https://api.imgur.com/3/gallery/random/random/0"
-        response = self._makeRequest(requestURL)
-        imagesURLs = ImgurController._parseImageUrls(response.json())
-        return imagesURLs
+        """ Hand out the next batch of images that haven't been handed out before, a gallery page holds
+            enough images for several batches
+        """
+        with self._candidatesLock:
+            for _ in range(self.maxPagesPerBatch):
+                if len(self._candidates) >= self._batchSize:
+                    break
+                try:
+                    if not self._fetchCandidates():
+                        # every section was walked recently, hand out what there is
+                        break
+                except CreditBudgetExceeded:
+                    if not self._candidates:
+                        raise
+                    # make do with the images already fetched
+                    break
+
+            batchSize = min(self._batchSize, len(self._candidates))
+            return [self._candidates.popleft() for _ in range(batchSize)]
+
+    def _fetchCandidates(self):
+        """ Add the unseen images of the next gallery page to the candidates, returning False without a
+            request while every gallery section is resting
+        """
+        requestURL = self._galleryCursor.nextURL()
+        if requestURL is None:
+            return False
+        if self._creditBudget:
+            # raises if the request would spend credits that are meant for later in the day
+            self._creditBudget.checkGalleryCall()
+        responseData = self._makeRequest(requestURL).json()
+
+        newImages = 0
+        for imgurImage in ImgurController._parseImageUrls(responseData):
+            if imgurImage.imageURL in self._seenImages:
+                continue
+            self._seenImages[imgurImage.imageURL] = None
+            self._candidates.append(imgurImage)
+            newImages += 1
+        while len(self._seenImages) > self.maxSeenImages:
+            self._seenImages.popitem(last=False)
+        self._galleryCursor.advance(newImages=newImages > 0)
+
+        if self._creditBudget:
+            self._creditBudget.recordGalleryCall(newImages)
+        return True
 
     @staticmethod
     def _parseImageUrls(responseData):
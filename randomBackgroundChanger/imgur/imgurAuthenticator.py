@@ -1,11 +1,12 @@
 
 from abc import ABC, abstractmethod
 
-import requests
 from requests.exceptions import HTTPError
 import webbrowser
 import json
 
+from randomBackgroundChanger.imgur.imgurClient import ImgurClient
+
 
 class InvalidPin(Exception):
     pass
@@ -13,14 +14,19 @@ class InvalidPin(Exception):
 
 class _ImgurAuthenticator(ABC):
 
-    def __init__(self, clientId, clientSecret, credsFile="creds.json"):
+    def __init__(self, clientId, clientSecret, credsFile="creds.json", imgurClient=None):
         self._clientId = clientId
         self._clientSecret = clientSecret
         self._credsFile = credsFile
+        self._imgurClient = imgurClient if imgurClient else ImgurClient()
         self._accessToken = None
         self._refreshToken = None
         self.startAuthentication()
 
+    @property
+    def imgurClient(self):
+        return self._imgurClient
+
     @property
     def accessTokenURL(self):
         return "https://api.imgur.com/oauth2/token"
@@ -60,7 +66,8 @@ class _ImgurAuthenticator(ABC):
             "refresh_token": self._refreshToken,
             "grant_type": "refresh_token"
         }
-        response = requests.post(self.accessTokenURL, data=postData)
+        # the refresh token can be used again, so a lost response only means another access token is issued
+        response = self._imgurClient.post(self.accessTokenURL, data=postData, retry=True)
         response.raise_for_status()
         self._updateTokens(response.json())
 
@@ -108,7 +115,7 @@ class PinImgurAuthenticator(_ImgurAuthenticator):
             "grant_type": "pin",
             "pin": self._pin
         }
-        response = requests.post(self.accessTokenURL, data=postData)
+        response = self._imgurClient.post(self.accessTokenURL, data=postData)
         try:
             response.raise_for_status()
         except HTTPError as httpError:
@@ -0,0 +1,131 @@
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ImgurRateLimited(Exception):
+    pass
+
+
+class ImgurClient:
+    """ A keep-alive session to the Imgur API shared by the controller and the authenticator, failed
+        requests are retried with backoff and requests are held back before the rate limit runs out
+    """
+
+    retryStatuses = {429, 500, 502, 503, 504}
+    # sending these again can't change more than the first attempt did, other methods are only retried
+    # when the caller says it is safe
+    idempotentMethods = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+    maxRetries = 4
+    backoffBase = 0.5
+    backoffMax = 30
+    # stop with this many user requests left, so the server isn't locked out until the reset
+    rateLimitReserve = 5
+    # longer waits for the rate limit to reset fail the request instead of holding up the caller
+    maxRateLimitWait = 60
+
+    def __init__(self, connectTimeout=5, readTimeout=30):
+        self._timeout = (connectTimeout, readTimeout)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._rateLimits = {}
+        self._pausedUntil = 0
+        self._rateLimitListeners = []
+
+    def addRateLimitListener(self, listener):
+        """ Call the listener with the X-RateLimit-* headers of every response that has them
+        """
+        self._rateLimitListeners.append(listener)
+
+    @property
+    def rateLimits(self):
+        """ The latest X-RateLimit-* headers sent by Imgur
+        """
+        with self._lock:
+            return dict(self._rateLimits)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, retry=False, **kwargs):
+        return self.request("POST", url, retry=retry, **kwargs)
+
+    def request(self, method, url, retry=None, **kwargs):
+        """ Send a request, retrying connection errors, 429s and 5xxs of idempotent methods, or of any method
+            when retry is True, the last response is returned whatever its status
+        """
+        if retry is None:
+            retry = method.upper() in self.idempotentMethods
+        maxRetries = self.maxRetries if retry else 0
+
+        for attempt in range(maxRetries + 1):
+            self._waitForRateLimit()
+            try:
+                response = self._session.request(method, url, timeout=self._timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == maxRetries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            self._updateRateLimits(response)
+            if response.status_code not in self.retryStatuses or attempt == maxRetries:
+                return response
+            time.sleep(self._retryDelay(response, attempt))
+
+    def _backoff(self, attempt):
+        # full jitter, so clients that failed together don't retry together
+        return random.uniform(0, min(self.backoffMax, self.backoffBase * 2 ** attempt))
+
+    def _retryDelay(self, response, attempt):
+        retryAfter = response.headers.get("Retry-After")
+        if retryAfter:
+            try:
+                return min(float(retryAfter), self.maxRateLimitWait)
+            except ValueError:
+                pass
+            try:
+                retryTime = parsedate_to_datetime(retryAfter).timestamp()
+                return min(max(retryTime - time.time(), 0), self.maxRateLimitWait)
+            except (TypeError, ValueError):
+                pass
+        return self._backoff(attempt)
+
+    def _updateRateLimits(self, response):
+        rateLimits = {
+            header: value for header, value in response.headers.items()
+            if header.lower().startswith("x-ratelimit-")
+        }
+        if not rateLimits:
+            return
+
+        rateLimits = {header.lower(): value for header, value in rateLimits.items()}
+        with self._lock:
+            self._rateLimits.update(rateLimits)
+            try:
+                userRemaining = int(rateLimits.get("x-ratelimit-userremaining", self.rateLimitReserve + 1))
+                userReset = int(rateLimits.get("x-ratelimit-userreset", 0))
+                if userRemaining <= self.rateLimitReserve:
+                    self._pausedUntil = max(self._pausedUntil, userReset)
+            except ValueError:
+                pass
+
+        for listener in self._rateLimitListeners:
+            listener(rateLimits)
+
+    def _waitForRateLimit(self):
+        with self._lock:
+            waitSeconds = self._pausedUntil - time.time()
+        if waitSeconds <= 0:
+            return
+        if waitSeconds > self.maxRateLimitWait:
+            raise ImgurRateLimited(f"The Imgur rate limit resets in {int(waitSeconds)} seconds")
+        time.sleep(waitSeconds)
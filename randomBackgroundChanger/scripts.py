@@ -6,8 +6,17 @@ from abc import ABC, abstractmethod
 from randomBackgroundChanger.fileHandler.fileHandler import (
     GSettingsHTTPBackgroundChanger, PORT, WebFileHandler
 )
+from randomBackgroundChanger.DAL.database import createTables
 from randomBackgroundChanger.fileHandler.WSGIFileHandler import WSGIFileHandler
+from randomBackgroundChanger.fileHandler.backgroundSettings import MemoryBackgroundSettings, createBackgroundSettings
+from randomBackgroundChanger.fileHandler.changeCoalescer import ChangeCoalescer
+from randomBackgroundChanger.fileHandler.imageDownloader import DownloadLimits
+from randomBackgroundChanger.fileHandler.imageProbe import ImageRules
+from randomBackgroundChanger.fileHandler.imageScaler import ScaleSettings
+from randomBackgroundChanger.fileHandler.rotationScheduler import RotationSchedule
 from randomBackgroundChanger.fileHandler.fileHandlerClient import FileHandlerClient
+from randomBackgroundChanger.imgur.creditBudget import CreditBudget
+from randomBackgroundChanger.imgur.gallery import GalleryCursor
 from randomBackgroundChanger.imgur.imgur import ImgurController
 from randomBackgroundChanger.imgur.imgurAuthenticator import PinImgurAuthenticator
 
@@ -52,6 +61,137 @@ class StartFilerServer(BasicArgsParser, ABC):
     def Parser(self):
         return self._parser
 
+    def parseArguments(self, *args):
+        self.Parser.add_argument(
+            "--lowWatermark", type=int, default=5,
+            help="Start downloading more images once the queue drops below this many images"
+        )
+        self.Parser.add_argument(
+            "--highWatermark", type=int, default=20,
+            help="Stop downloading images once the queue holds this many images"
+        )
+        self.Parser.add_argument(
+            "--watchImageDirectory", action="store_true",
+            help="Pick up images added or removed from the image directory by other programs"
+        )
+        self.Parser.add_argument(
+            "--downloadConcurrency", type=int, default=8,
+            help="The number of images to download at the same time"
+        )
+        self.Parser.add_argument(
+            "--rotationInterval", type=float,
+            help="Change the background every this many seconds"
+        )
+        self.Parser.add_argument(
+            "--rotationCron",
+            help="Change the background on a cron schedule, e.g. \"0 * * * *\" for every hour"
+        )
+        self.Parser.add_argument(
+            "--rotationJitter", type=float, default=0,
+            help="Delay each scheduled change by a random number of seconds up to this value"
+        )
+        self.Parser.add_argument(
+            "--scaleWidth", type=int,
+            help="Scale downloaded images down to this display width, along with --scaleHeight"
+        )
+        self.Parser.add_argument(
+            "--scaleHeight", type=int,
+            help="Scale downloaded images down to this display height, along with --scaleWidth"
+        )
+        self.Parser.add_argument(
+            "--scaleFit", choices=ScaleSettings.fitModes, default="cover",
+            help="Scale images to fill the display (cover) or to fit inside it (contain)"
+        )
+        self.Parser.add_argument(
+            "--scaleGifPolicy", choices=ScaleSettings.gifPolicies, default="keep",
+            help="Leave animated GIFs as they are, replace them with their first frame or scale every frame"
+        )
+        self.Parser.add_argument(
+            "--previewCacheBytes", type=int, default=64 * 1024 * 1024,
+            help="Remove the oldest image previews once the preview cache grows past this many bytes"
+        )
+        self.Parser.add_argument(
+            "--coalesceWindow", type=float, default=0,
+            help="Merge background changes requested within this many seconds of each other"
+        )
+        self.Parser.add_argument(
+            "--coalesceMode", choices=ChangeCoalescer.modes, default="single",
+            help="Advance merged changes by a single image or by one image per request"
+        )
+        self.Parser.add_argument(
+            "--headless", action="store_true",
+            help="Keep the background in memory instead of setting the desktop background"
+        )
+        self.Parser.add_argument(
+            "--signedTokens", action="store_true",
+            help="Issue signed tokens that are validated without a database lookup"
+        )
+        self.Parser.add_argument(
+            "--downloadConnectTimeout", type=float, default=DownloadLimits.connectTimeout,
+            help="Seconds to wait for a connection to the image host"
+        )
+        self.Parser.add_argument(
+            "--downloadReadTimeout", type=float, default=DownloadLimits.readTimeout,
+            help="Seconds to wait for more image data before giving up on a download"
+        )
+        self.Parser.add_argument(
+            "--maxImageBytes", type=int, default=DownloadLimits.maxBytes,
+            help="Abort downloads of images larger than this many bytes"
+        )
+        self.Parser.add_argument(
+            "--downloadBatchTimeout", type=float, default=DownloadLimits.batchTimeout,
+            help="Seconds a batch of downloads may take before the remaining downloads are aborted"
+        )
+        self.Parser.add_argument(
+            "--minImageWidth", type=int, default=ImageRules.minWidth,
+            help="Skip images narrower than this many pixels"
+        )
+        self.Parser.add_argument(
+            "--minImageHeight", type=int, default=ImageRules.minHeight,
+            help="Skip images shorter than this many pixels"
+        )
+        self.Parser.add_argument(
+            "--minAspectRatio", type=float, default=ImageRules.minAspectRatio,
+            help="Skip images with a lower width to height ratio, no images are skipped by default"
+        )
+        self.Parser.add_argument(
+            "--maxAspectRatio", type=float, default=ImageRules.maxAspectRatio,
+            help="Skip images with a higher width to height ratio, no images are skipped by default"
+        )
+        self.Parser.add_argument(
+            "--maxGifBytes", type=int, default=ImageRules.maxGifBytes,
+            help="Skip GIFs larger than this many bytes, GIFs are only limited by --maxImageBytes by default"
+        )
+        self.Parser.add_argument(
+            "--creditStateFile", default="imgurCredits.json",
+            help="Where to keep the Imgur API credits between restarts"
+        )
+        self.Parser.add_argument(
+            "--creditReserve", type=float, default=0.1,
+            help="The fraction of the Imgur API credits to leave unspent"
+        )
+        self.Parser.add_argument(
+            "--gallerySections", nargs="+", choices=GalleryCursor.validSections, default=["hot", "top", "user"],
+            help="The Imgur gallery sections to take images from, in turn"
+        )
+        self.Parser.add_argument(
+            "--gallerySort", choices=GalleryCursor.validSorts, default="viral",
+            help="How the Imgur gallery sections are sorted"
+        )
+        self.Parser.add_argument(
+            "--galleryWindow", choices=GalleryCursor.validWindows, default="day",
+            help="The time window of the top gallery section"
+        )
+        self.Parser.add_argument(
+            "--galleryPages", type=int, default=5,
+            help="Move to the next gallery section after this many pages"
+        )
+        self.Parser.add_argument(
+            "--galleryRestSeconds", type=float, default=300,
+            help="Seconds before a gallery section that has been walked is requested from Imgur again"
+        )
+        super().parseArguments(*args)
+
     @abstractmethod
     def startFileHandler(self):
         pass
@@ -63,17 +203,94 @@ class StartFilerServer(BasicArgsParser, ABC):
 
 class HTTPFileHandlerServer(StartFilerServer):
 
+    @property
+    def scaleSettings(self):
+        if self._args.scaleWidth is None and self._args.scaleHeight is None:
+            return None
+        if self._args.scaleWidth is None or self._args.scaleHeight is None:
+            self.Parser.error("Both --scaleWidth and --scaleHeight are needed to scale images")
+
+        try:
+            return ScaleSettings(
+                self._args.scaleWidth, self._args.scaleHeight,
+                fitMode=self._args.scaleFit, gifPolicy=self._args.scaleGifPolicy
+            )
+        except ValueError as e:
+            self.Parser.error(str(e))
+
+    @property
+    def rotationSchedule(self):
+        if self._args.rotationInterval is None and self._args.rotationCron is None:
+            return None
+
+        try:
+            return RotationSchedule(
+                interval=self._args.rotationInterval,
+                cron=self._args.rotationCron,
+                jitter=self._args.rotationJitter
+            )
+        except ValueError as e:
+            self.Parser.error(str(e))
+
+    @property
+    def creditBudget(self):
+        try:
+            return CreditBudget(self._args.creditStateFile, reserveFraction=self._args.creditReserve)
+        except ValueError as e:
+            self.Parser.error(str(e))
+
+    @property
+    def galleryCursor(self):
+        try:
+            return GalleryCursor(
+                sections=self._args.gallerySections, sort=self._args.gallerySort,
+                window=self._args.galleryWindow, maxPages=self._args.galleryPages,
+                restSeconds=self._args.galleryRestSeconds
+            )
+        except ValueError as e:
+            self.Parser.error(str(e))
+
     def createInstance(self):
         self._imgurAuthenticator = PinImgurAuthenticator(self._args.clientId, self._args.clientSecret)
-        self._imgurController = ImgurController(self._imgurAuthenticator)
-        fileHandler = GSettingsHTTPBackgroundChanger(self._imgurController)
-        self._server = WebFileHandler(fileHandler, self._args.clientId, self._args.clientSecret)
+        self._imgurController = ImgurController(
+            self._imgurAuthenticator, creditBudget=self.creditBudget, galleryCursor=self.galleryCursor
+        )
+        fileHandler = GSettingsHTTPBackgroundChanger(
+            self._imgurController,
+            lowWatermark=self._args.lowWatermark,
+            highWatermark=self._args.highWatermark,
+            watchImageDirectory=self._args.watchImageDirectory,
+            downloadConcurrency=self._args.downloadConcurrency,
+            downloadLimits=DownloadLimits(
+                connectTimeout=self._args.downloadConnectTimeout,
+                readTimeout=self._args.downloadReadTimeout,
+                maxBytes=self._args.maxImageBytes,
+                batchTimeout=self._args.downloadBatchTimeout
+            ),
+            imageRules=ImageRules(
+                minWidth=self._args.minImageWidth,
+                minHeight=self._args.minImageHeight,
+                minAspectRatio=self._args.minAspectRatio,
+                maxAspectRatio=self._args.maxAspectRatio,
+                maxGifBytes=self._args.maxGifBytes
+            ),
+            rotationSchedule=self.rotationSchedule,
+            previewCacheBytes=self._args.previewCacheBytes,
+            scaleSettings=self.scaleSettings,
+            backgroundSettingsFactory=MemoryBackgroundSettings if self._args.headless else createBackgroundSettings
+        )
+        self._server = WebFileHandler(
+            fileHandler, self._args.clientId, self._args.clientSecret, signedTokens=self._args.signedTokens,
+            coalesceWindow=self._args.coalesceWindow, coalesceMode=self._args.coalesceMode
+        )
 
 
 class FileServerStarter(HTTPFileHandlerServer):
 
     def startFileHandler(self):
         self.parseArguments(sys.argv[1:])
+        # bring existing databases up to date with the current schema
+        createTables()
         wsgiSever = WSGIFileHandler(self._server)
         wsgiSever.run()
 
@@ -0,0 +1,99 @@
+
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from randomBackgroundChanger.DAL import database
+
+MODULE_PATH = "randomBackgroundChanger.DAL.database."
+
+
+@patch(f"{MODULE_PATH}_createEngine")
+class Test_getEngine(TestCase):
+
+    def setUp(self):
+        database._engine = None
+        database._enginePid = None
+
+    def tearDown(self):
+        database._engine = None
+        database._enginePid = None
+
+    def test_engine_reused(self, _createEngine):
+        engine = database.getEngine()
+
+        self.assertIs(engine, database.getEngine())
+        _createEngine.assert_called_once_with()
+
+    @patch(f"{MODULE_PATH}os.getpid")
+    def test_new_engine_after_fork(self, getpid, _createEngine):
+        parentEngine, childEngine = MagicMock(), MagicMock()
+        _createEngine.side_effect = [parentEngine, childEngine]
+        getpid.return_value = 100
+        database.getEngine()
+        getpid.return_value = 101
+
+        engine = database.getEngine()
+
+        self.assertIs(childEngine, engine)
+        parentEngine.dispose.assert_called_once_with(close=False)
+
+    def test_concurrent_callers_share_engine(self, _createEngine):
+        createdEngines = []
+
+        def createEngine():
+            # let the other callers find no engine yet
+            time.sleep(0.01)
+            createdEngines.append(MagicMock())
+            return createdEngines[-1]
+        _createEngine.side_effect = createEngine
+        engines = []
+        threads = [threading.Thread(target=lambda: engines.append(database.getEngine())) for _ in range(5)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(5, len(engines))
+        self.assertEqual(1, len({id(engine) for engine in engines}))
+        # the engines that lost the race are closed
+        for engine in createdEngines:
+            self.assertEqual(engine is not engines[0], engine.dispose.called)
+
+
+class Test__setSQLitePragmas(TestCase):
+
+    def test_ok(self):
+        dbapiConnection = MagicMock()
+        cursor = dbapiConnection.cursor.return_value
+
+        database._setSQLitePragmas(dbapiConnection, MagicMock())
+
+        cursor.execute.assert_any_call("PRAGMA journal_mode=WAL")
+        cursor.execute.assert_any_call("PRAGMA synchronous=NORMAL")
+        cursor.close.assert_called_once_with()
+
+
+class Test_migrateTables(TestCase):
+
+    def test_adds_indexes_to_existing_table(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE token (id INTEGER PRIMARY KEY, token VARCHAR, expiryDate DATETIME)"))
+            connection.execute(text("INSERT INTO token (token) VALUES ('token1'), ('token1'), ('token2')"))
+
+        database.migrateTables(engine)
+        database.migrateTables(engine)
+
+        indexes = inspect(engine).get_indexes("token")
+        self.assertEqual(
+            {("ix_token_token", True), ("ix_token_expiryDate", False)},
+            {(index["name"], bool(index["unique"])) for index in indexes}
+        )
+        with engine.connect() as connection:
+            self.assertEqual(2, connection.execute(text("SELECT COUNT(*) FROM token")).scalar())
@@ -0,0 +1,119 @@
+
+from datetime import datetime, timedelta
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from randomBackgroundChanger.DAL import database, queries
+
+MODULE_PATH = "randomBackgroundChanger.DAL.queries."
+
+
+class QueriesTestCommon(TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        database.Base.metadata.create_all(self.engine)
+        getEnginePatcher = patch(f"{MODULE_PATH}database.getEngine", return_value=self.engine)
+        getEnginePatcher.start()
+        self.addCleanup(getEnginePatcher.stop)
+
+
+class Test_validToken(QueriesTestCommon):
+
+    def test_valid(self):
+        queries.addNewToken("token123", 30)
+
+        self.assertTrue(queries.validToken("token123"))
+
+    def test_missing(self):
+        self.assertFalse(queries.validToken("token123"))
+
+
+class Test_validToken_expired(QueriesTestCommon):
+
+    def setUp(self):
+        super().setUp()
+        with Session(self.engine) as session:
+            session.add(database.Token(token="token123", expiryDate=datetime.now() - timedelta(days=1)))
+            session.commit()
+
+    def test_expired(self):
+        self.assertFalse(queries.validToken("token123"))
+        self.assertIsNone(queries.tokenExpiryDate("token123"))
+
+    def test_without_date_validation(self):
+        self.assertTrue(queries.validToken("token123", validateDate=False))
+
+
+class Test_tokenExpiryDate(QueriesTestCommon):
+
+    def test_valid(self):
+        queries.addNewToken("token123", 30)
+
+        expiryDate = queries.tokenExpiryDate("token123")
+
+        self.assertGreater(expiryDate, datetime.now() + timedelta(days=29))
+
+    def test_missing(self):
+        self.assertIsNone(queries.tokenExpiryDate("token123"))
+
+
+class Test_addNewToken(QueriesTestCommon):
+
+    def test_duplicate(self):
+        queries.addNewToken("token123", 30)
+
+        with self.assertRaises(queries.InvalidToken):
+            queries.addNewToken("token123", 30)
+
+
+class Test_revokeToken(QueriesTestCommon):
+
+    def test_ok(self):
+        queries.addNewToken("token123", 30)
+
+        queries.revokeToken("token123")
+
+        self.assertFalse(queries.validToken("token123"))
+
+    def test_missing(self):
+        with self.assertRaises(queries.InvalidToken):
+            queries.revokeToken("token123")
+
+
+class Test_deleteExpiredTokens(QueriesTestCommon):
+
+    def addToken(self, token, expiryDate):
+        with Session(self.engine) as session:
+            session.add(database.Token(token=token, expiryDate=expiryDate))
+            session.commit()
+
+    def test_ok(self):
+        for tokenNumber in range(5):
+            self.addToken(f"expired{tokenNumber}", datetime.now() - timedelta(days=1))
+        queries.addNewToken("valid", 30)
+
+        deletedTokens = queries.deleteExpiredTokens(batchSize=2)
+
+        self.assertEqual(5, deletedTokens)
+        self.assertTrue(queries.validToken("valid"))
+        self.assertFalse(queries.validToken("expired0", validateDate=False))
+
+    def test_nothing_expired(self):
+        queries.addNewToken("valid", 30)
+
+        self.assertEqual(0, queries.deleteExpiredTokens())
+
+
+class Test_revokedTokenSignatures(QueriesTestCommon):
+
+    def test_ok(self):
+        queries.addRevokedToken("signature1", datetime.now() + timedelta(days=1))
+        queries.addRevokedToken("signature1", datetime.now() + timedelta(days=1))
+        queries.addRevokedToken("signature2", datetime.now() - timedelta(days=1))
+
+        self.assertEqual({"signature1"}, queries.revokedTokenSignatures())
@@ -0,0 +1,54 @@
+
+from datetime import datetime, timedelta
+from unittest import TestCase
+from unittest.mock import patch
+
+from randomBackgroundChanger.DAL.tokenCache import TokenCache
+
+MODULE_PATH = "randomBackgroundChanger.DAL.tokenCache."
+
+
+class Test_TokenCache(TestCase):
+
+    def setUp(self):
+        self.tokenCache = TokenCache(maxSize=2, ttl=60)
+        self.expiryDate = datetime.now() + timedelta(days=1)
+
+    def test_cached(self):
+        self.tokenCache.addToken("token1", self.expiryDate)
+
+        self.assertTrue(self.tokenCache.validToken("token1"))
+        self.assertFalse(self.tokenCache.validToken("token2"))
+
+    def test_token_expired(self):
+        self.tokenCache.addToken("token1", datetime.now() - timedelta(seconds=1))
+
+        self.assertFalse(self.tokenCache.validToken("token1"))
+        self.assertEqual(0, len(self.tokenCache))
+
+    @patch(f"{MODULE_PATH}time.monotonic")
+    def test_ttl_expired(self, monotonic):
+        monotonic.return_value = 100
+        self.tokenCache.addToken("token1", self.expiryDate)
+        monotonic.return_value = 160
+
+        self.assertFalse(self.tokenCache.validToken("token1"))
+
+    def test_least_recently_used_evicted(self):
+        self.tokenCache.addToken("token1", self.expiryDate)
+        self.tokenCache.addToken("token2", self.expiryDate)
+        self.tokenCache.validToken("token1")
+
+        self.tokenCache.addToken("token3", self.expiryDate)
+
+        self.assertTrue(self.tokenCache.validToken("token1"))
+        self.assertFalse(self.tokenCache.validToken("token2"))
+        self.assertTrue(self.tokenCache.validToken("token3"))
+
+    def test_invalidate(self):
+        self.tokenCache.addToken("token1", self.expiryDate)
+
+        self.tokenCache.invalidate("token1")
+        self.tokenCache.invalidate("token2")
+
+        self.assertFalse(self.tokenCache.validToken("token1"))
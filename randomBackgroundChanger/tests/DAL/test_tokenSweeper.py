@@ -0,0 +1,34 @@
+
+from unittest import TestCase
+from unittest.mock import call, patch
+
+from randomBackgroundChanger.DAL import database
+from randomBackgroundChanger.DAL.tokenSweeper import ExpiredTokenSweeper
+
+MODULE_PATH = "randomBackgroundChanger.DAL.tokenSweeper."
+
+
+@patch(f"{MODULE_PATH}queries")
+class Test_ExpiredTokenSweeper_sweep(TestCase):
+
+    def test_ok(self, queries):
+        queries.deleteExpiredTokens.side_effect = [3, 1]
+
+        deletedTokens = ExpiredTokenSweeper(batchSize=100).sweep()
+
+        queries.deleteExpiredTokens.assert_has_calls(
+            [
+                call(100, database.Token),
+                call(100, database.RevokedToken)
+            ]
+        )
+        self.assertEqual(4, deletedTokens)
+
+    @patch(f"{MODULE_PATH}print")
+    def test_exception(self, print, queries):
+        queries.deleteExpiredTokens.side_effect = Exception("database is locked")
+
+        deletedTokens = ExpiredTokenSweeper().sweep()
+
+        print.assert_called_with("database is locked")
+        self.assertEqual(0, deletedTokens)
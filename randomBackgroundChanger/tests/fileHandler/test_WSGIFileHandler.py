@@ -0,0 +1,20 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from randomBackgroundChanger.fileHandler.WSGIFileHandler import WSGIFileHandler
+
+
+class Test_WSGIFileHandler_options(TestCase):
+
+    def test_sendfile_enabled(self):
+        wsgiFileHandler = WSGIFileHandler(MagicMock())
+
+        self.assertIs(True, wsgiFileHandler.cfg.sendfile)
+
+    def test_background_tasks_started_in_worker(self):
+        application = MagicMock()
+        wsgiFileHandler = WSGIFileHandler(application)
+
+        wsgiFileHandler.cfg.post_worker_init(MagicMock())
+
+        application.startBackgroundTasks.assert_called_once()
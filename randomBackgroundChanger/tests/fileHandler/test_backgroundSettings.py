@@ -0,0 +1,141 @@
+
+import sys
+from unittest import TestCase
+from unittest.mock import MagicMock, call, patch
+
+from randomBackgroundChanger.fileHandler.backgroundSettings import (
+    BackgroundSettingsUnavailable, GioBackgroundSettings, GSettingsCommandBackgroundSettings, MemoryBackgroundSettings,
+    createBackgroundSettings
+)
+
+MODULE_PATH = "randomBackgroundChanger.fileHandler.backgroundSettings."
+
+
+class GioTestCommon(TestCase):
+
+    def setUp(self):
+        self.gi = MagicMock()
+        modulesPatcher = patch.dict(sys.modules, {"gi": self.gi, "gi.repository": self.gi.repository})
+        modulesPatcher.start()
+        self.addCleanup(modulesPatcher.stop)
+        self.settings = self.gi.repository.Gio.Settings.new.return_value
+        self.settings.get_string.return_value = "/foo/bar"
+
+
+class Test_GioBackgroundSettings___init__(GioTestCommon):
+
+    def test_ok(self):
+        gioBackgroundSettings = GioBackgroundSettings()
+
+        self.gi.repository.Gio.Settings.new.assert_called_once_with("org.gnome.desktop.background")
+        self.settings.delay.assert_called_once_with()
+        self.settings.connect.assert_called_once_with(
+            "changed::picture-uri", gioBackgroundSettings._pictureUriChanged
+        )
+        self.assertEqual("/foo/bar", gioBackgroundSettings.pictureUri)
+
+    def test_no_schema(self):
+        self.gi.repository.Gio.SettingsSchemaSource.get_default.return_value.lookup.return_value = None
+
+        with self.assertRaises(BackgroundSettingsUnavailable):
+            GioBackgroundSettings()
+
+        self.gi.repository.Gio.Settings.new.assert_not_called()
+
+
+class Test_GioBackgroundSettings_setBackground(GioTestCommon):
+
+    def test_ok(self):
+        gioBackgroundSettings = GioBackgroundSettings()
+        self.settings.reset_mock()
+
+        gioBackgroundSettings.setBackground("/foo/baz", "scaled")
+
+        self.assertEqual(
+            [
+                call.set_string("picture-uri", "/foo/baz"),
+                call.set_string("picture-options", "scaled"),
+                call.apply()
+            ],
+            self.settings.mock_calls
+        )
+        self.assertEqual("/foo/baz", gioBackgroundSettings.pictureUri)
+
+
+class Test_GioBackgroundSettings__pictureUriChanged(GioTestCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.gioBackgroundSettings = GioBackgroundSettings()
+        self.listener = MagicMock()
+        self.gioBackgroundSettings.addChangeListener(self.listener)
+
+    def test_changed_outside_server(self):
+        self.settings.get_string.return_value = "/foo/qux"
+
+        self.gioBackgroundSettings._pictureUriChanged(self.settings, "picture-uri")
+
+        self.listener.assert_called_once_with("/foo/qux")
+        self.assertEqual("/foo/qux", self.gioBackgroundSettings.pictureUri)
+
+    def test_own_change(self):
+        self.gioBackgroundSettings.setBackground("/foo/baz", "scaled")
+        self.settings.get_string.return_value = "/foo/baz"
+
+        self.gioBackgroundSettings._pictureUriChanged(self.settings, "picture-uri")
+
+        self.listener.assert_not_called()
+
+
+@patch(f"{MODULE_PATH}subprocess")
+class Test_GSettingsCommandBackgroundSettings(TestCase):
+
+    def test_picture_uri(self, subprocess):
+        subprocess.run.return_value.stdout = b"'/foo/bar'\n"
+
+        pictureUri = GSettingsCommandBackgroundSettings().pictureUri
+
+        self.assertEqual("/foo/bar", pictureUri)
+
+    def test_set_background(self, subprocess):
+        GSettingsCommandBackgroundSettings().setBackground("/foo/bar", "scaled")
+
+        subprocess.run.assert_has_calls(
+            [
+                call(["/usr/bin/gsettings", "set", "org.gnome.desktop.background", "picture-uri", "/foo/bar"]),
+                call(["/usr/bin/gsettings", "set", "org.gnome.desktop.background", "picture-options", "scaled"])
+            ]
+        )
+
+
+class Test_MemoryBackgroundSettings(TestCase):
+
+    def test_set_background(self):
+        memoryBackgroundSettings = MemoryBackgroundSettings()
+
+        memoryBackgroundSettings.setBackground("/foo/bar", "scaled")
+
+        self.assertEqual(("/foo/bar", "scaled"), (memoryBackgroundSettings.pictureUri, memoryBackgroundSettings.pictureOptions))
+
+    def test_change_background(self):
+        memoryBackgroundSettings = MemoryBackgroundSettings()
+        listener = MagicMock()
+        memoryBackgroundSettings.addChangeListener(listener)
+
+        memoryBackgroundSettings.changeBackground("/foo/bar")
+
+        listener.assert_called_once_with("/foo/bar")
+
+
+class Test_createBackgroundSettings(TestCase):
+
+    @patch.dict(sys.modules, {"gi": None})
+    def test_no_pygobject(self):
+        self.assertIsInstance(createBackgroundSettings(), GSettingsCommandBackgroundSettings)
+
+    def test_no_schema(self):
+        gi = MagicMock()
+        gi.repository.Gio.SettingsSchemaSource.get_default.return_value = None
+
+        with patch.dict(sys.modules, {"gi": gi, "gi.repository": gi.repository}):
+            self.assertIsInstance(createBackgroundSettings(), GSettingsCommandBackgroundSettings)
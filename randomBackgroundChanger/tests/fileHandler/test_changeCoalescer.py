@@ -0,0 +1,116 @@
+
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from randomBackgroundChanger.fileHandler.changeCoalescer import ChangeCoalescer
+from randomBackgroundChanger.fileHandler.imagePrefetcher import AlreadyDownloadingImagesException
+
+
+class Test_ChangeCoalescer_cycleBackgroundImage(TestCase):
+
+    def setUp(self):
+        self.fileHandler = MagicMock()
+
+    def startCycle(self, changeCoalescer, error=None):
+        """ Start a change that holds its cycle until the returned event is set, changes requested in the
+            meantime are gathered into the next batch
+        """
+        cycleStarted = threading.Event()
+        releaseCycle = threading.Event()
+
+        def cycleBackgroundImage(**kwargs):
+            if not cycleStarted.is_set():
+                cycleStarted.set()
+                releaseCycle.wait(5)
+            if error:
+                raise error
+
+        self.fileHandler.cycleBackgroundImage.side_effect = cycleBackgroundImage
+        thread = threading.Thread(target=self.cycleIgnoringErrors, args=(changeCoalescer,))
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        cycleStarted.wait(5)
+        return releaseCycle
+
+    @staticmethod
+    def cycleIgnoringErrors(changeCoalescer):
+        try:
+            changeCoalescer.cycleBackgroundImage()
+        except Exception:
+            pass
+
+    def cycleConcurrently(self, changeCoalescer, jobIds, releaseCycle):
+        errors = []
+
+        def cycle(jobId):
+            try:
+                changeCoalescer.cycleBackgroundImage(jobIds=[jobId])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=cycle, args=(jobId,)) for jobId in jobIds]
+        for thread in threads:
+            thread.start()
+        releaseCycle.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        return errors
+
+    def test_quiet(self):
+        changeCoalescer = ChangeCoalescer(self.fileHandler, window=10)
+        started = time.monotonic()
+
+        changeCoalescer.cycleBackgroundImage(jobIds=["job1"])
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.fileHandler.cycleBackgroundImage.assert_called_once_with(count=1, jobIds=["job1"])
+
+    def test_single(self):
+        changeCoalescer = ChangeCoalescer(self.fileHandler, window=0.2)
+        releaseCycle = self.startCycle(changeCoalescer)
+
+        errors = self.cycleConcurrently(changeCoalescer, ["job1", "job2", "job3"], releaseCycle)
+
+        self.assertEqual([], errors)
+        self.assertEqual(2, self.fileHandler.cycleBackgroundImage.call_count)
+        _, kwargs = self.fileHandler.cycleBackgroundImage.call_args
+        self.assertEqual(1, kwargs["count"])
+        self.assertCountEqual(["job1", "job2", "job3"], kwargs["jobIds"])
+
+    def test_count(self):
+        changeCoalescer = ChangeCoalescer(self.fileHandler, window=0.2, mode="count")
+        releaseCycle = self.startCycle(changeCoalescer)
+
+        self.cycleConcurrently(changeCoalescer, ["job1", "job2", "job3"], releaseCycle)
+
+        self.assertEqual(2, self.fileHandler.cycleBackgroundImage.call_count)
+        self.assertEqual(3, self.fileHandler.cycleBackgroundImage.call_args.kwargs["count"])
+
+    def test_error_shared(self):
+        changeCoalescer = ChangeCoalescer(self.fileHandler, window=0.2)
+        releaseCycle = self.startCycle(changeCoalescer, AlreadyDownloadingImagesException("No images"))
+
+        errors = self.cycleConcurrently(changeCoalescer, ["job1", "job2"], releaseCycle)
+
+        self.assertEqual(2, len(errors))
+        # every waiter raises its own exception, chained to the one the batch raised
+        self.assertIsNot(errors[0], errors[1])
+        for error in errors:
+            self.assertIsInstance(error, AlreadyDownloadingImagesException)
+            self.assertEqual(("No images",), error.args)
+        self.assertIn(errors[0].__cause__ or errors[1].__cause__, errors)
+
+    def test_separate_windows(self):
+        changeCoalescer = ChangeCoalescer(self.fileHandler, window=0)
+
+        changeCoalescer.cycleBackgroundImage()
+        changeCoalescer.cycleBackgroundImage()
+
+        self.assertEqual(2, self.fileHandler.cycleBackgroundImage.call_count)
+        self.fileHandler.cycleBackgroundImage.assert_called_with(count=1)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            ChangeCoalescer(self.fileHandler, mode="all")
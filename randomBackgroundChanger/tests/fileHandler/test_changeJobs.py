@@ -0,0 +1,43 @@
+
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from randomBackgroundChanger.fileHandler.changeJobs import ChangeJobManager
+from randomBackgroundChanger.fileHandler.imagePrefetcher import AlreadyDownloadingImagesException
+
+
+class Test_ChangeJobManager_submit(TestCase):
+
+    def setUp(self):
+        self.fileHandler = MagicMock()
+        self.changeJobManager = ChangeJobManager(self.fileHandler, maxJobs=2)
+        self.addCleanup(self.changeJobManager._executor.shutdown)
+
+    def waitForJobs(self):
+        self.changeJobManager._executor.submit(lambda: None).result(timeout=5)
+
+    def test_ok(self):
+        job = self.changeJobManager.submit()
+        self.waitForJobs()
+
+        self.fileHandler.cycleBackgroundImage.assert_called_once_with(jobIds=[job.jobId])
+        self.assertEqual("complete", job.status)
+        self.assertIsNotNone(job.finishedAt)
+        self.assertIs(job, self.changeJobManager.getJob(job.jobId))
+
+    def test_failed(self):
+        self.fileHandler.cycleBackgroundImage.side_effect = AlreadyDownloadingImagesException
+
+        job = self.changeJobManager.submit()
+        self.waitForJobs()
+
+        self.assertEqual("failed", job.status)
+        self.assertEqual("AlreadyDownloadingImagesException", job.error)
+
+    def test_old_jobs_forgotten(self):
+        jobs = [self.changeJobManager.submit() for _ in range(3)]
+        self.waitForJobs()
+
+        self.assertIsNone(self.changeJobManager.getJob(jobs[0].jobId))
+        self.assertIs(jobs[2], self.changeJobManager.getJob(jobs[2].jobId))
+        self.assertEqual(3, self.fileHandler.cycleBackgroundImage.call_count)
@@ -1,10 +1,19 @@
 
+import os
+import tempfile
+from datetime import datetime, timedelta
 from unittest import TestCase
 from unittest.mock import call, patch, MagicMock, PropertyMock
 
 from randomBackgroundChanger.fileHandler.fileHandler import (
-    FileHandler, AlreadyDownloadingImagesException, checkAuthorisationToken
+    FileHandler, AlreadyDownloadingImagesException, GSettingsHTTPBackgroundChanger, HTTPFileHandler, WSFileHandler,
+    WebFileHandler, checkAuthorisationToken, tokenCache
 )
+from randomBackgroundChanger.fileHandler.backgroundSettings import MemoryBackgroundSettings
+from randomBackgroundChanger.fileHandler.changeJobs import ChangeJob
+from randomBackgroundChanger.fileHandler.imageMetadata import ImageMetadataCache
+from randomBackgroundChanger.fileHandler.imageQueue import ImageQueue
+from randomBackgroundChanger.fileHandler.rotationScheduler import RotationSchedule, RotationScheduler
 from randomBackgroundChanger.imgur.imgur import ImgurImage
 
 MODULE_PATH = "randomBackgroundChanger.fileHandler.fileHandler."
@@ -16,76 +25,137 @@ class Test_FileHandler_cycleBackgroundImage(TestCase):
 
     def setUp(self):
         self.fileHandler = FileHandler(MagicMock())
+        self.fileHandler._imagePrefetcher = MagicMock()
+        self.fileHandler._imageQueue = MagicMock()
+        self.fileHandler.imageDetails = MagicMock(return_value={"hash": "hash"})
 
     def test_ok(self, FileHandler_getImages, FileHandler_deleteLastImage):
-        type(self.fileHandler).imageFilePaths = PropertyMock(return_value=["/foo/bar", "/bar/foo"])
+        self.fileHandler._imageQueue.__len__.return_value = 2
 
         self.fileHandler.cycleBackgroundImage()
 
         FileHandler_getImages.assert_not_called()
         FileHandler_deleteLastImage.assert_called_once_with()
+        self.fileHandler._imagePrefetcher.checkQueue.assert_called_once_with()
+
+    def test_update_details_sent_to_listeners(self, FileHandler_getImages, FileHandler_deleteLastImage):
+        self.fileHandler._imageQueue.__len__.return_value = 2
+        listener = MagicMock()
+        self.fileHandler.addListener(listener)
+
+        self.fileHandler.cycleBackgroundImage(jobIds=["jobId"])
+
+        self.fileHandler.imageDetails.assert_called_once_with(self.fileHandler._imageQueue.first)
+        listener.imageChangeUpdate.assert_called_once_with(image={"hash": "hash"}, jobIds=["jobId"])
+
+    @patch.object(FileHandler, "_deleteImage")
+    def test_count(self, FileHandler_deleteImage, FileHandler_getImages, FileHandler_deleteLastImage):
+        self.fileHandler._imageQueue.__len__.return_value = 5
+        self.fileHandler._imageQueue.first = "/foo/bar"
+
+        self.fileHandler.cycleBackgroundImage(count=3)
+
+        FileHandler_deleteLastImage.assert_called_once_with()
+        self.assertEqual([call("/foo/bar"), call("/foo/bar")], FileHandler_deleteImage.call_args_list)
+        self.fileHandler._imagePrefetcher.waitForImages.assert_not_called()
+
+    @patch.object(FileHandler, "_deleteImage")
+    def test_count_more_than_downloaded(
+            self, FileHandler_deleteImage, FileHandler_getImages, FileHandler_deleteLastImage
+    ):
+        self.fileHandler._imageQueue.__len__.return_value = 2
+        self.fileHandler._imagePrefetcher.waitForImages.return_value = False
+
+        self.fileHandler.cycleBackgroundImage(count=3)
+
+        self.fileHandler._imagePrefetcher.waitForImages.assert_called_once_with(
+            4, timeout=FileHandler.imageWaitTimeout
+        )
         FileHandler_deleteLastImage.assert_called_once_with()
+        FileHandler_deleteImage.assert_not_called()
 
-    def test_locked(self, FileHandler_getImages, FileHandler_deleteLastImage):
-        self.fileHandler._downloadingImages.acquire()
-        type(self.fileHandler).imageFilePaths = PropertyMock(return_value=["/foo/bar"])
+    def test_no_images_arrived(self, FileHandler_getImages, FileHandler_deleteLastImage):
+        self.fileHandler._imageQueue.__len__.return_value = 1
+        self.fileHandler._imagePrefetcher.waitForImages.return_value = False
 
         with self.assertRaises(AlreadyDownloadingImagesException):
             self.fileHandler.cycleBackgroundImage()
 
+        FileHandler_deleteLastImage.assert_not_called()
+
     def test_no_image_files(self, FileHandler_getImages, FileHandler_deleteLastImage):
-        type(self.fileHandler).imageFilePaths = PropertyMock(return_value=[])
+        self.fileHandler._imageQueue.__len__.side_effect = [0, 2, 2]
+        self.fileHandler._imagePrefetcher.waitForImages.return_value = True
 
         self.fileHandler.cycleBackgroundImage()
 
-        FileHandler_getImages.assert_called_once_with()
+        self.fileHandler._imagePrefetcher.waitForImages.assert_called_once_with(
+            2, timeout=FileHandler.imageWaitTimeout
+        )
         FileHandler_deleteLastImage.assert_called_once_with()
 
 
-@patch(f"{MODULE_PATH}Process")
+class Test_FileHandler_refillImages(TestCase):
+
+    @patch.object(FileHandler, "getImages")
+    def test_locked(self, FileHandler_getImages):
+        fileHandler = FileHandler(MagicMock())
+        fileHandler._downloadingImages.acquire()
+
+        with self.assertRaises(AlreadyDownloadingImagesException):
+            fileHandler.refillImages()
+
+        FileHandler_getImages.assert_not_called()
+
+
 @patch.object(FileHandler, "getFilePath")
 class Test_FileHandler_getImages(TestCase):
 
-    def test_ok(self, FileHandler_getFilePath, Process):
+    def test_ok(self, FileHandler_getFilePath):
         imgurController = MagicMock()
-        imgurController.requestNewImages.return_value = [
+        imgurImages = [
             ImgurImage("ImageTitle1", "https://imgur/123", "image/png"),
             ImgurImage("ImageTitle2", "https://imgur/234", "image/jpeg")
         ]
+        imgurController.requestNewImages.return_value = imgurImages
         FileHandler_getFilePath.side_effect = lambda title: f"/foo/bar/{title}"
         fileHandler = FileHandler(imgurController)
+        fileHandler._imageQueue = MagicMock()
+        fileHandler._imageDownloader = MagicMock()
+        fileHandler._imageDownloader.downloadImages.return_value = ["/foo/bar/ImageTitle2"]
+        fileHandler._imagePreviews = MagicMock()
 
         fileHandler.getImages()
 
-        Process.assert_has_calls(
+        fileHandler._imageDownloader.downloadImages.assert_called_once_with(
             [
-                call(target=fileHandler._downloadImage, args=(imgurController.requestNewImages.return_value[0],)),
-                call().start(),
-                call(target=fileHandler._downloadImage, args=(imgurController.requestNewImages.return_value[1],)),
-                call().start(),
-                call().join(),
-                call().join(),
+                (imgurImages[0], "/foo/bar/ImageTitle1"),
+                (imgurImages[1], "/foo/bar/ImageTitle2")
             ]
         )
+        fileHandler._imageQueue.add.assert_called_once_with("/foo/bar/ImageTitle2")
+        fileHandler._imagePreviews.warm.assert_called_once_with("/foo/bar/ImageTitle2", fileHandler._imageHash)
 
 
-@patch(f"{MODULE_PATH}FileHandler.directoryPath", return_value="/foo/bar/directory")
-@patch(f"{MODULE_PATH}requests")
-@patch(f"{MODULE_PATH}shutil")
-@patch(f"{MODULE_PATH}open")
-class Test_FileHandler__downloadImage(TestCase):
+class Test_FileHandler_queuedImagePath(TestCase):
 
-    def test_ok(self, open, shutil, requests, FileHandler_directoryPath):
-        fileHandler = FileHandler(MagicMock)
-        open.return_value.__enter__.return_value = "File"
-        requests.get.return_value = MagicMock(raw="Image Data")
+    def setUp(self):
+        self.fileHandler = FileHandler(MagicMock())
+        self.fileHandler._imageQueue = ImageQueue("/foo")
+        self.fileHandler._imageQueue._loaded = True
+        self.fileHandler._imageQueue.add("/foo/bar")
+        self.fileHandler._imageMetadataCache = MagicMock()
 
-        fileHandler._downloadImage(
-            MagicMock(imageURL="imageURL", imageTitle="imageTitle")
-        )
+    def test_ok(self):
+        self.fileHandler._imageMetadataCache.findPath.return_value = "/foo/bar"
+
+        self.assertEqual("/foo/bar", self.fileHandler.queuedImagePath("hash"))
+        self.fileHandler._imageMetadataCache.findPath.assert_called_once_with("hash")
 
-        requests.get.assert_called_once_with("imageURL", stream=True)
-        shutil.copyfileobj.assert_called_once_with("Image Data", "File")
+    def test_not_queued(self):
+        self.fileHandler._imageMetadataCache.findPath.return_value = "/foo/baz"
+
+        self.assertIsNone(self.fileHandler.queuedImagePath("hash"))
 
 
 @patch(f"{MODULE_PATH}os")
@@ -93,24 +163,28 @@ class Test_FileHandler__deleteLastImage(TestCase):
 
     def setUp(self):
         self.fileHandler = FileHandler(MagicMock())
+        self.fileHandler._imageQueue = ImageQueue("/foo")
+        self.fileHandler._imageQueue._loaded = True
+        for path in ["/foo/bar", "/foo/baz"]:
+            self.fileHandler._imageQueue.add(path)
 
     def test_ok(self, os):
-        type(self.fileHandler).imageFilePaths = PropertyMock(return_value=["/foo/bar", "/bar/foo"])
-        type(self.fileHandler).currentBackgroundImage = PropertyMock(return_value="/foo/bar")
-
         self.fileHandler._deleteLastImage()
 
         os.remove.assert_called_once_with("/foo/bar")
+        self.assertEqual(["/foo/baz"], self.fileHandler.imageFilePaths)
 
     def test_no_current_image(self, os):
-        type(self.fileHandler).imageFilePaths = PropertyMock(return_value=[])
+        self.fileHandler._imageQueue = ImageQueue("/foo")
+        self.fileHandler._imageQueue._loaded = True
 
         # assert doesn't raise an exception
         self.fileHandler._deleteLastImage()
 
+        os.remove.assert_not_called()
+
     @patch(f"{MODULE_PATH}print")
     def test_exception(self, print, os):
-        type(self.fileHandler).imageFilePaths = PropertyMock(return_value=["/foo/bar", "/bar/foo"])
         os.remove.side_effect = FileNotFoundError("File Not Found")
 
         self.fileHandler._deleteLastImage()
@@ -121,11 +195,10 @@ class Test_FileHandler__deleteLastImage(TestCase):
                 call("File Not Found")
             ]
         )
+        self.assertEqual(["/foo/baz"], self.fileHandler.imageFilePaths)
 
-    def test_image_not_downloaded_by_imgur(self, os):
-        type(self.fileHandler).imageFilePaths = PropertyMock(return_value=["/foo/bar", "/bar/foo"])
-        type(self.fileHandler).currentBackgroundImage = PropertyMock(return_value=["/foo/baz"])
-
+    @patch.object(FileHandler, "currentBackgroundImage", new_callable=PropertyMock, return_value="/foo/qux")
+    def test_image_not_downloaded_by_imgur(self, currentBackgroundImage, os):
         self.fileHandler._deleteLastImage()
 
         os.remove.assert_not_called()
@@ -134,19 +207,42 @@ class Test_FileHandler__deleteLastImage(TestCase):
 @patch(MODULE_PATH + "queries")
 class Test_checkAuthorisationToken(TestCase):
 
-    def test_ok(self, queries):
-        request = MagicMock(
+    def setUp(self):
+        tokenCache.clear()
+        self.request = MagicMock(
             headers={
                 "Authorization": "bearer token"
             }
         )
-        queries.validToken.return_value = True
 
-        valid = checkAuthorisationToken(request)
+    def tearDown(self):
+        tokenCache.clear()
+
+    def test_ok(self, queries):
+        queries.tokenExpiryDate.return_value = datetime.now() + timedelta(days=1)
+
+        valid = checkAuthorisationToken(self.request)
+
+        queries.tokenExpiryDate.assert_called_once_with("token")
+        self.assertTrue(valid)
+
+    def test_cached(self, queries):
+        queries.tokenExpiryDate.return_value = datetime.now() + timedelta(days=1)
+
+        checkAuthorisationToken(self.request)
+        valid = checkAuthorisationToken(self.request)
 
-        queries.validToken.assert_called_once_with("token")
+        queries.tokenExpiryDate.assert_called_once_with("token")
         self.assertTrue(valid)
 
+    def test_expired(self, queries):
+        queries.tokenExpiryDate.return_value = datetime.now() - timedelta(days=1)
+
+        valid = checkAuthorisationToken(self.request)
+
+        self.assertFalse(valid)
+        self.assertEqual(0, len(tokenCache))
+
     def test_no_authorization_header(self, queries):
         request = MagicMock(
             headers={}
@@ -154,7 +250,7 @@ class Test_checkAuthorisationToken(TestCase):
 
         valid = checkAuthorisationToken(request)
 
-        queries.validToken.assert_not_called()
+        queries.tokenExpiryDate.assert_not_called()
         self.assertFalse(valid)
 
     def test_no_bearer_in_authorization_header(self, queries):
@@ -166,18 +262,487 @@ class Test_checkAuthorisationToken(TestCase):
 
         valid = checkAuthorisationToken(request)
 
-        queries.validToken.assert_not_called()
+        queries.tokenExpiryDate.assert_not_called()
         self.assertFalse(valid)
 
+    def test_signed_token(self, queries):
+        tokenSigner = MagicMock()
+        tokenSigner.isSignedToken.return_value = True
+        tokenSigner.validToken.return_value = True
+
+        valid = checkAuthorisationToken(self.request, tokenSigner)
+
+        tokenSigner.validToken.assert_called_once_with("token")
+        queries.tokenExpiryDate.assert_not_called()
+        self.assertTrue(valid)
+
     def test_token_not_in_database(self, queries):
-        request = MagicMock(
-            headers={
-                "Authorization": "bearer token"
+        queries.tokenExpiryDate.return_value = None
+
+        valid = checkAuthorisationToken(self.request)
+
+        queries.tokenExpiryDate.assert_called_once_with("token")
+        self.assertFalse(valid)
+
+
+@patch(MODULE_PATH + "ExpiredTokenSweeper")
+class Test_WebFileHandler_startBackgroundTasks(TestCase):
+
+    def test_file_handler_tasks_started(self, ExpiredTokenSweeper):
+        fileHandler = MagicMock()
+        webFileHandler = WebFileHandler(fileHandler, "clientId", "clientSecret")
+
+        webFileHandler.startBackgroundTasks()
+
+        fileHandler.startBackgroundTasks.assert_called_once_with()
+
+    def test_token_sweeper_started(self, ExpiredTokenSweeper):
+        webFileHandler = WebFileHandler(MagicMock(), "clientId", "clientSecret")
+
+        webFileHandler.startBackgroundTasks()
+
+        ExpiredTokenSweeper.return_value.start.assert_called_once_with()
+
+    @patch(MODULE_PATH + "TokenSigner")
+    def test_token_signer_started(self, TokenSigner, ExpiredTokenSweeper):
+        webFileHandler = WebFileHandler(MagicMock(), "clientId", "clientSecret", signedTokens=True)
+
+        webFileHandler.startBackgroundTasks()
+
+        TokenSigner.return_value.start.assert_called_once_with()
+
+
+@patch(MODULE_PATH + "checkAuthorisationToken", return_value=True)
+class Test_HTTPFileHandler_schedule(TestCase):
+
+    def setUp(self):
+        self.fileHandler = MagicMock()
+        self.fileHandler.rotationScheduler = RotationScheduler(self.fileHandler)
+        self.client = HTTPFileHandler(self.fileHandler, "clientId", "clientSecret").test_client()
+
+    def test_set_schedule(self, checkAuthorisationToken):
+        response = self.client.put("/schedule", json={"cron": "0 * * * *", "jitter": 10})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({"interval": None, "cron": "0 * * * *", "jitter": 10}, response.json["schedule"])
+        self.assertEqual("0 * * * *", self.fileHandler.rotationScheduler.schedule.cron)
+
+    def test_invalid_schedule(self, checkAuthorisationToken):
+        response = self.client.put("/schedule", json={"cron": "not a cron"})
+
+        self.assertEqual(400, response.status_code)
+        self.assertIsNone(self.fileHandler.rotationScheduler.schedule)
+
+    def test_cron_never_matches(self, checkAuthorisationToken):
+        response = self.client.put("/schedule", json={"cron": "0 0 30 2 *"})
+
+        self.assertEqual(400, response.status_code)
+        self.assertIsNone(self.fileHandler.rotationScheduler.schedule)
+
+    def test_cron_not_string(self, checkAuthorisationToken):
+        response = self.client.put("/schedule", json={"cron": 5})
+
+        self.assertEqual(400, response.status_code)
+        self.assertIsNone(self.fileHandler.rotationScheduler.schedule)
+
+    def test_delete_schedule(self, checkAuthorisationToken):
+        self.fileHandler.rotationScheduler.setSchedule(RotationSchedule(interval=60))
+
+        response = self.client.delete("/schedule")
+
+        self.assertEqual({"schedule": None, "nextRun": None}, response.json)
+        self.assertIsNone(self.fileHandler.rotationScheduler.schedule)
+
+    def test_unauthorised(self, checkAuthorisationToken):
+        checkAuthorisationToken.return_value = False
+
+        response = self.client.get("/schedule")
+
+        self.assertEqual(401, response.status_code)
+
+
+@patch(MODULE_PATH + "checkAuthorisationToken", return_value=True)
+class Test_HTTPFileHandler_imgurCredits(TestCase):
+
+    def setUp(self):
+        self.fileHandler = MagicMock()
+        self.client = HTTPFileHandler(self.fileHandler, "clientId", "clientSecret").test_client()
+
+    def test_ok(self, checkAuthorisationToken):
+        self.fileHandler.creditBudget.toJson.return_value = {"galleryCallsPerHour": 20}
+
+        response = self.client.get("/imgur-credits")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({"galleryCallsPerHour": 20}, response.json)
+
+    def test_not_tracked(self, checkAuthorisationToken):
+        self.fileHandler.creditBudget = None
+
+        response = self.client.get("/imgur-credits")
+
+        self.assertEqual(404, response.status_code)
+
+
+@patch(MODULE_PATH + "checkAuthorisationToken", return_value=True)
+class Test_HTTPFileHandler_changeBackground(TestCase):
+
+    def setUp(self):
+        self.fileHandler = MagicMock()
+        self.httpFileHandler = HTTPFileHandler(self.fileHandler, "clientId", "clientSecret")
+        self.httpFileHandler._changeJobManager = MagicMock()
+        self.client = self.httpFileHandler.test_client()
+
+    def test_ok(self, checkAuthorisationToken):
+        response = self.client.post("/change-background")
+
+        self.assertEqual(200, response.status_code)
+        self.fileHandler.cycleBackgroundImage.assert_called_once_with()
+
+    def test_coalesced(self, checkAuthorisationToken):
+        httpFileHandler = HTTPFileHandler(self.fileHandler, "clientId", "clientSecret", coalesceWindow=0.1)
+
+        response = httpFileHandler.test_client().post("/change-background")
+
+        self.assertEqual(200, response.status_code)
+        self.fileHandler.cycleBackgroundImage.assert_called_once_with(count=1)
+        # scheduled changes share the same batches
+        self.fileHandler.rotationScheduler.setBackgroundCycler.assert_called_once_with(
+            httpFileHandler._backgroundCycler
+        )
+
+    def test_already_downloading(self, checkAuthorisationToken):
+        self.fileHandler.cycleBackgroundImage.side_effect = AlreadyDownloadingImagesException
+
+        response = self.client.post("/change-background")
+
+        self.assertEqual(429, response.status_code)
+
+    def test_async(self, checkAuthorisationToken):
+        job = ChangeJob(jobId="jobId")
+        self.httpFileHandler._changeJobManager.submit.return_value = job
+
+        response = self.client.post("/change-background?async=true")
+
+        self.assertEqual(202, response.status_code)
+        self.assertEqual("/change-background/jobId", response.headers["Location"])
+        self.assertEqual("queued", response.json["status"])
+        self.fileHandler.cycleBackgroundImage.assert_not_called()
+
+    def test_refresh_background(self, checkAuthorisationToken):
+        response = self.client.post("/refresh-background")
+
+        self.assertEqual(200, response.status_code)
+        self.fileHandler.refreshCurrentBackground.assert_called_once_with()
+
+    def test_job_status(self, checkAuthorisationToken):
+        self.httpFileHandler._changeJobManager.getJob.return_value = ChangeJob(jobId="jobId", status="running")
+
+        response = self.client.get("/change-background/jobId")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("running", response.json["status"])
+        self.httpFileHandler._changeJobManager.getJob.assert_called_once_with("jobId")
+
+    def test_unknown_job(self, checkAuthorisationToken):
+        self.httpFileHandler._changeJobManager.getJob.return_value = None
+
+        response = self.client.get("/change-background/jobId")
+
+        self.assertEqual(404, response.status_code)
+
+
+@patch(MODULE_PATH + "checkAuthorisationToken", return_value=True)
+class Test_HTTPFileHandler_currentImage(TestCase):
+
+    def setUp(self):
+        imageDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(imageDirectory.cleanup)
+        self.imagePath = os.path.join(imageDirectory.name, "image")
+        self.imageData = b"GIF89a\x80\x02\xe0\x01ImageData"
+        with open(self.imagePath, "wb") as imageFile:
+            imageFile.write(self.imageData)
+
+        self.fileHandler = MagicMock()
+        self.fileHandler.currentImagePath = self.imagePath
+        self.fileHandler.imageMetadata.side_effect = ImageMetadataCache().getMetadata
+        self.client = HTTPFileHandler(self.fileHandler, "clientId", "clientSecret").test_client()
+
+    def test_ok(self, checkAuthorisationToken):
+        response = self.client.get("/current-image")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.imageData, response.data)
+        self.assertEqual("image/gif", response.mimetype)
+        self.assertEqual("bytes", response.headers["Accept-Ranges"])
+        self.assertIsNotNone(response.headers["ETag"])
+        self.assertNotIn("Last-Modified", response.headers)
+
+    def test_not_modified(self, checkAuthorisationToken):
+        etag = self.client.get("/current-image").headers["ETag"]
+
+        response = self.client.get("/current-image", headers={"If-None-Match": etag})
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b"", response.data)
+
+    def test_modified_since_ignored(self, checkAuthorisationToken):
+        # a queued image downloaded before the client's copy can become the current image later
+        response = self.client.get(
+            "/current-image", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.imageData, response.data)
+
+    def test_range(self, checkAuthorisationToken):
+        response = self.client.get("/current-image", headers={"Range": "bytes=10-14"})
+
+        self.assertEqual(206, response.status_code)
+        self.assertEqual(b"Image", response.data)
+        self.assertEqual("bytes 10-14/19", response.headers["Content-Range"])
+        self.assertEqual("5", response.headers["Content-Length"])
+        self.assertEqual("image/gif", response.mimetype)
+
+    @patch(MODULE_PATH + "fileRangeBody")
+    def test_range_file_wrapper(self, fileRangeBody, checkAuthorisationToken):
+        fileRangeBody.return_value = [b"Image"]
+
+        self.client.get(
+            "/current-image", headers={"Range": "bytes=10-"}, environ_base={"wsgi.file_wrapper": "fileWrapper"}
+        )
+
+        environ, imagePath, start, stop = fileRangeBody.call_args.args
+        self.assertEqual(("fileWrapper", self.imagePath, 10, 19), (environ["wsgi.file_wrapper"], imagePath, start, stop))
+
+    def test_range_if_range_changed(self, checkAuthorisationToken):
+        response = self.client.get("/current-image", headers={"Range": "bytes=10-14", "If-Range": '"oldHash"'})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.imageData, response.data)
+
+    def test_range_if_range_matches(self, checkAuthorisationToken):
+        etag = self.client.get("/current-image").headers["ETag"]
+
+        response = self.client.get("/current-image", headers={"Range": "bytes=10-14", "If-Range": etag})
+
+        self.assertEqual(206, response.status_code)
+        self.assertEqual(b"Image", response.data)
+        self.assertNotIn("Last-Modified", response.headers)
+
+    def test_range_if_range_weak(self, checkAuthorisationToken):
+        etag = self.client.get("/current-image").headers["ETag"]
+
+        response = self.client.get("/current-image", headers={"Range": "bytes=10-14", "If-Range": f"W/{etag}"})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.imageData, response.data)
+
+    def test_range_if_range_date(self, checkAuthorisationToken):
+        response = self.client.get(
+            "/current-image", headers={"Range": "bytes=10-14", "If-Range": "Fri, 01 Jan 2100 00:00:00 GMT"}
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.imageData, response.data)
+
+    def test_multiple_ranges(self, checkAuthorisationToken):
+        response = self.client.get("/current-image", headers={"Range": "bytes=0-1,10-14"})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.imageData, response.data)
+
+    def test_range_not_satisfiable(self, checkAuthorisationToken):
+        response = self.client.get("/current-image", headers={"Range": "bytes=100-"})
+
+        self.assertEqual(416, response.status_code)
+
+    def test_no_current_image(self, checkAuthorisationToken):
+        self.fileHandler.imageMetadata.side_effect = None
+        self.fileHandler.imageMetadata.return_value = None
+
+        response = self.client.get("/current-image")
+
+        self.assertEqual(404, response.status_code)
+
+    def test_hash(self, checkAuthorisationToken):
+        etag = self.client.get("/current-image").headers["ETag"]
+
+        response = self.client.get("/current-image-hash")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(etag.strip('"'), response.json["hash"])
+
+
+@patch(MODULE_PATH + "checkAuthorisationToken", return_value=True)
+class Test_HTTPFileHandler_imagePreview(TestCase):
+
+    def setUp(self):
+        imageDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(imageDirectory.cleanup)
+        self.previewPath = os.path.join(imageDirectory.name, "hash-w320.jpg")
+        with open(self.previewPath, "wb") as previewFile:
+            previewFile.write(b"PreviewData")
+
+        self.fileHandler = MagicMock()
+        self.fileHandler.imageFilePaths = ["/foo/bar", "/foo/baz"]
+        self.fileHandler.imageMetadata.return_value.hash = "hash"
+        self.fileHandler.imagePreviews.getPreview.return_value = self.previewPath
+        self.client = HTTPFileHandler(self.fileHandler, "clientId", "clientSecret").test_client()
+
+    def test_ok(self, checkAuthorisationToken):
+        response = self.client.get("/image-preview?index=1&width=320")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(b"PreviewData", response.data)
+        self.assertEqual("image/jpeg", response.mimetype)
+        self.fileHandler.imagePreviews.getPreview.assert_called_once_with("/foo/baz", "hash", 320)
+
+    def test_index_out_of_range(self, checkAuthorisationToken):
+        self.fileHandler.imageMetadata.return_value = None
+
+        response = self.client.get("/image-preview?index=2")
+
+        self.assertEqual(404, response.status_code)
+        self.fileHandler.imageMetadata.assert_called_once_with(None)
+
+    def test_invalid_width(self, checkAuthorisationToken):
+        self.fileHandler.imagePreviews.getPreview.side_effect = ValueError("Invalid width")
+
+        response = self.client.get("/image-preview?width=0")
+
+        self.assertEqual(400, response.status_code)
+
+    def test_by_hash(self, checkAuthorisationToken):
+        self.fileHandler.queuedImagePath.return_value = "/foo/baz"
+        self.fileHandler.imageMetadata.side_effect = lambda imagePath: MagicMock(hash=f"{imagePath}Hash")
+
+        response = self.client.get("/image-preview?hash=/foo/bazHash")
+
+        self.assertEqual(200, response.status_code)
+        self.fileHandler.queuedImagePath.assert_called_once_with("/foo/bazHash")
+        self.fileHandler.imagePreviews.getPreview.assert_called_once_with("/foo/baz", "/foo/bazHash", None)
+
+    def test_hash_not_queued(self, checkAuthorisationToken):
+        self.fileHandler.queuedImagePath.return_value = None
+        self.fileHandler.imageMetadata.return_value = None
+
+        response = self.client.get("/image-preview?hash=otherHash")
+
+        self.assertEqual(404, response.status_code)
+
+    def test_placeholder(self, checkAuthorisationToken):
+        self.fileHandler.imagePreviews.getPlaceholder.return_value = "data:image/jpeg;base64,"
+
+        response = self.client.get("/image-preview/placeholder")
+
+        self.assertEqual({"hash": "hash", "placeholder": "data:image/jpeg;base64,"}, response.json)
+        self.fileHandler.imagePreviews.getPlaceholder.assert_called_once_with("/foo/bar", "hash")
+
+
+class Test_WSFileHandler_imageChangeUpdate(TestCase):
+
+    @patch.object(WSFileHandler, "emit")
+    def test_ok(self, emit):
+        wsFileHandler = WSFileHandler(
+            MagicMock(), HTTPFileHandler(MagicMock(), "clientId", "clientSecret")
+        )
+
+        wsFileHandler.imageChangeUpdate(image={"hash": "hash", "title": "title"}, jobIds=["jobId"])
+
+        emit.assert_called_once_with(
+            "image-change-update",
+            {
+                "image": {
+                    "hash": "hash", "title": "title", "previewUrl": "/image-preview?hash=hash&width=320"
+                },
+                "jobIds": ["jobId"]
             }
         )
-        queries.validToken.return_value = False
 
-        valid = checkAuthorisationToken(request)
+    @patch.object(WSFileHandler, "emit")
+    def test_no_image(self, emit):
+        wsFileHandler = WSFileHandler(
+            MagicMock(), HTTPFileHandler(MagicMock(), "clientId", "clientSecret")
+        )
 
-        queries.validToken.assert_called_once_with("token")
-        self.assertFalse(valid)
+        wsFileHandler.imageChangeUpdate(image=None)
+
+        emit.assert_called_once_with("image-change-update", {"image": None})
+
+
+@patch.object(FileHandler, "getImages")
+class Test_GSettingsHTTPBackgroundChanger_cycleBackgroundImage(TestCase):
+
+    @patch(MODULE_PATH + "os")
+    def test_ok(self, os, FileHandler_getImages):
+        backgroundSettings = MemoryBackgroundSettings("/foo/bar")
+        backgroundChanger = GSettingsHTTPBackgroundChanger(
+            MagicMock(), backgroundSettingsFactory=lambda: backgroundSettings
+        )
+        backgroundChanger._imageQueue = ImageQueue("/foo")
+        backgroundChanger._imageQueue._loaded = True
+        for path in ["/foo/bar", "/foo/baz"]:
+            backgroundChanger._imageQueue.add(path)
+        backgroundChanger._imagePrefetcher = MagicMock()
+        backgroundChanger.imageDetails = MagicMock()
+
+        backgroundChanger.cycleBackgroundImage()
+
+        os.remove.assert_called_once_with("/foo/bar")
+        self.assertEqual(("/foo/baz", "scaled"), (backgroundSettings.pictureUri, backgroundSettings.pictureOptions))
+
+        with patch.object(GSettingsHTTPBackgroundChanger, "_getCurrentImage") as _getCurrentImage:
+            self.assertEqual("/foo/baz", backgroundChanger.currentBackgroundImage)
+        _getCurrentImage.assert_not_called()
+
+
+@patch.object(FileHandler, "startBackgroundTasks")
+class Test_GSettingsHTTPBackgroundChanger_startBackgroundTasks(TestCase):
+
+    def test_settings_created_in_worker(self, FileHandler_startBackgroundTasks):
+        backgroundSettings = MagicMock(pictureUri="/foo/bar")
+        backgroundSettingsFactory = MagicMock(return_value=backgroundSettings)
+        backgroundChanger = GSettingsHTTPBackgroundChanger(
+            MagicMock(), backgroundSettingsFactory=backgroundSettingsFactory
+        )
+        backgroundSettingsFactory.assert_not_called()
+
+        backgroundChanger.startBackgroundTasks()
+
+        backgroundSettingsFactory.assert_called_once_with()
+        backgroundSettings.addChangeListener.assert_called_once_with(backgroundChanger._backgroundChanged)
+        backgroundSettings.start.assert_called_once_with()
+        self.assertEqual("/foo/bar", backgroundChanger.currentBackgroundImage)
+
+
+class Test_GSettingsHTTPBackgroundChanger_currentBackgroundImage(TestCase):
+
+    def setUp(self):
+        self.backgroundSettings = MemoryBackgroundSettings("/foo/bar")
+        self.backgroundChanger = GSettingsHTTPBackgroundChanger(
+            MagicMock(), backgroundSettingsFactory=lambda: self.backgroundSettings
+        )
+
+    @patch.object(GSettingsHTTPBackgroundChanger, "_getCurrentImage", return_value="/foo/bar")
+    def test_read_once(self, _getCurrentImage):
+        self.backgroundChanger.currentBackgroundImage
+        currentBackgroundImage = self.backgroundChanger.currentBackgroundImage
+
+        _getCurrentImage.assert_called_once_with()
+        self.assertEqual("/foo/bar", currentBackgroundImage)
+
+    def test_changed_outside_server(self):
+        self.backgroundChanger.currentBackgroundImage
+
+        self.backgroundSettings.changeBackground("/foo/baz")
+
+        self.assertEqual("/foo/baz", self.backgroundChanger.currentBackgroundImage)
+
+    def test_refresh(self):
+        self.backgroundChanger.currentBackgroundImage
+        self.backgroundSettings.setBackground("/foo/baz", "zoom")
+
+        self.backgroundChanger.refreshCurrentBackground()
+
+        self.assertEqual("/foo/baz", self.backgroundChanger.currentBackgroundImage)
@@ -1,8 +1,14 @@
 
-from werkzeug.exceptions import NotFound
+import json
+import os
+import stat
+import tempfile
+from datetime import datetime, timedelta
 from unittest import TestCase
 from unittest.mock import patch, call, MagicMock
 
+from werkzeug.exceptions import NotFound
+
 from randomBackgroundChanger.fileHandler.fileHandlerClient import FileHandlerClient
 
 MODULE_PATH = "randomBackgroundChanger.fileHandler.fileHandlerClient."
@@ -11,89 +17,139 @@ MODULE_PATH = "randomBackgroundChanger.fileHandler.fileHandlerClient."
 class AuthTestCommon(TestCase):
 
     def setUp(self):
-        self.jsonMock = MagicMock()
-        self.jsonMock.json.return_value = {"token": "token"}
+        requestsPatcher = patch(MODULE_PATH + "requests")
+        self.requests = requestsPatcher.start()
+        self.addCleanup(requestsPatcher.stop)
+        self.session = self.requests.Session.return_value
+
+        tokenDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(tokenDirectory.cleanup)
+        self.tokenFile = os.path.join(tokenDirectory.name, "cache", "token.json")
+
+        self.tokenResponse = MagicMock()
+        self.tokenResponse.json.return_value = {"token": "token"}
+        self.okResponse = MagicMock(status_code=200)
         self.fileHandlerClient = FileHandlerClient(
-            3000, "clientId", "clientSecret"
+            3000, "clientId", "clientSecret", tokenFile=self.tokenFile
         )
 
     @staticmethod
     def postJson():
         return {
             "clientId": "clientId",
-            "clientSecret": "clientSecret"
+            "clientSecret": "clientSecret",
+            "validDays": 30
         }
 
     @staticmethod
-    def deleteJson():
-        deleteJson = AuthTestCommon.postJson()
-        deleteJson.update(
-            {"token": "token"}
-        )
-        return deleteJson
+    def tokenCall():
+        return call("http://localhost:3000/token", json=AuthTestCommon.postJson())
+
+    def writeTokenFile(self, token, expiryDate):
+        os.makedirs(os.path.dirname(self.tokenFile))
+        with open(self.tokenFile, "w") as tokenFile:
+            json.dump({"token": token, "expiryDate": expiryDate.isoformat()}, tokenFile)
 
 
-@patch(MODULE_PATH + "requests")
 class Test_FileHandlerClient_nextBackgroundImage(AuthTestCommon):
 
-    def test_ok(self, requests):
-        requests.post.return_value = self.jsonMock
+    def test_ok(self):
+        self.session.post.side_effect = [self.tokenResponse, self.okResponse]
 
         self.fileHandlerClient.nextBackgroundImage()
 
-        self.assertEqual(
+        self.session.post.assert_has_calls(
             [
-                call.post("http://localhost:3000/token", json=AuthTestCommon.postJson()),
-                call.post().json(),
-                call.post(
+                AuthTestCommon.tokenCall(),
+                call(
                     "http://localhost:3000/change-background",
                     json={},
                     headers={"Authorization": f"Bearer: token"}
-                ),
-                call.post().raise_for_status(),
-                call.delete("http://localhost:3000/token", json=AuthTestCommon.deleteJson())
-            ],
-            requests.mock_calls
+                )
+            ]
         )
+        self.session.delete.assert_not_called()
 
 
-@patch(MODULE_PATH + "requests")
 class Test_FileHandlerClient_addPin(AuthTestCommon):
 
-    def test_ok(self, requests):
-        requests.post.return_value = self.jsonMock
+    def test_ok(self):
+        self.session.post.side_effect = [self.tokenResponse, self.okResponse]
 
         self.fileHandlerClient.addPin("abc123")
 
-        self.assertEqual(
+        self.session.post.assert_has_calls(
             [
-                call.post("http://localhost:3000/token", json=AuthTestCommon.postJson()),
-                call.post().json(),
-                call.post(
+                AuthTestCommon.tokenCall(),
+                call(
                     "http://localhost:3000/imgur-pin",
                     json={"pin": "abc123"},
                     headers={"Authorization": f"Bearer: token"}
-                ),
-                call.post().raise_for_status(),
-                call.delete("http://localhost:3000/token", json=AuthTestCommon.deleteJson())
-            ],
-            requests.mock_calls
+                )
+            ]
         )
 
 
-@patch(MODULE_PATH + "requests")
 class Test_FileHandlerClient__sendRequest(AuthTestCommon):
 
-    def test_ensure_token_deleted(self, requests):
-        requests.post.side_effect = [self.jsonMock, NotFound]
+    def test_token_saved(self):
+        self.session.post.side_effect = [self.tokenResponse, self.okResponse]
 
-        with self.assertRaises(NotFound):
-            self.fileHandlerClient._sendRequest("url")
+        self.fileHandlerClient._sendRequest("url")
+
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.tokenFile).st_mode))
+        with open(self.tokenFile) as tokenFile:
+            self.assertEqual("token", json.load(tokenFile)["token"])
+
+    def test_cached_token_reused(self):
+        self.writeTokenFile("cachedToken", datetime.now() + timedelta(days=10))
+        self.session.post.return_value = self.okResponse
+
+        self.fileHandlerClient._sendRequest("url")
+        self.fileHandlerClient._sendRequest("url")
+
+        self.assertEqual(
+            [
+                call("url", json={}, headers={"Authorization": "Bearer: cachedToken"}),
+                call("url", json={}, headers={"Authorization": "Bearer: cachedToken"})
+            ],
+            self.session.post.call_args_list
+        )
+
+    def test_cached_token_close_to_expiry(self):
+        self.writeTokenFile("cachedToken", datetime.now() + timedelta(hours=1))
+        self.session.post.side_effect = [self.tokenResponse, self.okResponse]
 
-        requests.assert_has_calls(
+        self.fileHandlerClient._sendRequest("url")
+
+        self.session.post.assert_has_calls(
             [
-                call.post("http://localhost:3000/token", json=AuthTestCommon.postJson()),
-                call.post('url', json={}, headers={'Authorization': 'Bearer: token'}),
-                call.delete("http://localhost:3000/token", json=AuthTestCommon.deleteJson())
+                AuthTestCommon.tokenCall(),
+                call("url", json={}, headers={"Authorization": "Bearer: token"})
             ]
         )
+
+    def test_unauthorised_reauthenticates(self):
+        self.writeTokenFile("revokedToken", datetime.now() + timedelta(days=10))
+        self.session.post.side_effect = [
+            MagicMock(status_code=401), self.tokenResponse, self.okResponse
+        ]
+
+        self.fileHandlerClient._sendRequest("url")
+
+        self.assertEqual(
+            [
+                call("url", json={}, headers={"Authorization": "Bearer: revokedToken"}),
+                AuthTestCommon.tokenCall(),
+                call("url", json={}, headers={"Authorization": "Bearer: token"})
+            ],
+            self.session.post.call_args_list
+        )
+
+    def test_request_failed(self):
+        failedResponse = MagicMock(status_code=404)
+        failedResponse.raise_for_status.side_effect = NotFound
+        self.session.post.side_effect = [self.tokenResponse, failedResponse]
+
+        with self.assertRaises(NotFound):
+            self.fileHandlerClient._sendRequest("url")
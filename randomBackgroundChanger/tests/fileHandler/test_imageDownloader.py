@@ -0,0 +1,195 @@
+
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, call, patch
+
+from randomBackgroundChanger.fileHandler.imageDownloader import (
+    DownloadLimitExceeded, DownloadLimits, ImageDownloader
+)
+from randomBackgroundChanger.fileHandler.imageProbe import ImageRejected, ImageRules
+from randomBackgroundChanger.imgur.imgur import ImgurImage
+
+MODULE_PATH = "randomBackgroundChanger.fileHandler.imageDownloader."
+
+
+class Test_ImageDownloader___init__(TestCase):
+
+    def test_no_workers(self):
+        with self.assertRaises(ValueError):
+            ImageDownloader("/foo/.partial", concurrency=0)
+
+
+@patch(f"{MODULE_PATH}os.makedirs")
+@patch.object(ImageDownloader, "_downloadImage")
+class Test_ImageDownloader_downloadImages(TestCase):
+
+    def setUp(self):
+        self.imageDownloader = ImageDownloader("/foo/.partial", concurrency=2)
+        self.imgurImages = [
+            ImgurImage("ImageTitle1", "https://imgur/123", "image/png"),
+            ImgurImage("ImageTitle2", "https://imgur/234", "image/jpeg")
+        ]
+
+    def test_ok(self, ImageDownloader_downloadImage, makedirs):
+        ImageDownloader_downloadImage.side_effect = lambda imgurImage, filePath, deadline: filePath
+
+        filePaths = self.imageDownloader.downloadImages(
+            [(self.imgurImages[0], "/foo/ImageTitle1"), (self.imgurImages[1], "/foo/ImageTitle2")]
+        )
+
+        self.assertEqual(["/foo/ImageTitle1", "/foo/ImageTitle2"], sorted(filePaths))
+        makedirs.assert_called_once_with("/foo/.partial", exist_ok=True)
+
+    @patch(f"{MODULE_PATH}print")
+    def test_failed_download(self, print, ImageDownloader_downloadImage, makedirs):
+        def downloadImage(imgurImage, filePath, deadline):
+            if imgurImage is self.imgurImages[0]:
+                raise Exception("Boom!")
+            return filePath
+        ImageDownloader_downloadImage.side_effect = downloadImage
+
+        filePaths = self.imageDownloader.downloadImages(
+            [(self.imgurImages[0], "/foo/ImageTitle1"), (self.imgurImages[1], "/foo/ImageTitle2")]
+        )
+
+        self.assertEqual(["/foo/ImageTitle2"], list(filePaths))
+        print.assert_has_calls(
+            [
+                call("Could not download https://imgur/123"),
+                call("Boom!")
+            ]
+        )
+
+
+@patch(f"{MODULE_PATH}os")
+@patch(f"{MODULE_PATH}tempfile")
+@patch(f"{MODULE_PATH}open")
+class Test_ImageDownloader__downloadImage(TestCase):
+
+    def setUp(self):
+        self.imageDownloader = ImageDownloader(
+            "/foo/.partial", limits=DownloadLimits(connectTimeout=1, readTimeout=2, maxBytes=10)
+        )
+        self.imageDownloader._session = MagicMock()
+        self.response = self.imageDownloader._session.get.return_value
+        self.response.headers = {}
+        self.response.iter_content.return_value = [b"Image", b"Data"]
+        self.deadline = time.monotonic() + 60
+
+    def test_ok(self, open, tempfile, os):
+        tempfile.mkstemp.return_value = (3, "/foo/.partial/abc.part")
+        imageFile = open.return_value.__enter__.return_value
+
+        filePath = self.imageDownloader._downloadImage(
+            MagicMock(imageURL="imageURL", imageTitle="imageTitle"), "/foo/imageTitle", self.deadline
+        )
+
+        self.imageDownloader._session.get.assert_called_once_with("imageURL", stream=True, timeout=(1, 2))
+        tempfile.mkstemp.assert_called_once_with(dir="/foo/.partial", suffix=".part")
+        open.assert_called_once_with(3, "wb")
+        imageFile.write.assert_called_once_with(b"ImageData")
+        os.fsync.assert_called_once_with(imageFile.fileno.return_value)
+        os.replace.assert_called_once_with("/foo/.partial/abc.part", "/foo/imageTitle")
+        self.assertEqual("/foo/imageTitle", filePath)
+
+    def test_scaled_before_publishing(self, open, tempfile, os):
+        tempfile.mkstemp.return_value = (3, "/foo/.partial/abc.part")
+        self.imageDownloader._imageScaler = MagicMock()
+        manager = MagicMock()
+        manager.attach_mock(self.imageDownloader._imageScaler.scaleImage, "scaleImage")
+        manager.attach_mock(os.replace, "replace")
+
+        self.imageDownloader._downloadImage(MagicMock(imageURL="imageURL"), "/foo/imageTitle", self.deadline)
+
+        self.assertEqual(
+            [call.scaleImage("/foo/.partial/abc.part"), call.replace("/foo/.partial/abc.part", "/foo/imageTitle")],
+            manager.mock_calls
+        )
+
+    def test_interrupted(self, open, tempfile, os):
+        tempfile.mkstemp.return_value = (3, "/foo/.partial/abc.part")
+        open.return_value.__enter__.return_value.write.side_effect = Exception("Connection reset")
+
+        with self.assertRaisesRegex(Exception, "Connection reset"):
+            self.imageDownloader._downloadImage(MagicMock(imageURL="imageURL"), "/foo/imageTitle", self.deadline)
+
+        os.remove.assert_called_once_with("/foo/.partial/abc.part")
+        os.replace.assert_not_called()
+
+    def test_http_error(self, open, tempfile, os):
+        self.response.raise_for_status.side_effect = Exception("404 Not Found")
+
+        with self.assertRaisesRegex(Exception, "404 Not Found"):
+            self.imageDownloader._downloadImage(MagicMock(imageURL="imageURL"), "/foo/imageTitle", self.deadline)
+
+        tempfile.mkstemp.assert_not_called()
+
+    def test_content_length_too_large(self, open, tempfile, os):
+        self.response.headers = {"Content-Length": "11"}
+
+        with self.assertRaises(DownloadLimitExceeded):
+            self.imageDownloader._downloadImage(MagicMock(imageURL="imageURL"), "/foo/imageTitle", self.deadline)
+
+        tempfile.mkstemp.assert_not_called()
+
+    def test_streamed_too_large(self, open, tempfile, os):
+        tempfile.mkstemp.return_value = (3, "/foo/.partial/abc.part")
+        self.response.iter_content.return_value = [b"Image", b"Data", b"More"]
+
+        with self.assertRaises(DownloadLimitExceeded):
+            self.imageDownloader._downloadImage(MagicMock(imageURL="imageURL"), "/foo/imageTitle", self.deadline)
+
+        os.remove.assert_called_once_with("/foo/.partial/abc.part")
+        os.replace.assert_not_called()
+
+    def test_rejected_before_body(self, open, tempfile, os):
+        self.imageDownloader._rules = ImageRules(minWidth=640, minHeight=480)
+        self.response.iter_content.return_value = iter(
+            [b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIHDR", b"\x00\x00\x00\xa0\x00\x00\x00\xa0", b"Rest"]
+        )
+
+        with self.assertRaisesRegex(ImageRejected, "too small"):
+            self.imageDownloader._downloadImage(MagicMock(imageURL="imageURL"), "/foo/imageTitle", self.deadline)
+
+        tempfile.mkstemp.assert_not_called()
+        self.assertEqual([b"Rest"], list(self.response.iter_content.return_value))
+
+    def test_streamed_gif_too_large(self, open, tempfile, os):
+        # without a Content-Length the GIF limit can only be enforced while streaming
+        tempfile.mkstemp.return_value = (3, "/foo/.partial/abc.part")
+        self.imageDownloader._limits = DownloadLimits(maxBytes=100)
+        self.imageDownloader._rules = ImageRules(maxGifBytes=12)
+        self.response.iter_content.return_value = [b"GIF89a\x80\x07\x38\x04", b"Data"]
+
+        with self.assertRaisesRegex(ImageRejected, "GIF"):
+            self.imageDownloader._downloadImage(MagicMock(imageURL="imageURL"), "/foo/imageTitle", self.deadline)
+
+        os.remove.assert_called_once_with("/foo/.partial/abc.part")
+        os.replace.assert_not_called()
+
+    def test_batch_deadline_passed(self, open, tempfile, os):
+        with self.assertRaises(DownloadLimitExceeded):
+            self.imageDownloader._downloadImage(
+                MagicMock(imageURL="imageURL"), "/foo/imageTitle", time.monotonic() - 1
+            )
+
+        self.imageDownloader._session.get.assert_not_called()
+
+
+@patch(f"{MODULE_PATH}os.remove")
+@patch(f"{MODULE_PATH}os.listdir", return_value=["abc.part", "def.part"])
+@patch(f"{MODULE_PATH}os.makedirs")
+class Test_ImageDownloader_recoverPartialDownloads(TestCase):
+
+    def test_ok(self, makedirs, listdir, remove):
+        imageDownloader = ImageDownloader("/foo/.partial")
+
+        imageDownloader.recoverPartialDownloads()
+
+        makedirs.assert_called_once_with("/foo/.partial", exist_ok=True)
+        remove.assert_has_calls(
+            [
+                call("/foo/.partial/abc.part"),
+                call("/foo/.partial/def.part")
+            ]
+        )
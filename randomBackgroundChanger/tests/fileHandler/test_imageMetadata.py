@@ -0,0 +1,125 @@
+
+import hashlib
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from randomBackgroundChanger.fileHandler.imageMetadata import ImageMetadataCache
+
+
+class Test_ImageMetadataCache_getMetadata(TestCase):
+
+    def setUp(self):
+        imageDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(imageDirectory.cleanup)
+        self.imagePath = os.path.join(imageDirectory.name, "image")
+        with open(self.imagePath, "wb") as imageFile:
+            imageFile.write(b"ImageData")
+        self.imageMetadataCache = ImageMetadataCache(maxSize=1)
+
+    def test_ok(self):
+        imageMetadata = self.imageMetadataCache.getMetadata(self.imagePath)
+
+        self.assertEqual(hashlib.sha256(b"ImageData").hexdigest(), imageMetadata.hash)
+        self.assertEqual(9, imageMetadata.size)
+        self.assertEqual("application/octet-stream", imageMetadata.mimeType)
+
+    def test_mime_type(self):
+        with open(self.imagePath, "wb") as imageFile:
+            imageFile.write(b"GIF89a\x80\x02\xe0\x01ImageData")
+
+        imageMetadata = self.imageMetadataCache.getMetadata(self.imagePath)
+
+        self.assertEqual("image/gif", imageMetadata.mimeType)
+        self.assertEqual((640, 480), (imageMetadata.width, imageMetadata.height))
+
+    def test_cached(self):
+        with patch.object(ImageMetadataCache, "_readFile", return_value=("hash", None)) as _readFile:
+            self.imageMetadataCache.getMetadata(self.imagePath)
+            imageMetadata = self.imageMetadataCache.getMetadata(self.imagePath)
+
+        _readFile.assert_called_once_with(self.imagePath)
+        self.assertEqual("hash", imageMetadata.hash)
+
+    def test_file_changed(self):
+        self.imageMetadataCache.getMetadata(self.imagePath)
+        with open(self.imagePath, "wb") as imageFile:
+            imageFile.write(b"NewImageData")
+
+        imageMetadata = self.imageMetadataCache.getMetadata(self.imagePath)
+
+        self.assertEqual(hashlib.sha256(b"NewImageData").hexdigest(), imageMetadata.hash)
+
+    def test_bounded(self):
+        otherImagePath = self.imagePath + "2"
+        with open(otherImagePath, "wb") as imageFile:
+            imageFile.write(b"OtherImageData")
+
+        self.imageMetadataCache.getMetadata(self.imagePath)
+        self.imageMetadataCache.getMetadata(otherImagePath)
+
+        self.assertEqual(1, len(self.imageMetadataCache))
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            self.imageMetadataCache.getMetadata(self.imagePath + "missing")
+
+
+class Test_ImageMetadataCache_findPath(TestCase):
+
+    def setUp(self):
+        imageDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(imageDirectory.cleanup)
+        self.imagePath = os.path.join(imageDirectory.name, "image")
+        with open(self.imagePath, "wb") as imageFile:
+            imageFile.write(b"ImageData")
+        self.imageHash = hashlib.sha256(b"ImageData").hexdigest()
+        self.imageMetadataCache = ImageMetadataCache(maxSize=1)
+
+    def test_ok(self):
+        self.imageMetadataCache.getMetadata(self.imagePath)
+
+        with patch.object(ImageMetadataCache, "_readFile") as _readFile:
+            imagePath = self.imageMetadataCache.findPath(self.imageHash)
+
+        self.assertEqual(self.imagePath, imagePath)
+        _readFile.assert_not_called()
+
+    def test_unknown_hash(self):
+        with patch.object(ImageMetadataCache, "_readFile") as _readFile:
+            self.assertIsNone(self.imageMetadataCache.findPath("unknownHash"))
+
+        _readFile.assert_not_called()
+
+    def test_kept_beyond_bound(self):
+        otherImagePath = self.imagePath + "2"
+        with open(otherImagePath, "wb") as imageFile:
+            imageFile.write(b"OtherImageData")
+        self.imageMetadataCache.getMetadata(self.imagePath)
+        self.imageMetadataCache.getMetadata(otherImagePath)
+
+        self.assertEqual(self.imagePath, self.imageMetadataCache.findPath(self.imageHash))
+
+    def test_discarded(self):
+        self.imageMetadataCache.getMetadata(self.imagePath)
+
+        self.imageMetadataCache.discard(self.imagePath)
+
+        self.assertIsNone(self.imageMetadataCache.findPath(self.imageHash))
+
+    def test_file_changed(self):
+        self.imageMetadataCache.getMetadata(self.imagePath)
+        with open(self.imagePath, "wb") as imageFile:
+            imageFile.write(b"NewImageData")
+
+        self.assertIsNone(self.imageMetadataCache.findPath(self.imageHash))
+        self.assertEqual(
+            self.imagePath, self.imageMetadataCache.findPath(hashlib.sha256(b"NewImageData").hexdigest())
+        )
+
+    def test_file_removed(self):
+        self.imageMetadataCache.getMetadata(self.imagePath)
+        os.remove(self.imagePath)
+
+        self.assertIsNone(self.imageMetadataCache.findPath(self.imageHash))
@@ -0,0 +1,106 @@
+
+import threading
+from unittest import TestCase
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from randomBackgroundChanger.fileHandler.imagePrefetcher import (
+    AlreadyDownloadingImagesException, ImagePrefetcher
+)
+from randomBackgroundChanger.fileHandler.imageQueue import ImageQueue
+
+
+class Test_ImagePrefetcher___init__(TestCase):
+
+    def test_invalid_watermarks(self):
+        with self.assertRaises(ValueError):
+            ImagePrefetcher(MagicMock(), MagicMock(), lowWatermark=10, highWatermark=10)
+
+
+@patch.object(ImagePrefetcher, "queueLength", new_callable=PropertyMock)
+class Test_ImagePrefetcher_checkQueue(TestCase):
+
+    def setUp(self):
+        self.imagePrefetcher = ImagePrefetcher(MagicMock(), MagicMock(), lowWatermark=2, highWatermark=5)
+
+    def test_below_low_watermark(self, queueLength):
+        queueLength.return_value = 1
+
+        self.imagePrefetcher.checkQueue()
+
+        self.assertTrue(self.imagePrefetcher._refillRequested.is_set())
+
+    def test_at_low_watermark(self, queueLength):
+        queueLength.return_value = 2
+
+        self.imagePrefetcher.checkQueue()
+
+        self.assertFalse(self.imagePrefetcher._refillRequested.is_set())
+
+
+@patch.object(ImagePrefetcher, "queueLength", new_callable=PropertyMock)
+class Test_ImagePrefetcher_refill(TestCase):
+
+    def setUp(self):
+        self.fileHandler = MagicMock()
+        self.imagePrefetcher = ImagePrefetcher(self.fileHandler, MagicMock(), lowWatermark=2, highWatermark=5)
+
+    def test_fills_to_high_watermark(self, queueLength):
+        queueLength.side_effect = [0, 0, 3, 3, 3, 6, 6]
+
+        self.imagePrefetcher.refill()
+
+        self.assertEqual(2, self.fileHandler.refillImages.call_count)
+
+    def test_no_new_images(self, queueLength):
+        queueLength.return_value = 1
+
+        self.imagePrefetcher.refill()
+
+        self.fileHandler.refillImages.assert_called_once_with()
+
+    def test_already_downloading(self, queueLength):
+        queueLength.return_value = 1
+        self.fileHandler.refillImages.side_effect = AlreadyDownloadingImagesException
+
+        self.imagePrefetcher.refill()
+
+        self.fileHandler.refillImages.assert_called_once_with()
+
+    @patch("randomBackgroundChanger.fileHandler.imagePrefetcher.print")
+    def test_exception(self, print, queueLength):
+        queueLength.return_value = 1
+        self.fileHandler.refillImages.side_effect = Exception("Boom!")
+
+        self.imagePrefetcher.refill()
+
+        self.fileHandler.refillImages.assert_called_once_with()
+        print.assert_called_with("Boom!")
+
+
+@patch.object(ImagePrefetcher, "start")
+class Test_ImagePrefetcher_waitForImages(TestCase):
+
+    def setUp(self):
+        self.imageQueue = ImageQueue("/foo")
+        self.imageQueue._loaded = True
+        self.imagePrefetcher = ImagePrefetcher(MagicMock(), self.imageQueue, lowWatermark=2, highWatermark=5)
+
+    def test_first_image_published(self, ImagePrefetcher_start):
+        self.imageQueue.add("/foo/a.png")
+        threading.Timer(0.05, self.imageQueue.add, args=("/foo/b.png", )).start()
+
+        self.assertTrue(self.imagePrefetcher.waitForImages(2, timeout=5))
+
+        ImagePrefetcher_start.assert_called_once_with()
+        self.assertTrue(self.imagePrefetcher._refillRequested.is_set())
+
+    def test_refill_finished_without_images(self, ImagePrefetcher_start):
+        def finishRefill():
+            self.imagePrefetcher._refillsFinished += 1
+            self.imageQueue.notifyWaiters()
+        threading.Timer(0.05, finishRefill).start()
+
+        self.assertFalse(self.imagePrefetcher.waitForImages(2, timeout=5))
+
+    def test_timeout(self, ImagePrefetcher_start):
+        self.assertFalse(self.imagePrefetcher.waitForImages(2, timeout=0.01))
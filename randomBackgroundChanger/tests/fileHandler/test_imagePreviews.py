@@ -0,0 +1,124 @@
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from PIL import Image
+
+from randomBackgroundChanger.fileHandler.imagePreviews import ImagePreviews, PreviewUnavailable, createStill
+
+
+class ImagePreviewsTestCommon(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.imagePath = os.path.join(self.directory, "image.png")
+        Image.new("RGBA", (800, 400), (255, 0, 0, 128)).save(self.imagePath)
+
+    def createImagePreviews(self, cacheDirectory, **kwargs):
+        imagePreviews = ImagePreviews(cacheDirectory, **kwargs)
+        self.addCleanup(lambda: imagePreviews._executor and imagePreviews._executor.shutdown())
+        return imagePreviews
+
+
+class Test_createStill(ImagePreviewsTestCommon):
+
+    def test_resized(self):
+        outputPath = os.path.join(self.directory, "still.jpg")
+
+        createStill(self.imagePath, outputPath, width=200)
+
+        with Image.open(outputPath) as still:
+            self.assertEqual("JPEG", still.format)
+            self.assertEqual((200, 100), still.size)
+
+    def test_gif_first_frame(self):
+        gifPath = os.path.join(self.directory, "image.gif")
+        frames = [Image.new("RGB", (100, 100), colour) for colour in ((255, 0, 0), (0, 0, 255))]
+        frames[0].save(gifPath, save_all=True, append_images=frames[1:])
+        outputPath = os.path.join(self.directory, "still.jpg")
+
+        createStill(gifPath, outputPath)
+
+        with Image.open(outputPath) as still:
+            self.assertEqual((100, 100), still.size)
+            red, green, blue = still.getpixel((50, 50))
+            self.assertGreater(red, 200)
+            self.assertLess(blue, 50)
+
+
+class Test_ImagePreviews_getPreview(ImagePreviewsTestCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.cacheDirectory = os.path.join(self.directory, ".previews")
+        self.imagePreviews = self.createImagePreviews(self.cacheDirectory)
+
+    def test_ok(self):
+        previewPath = self.imagePreviews.getPreview(self.imagePath, "hash", 320)
+
+        self.assertEqual(os.path.join(self.cacheDirectory, "hash-w320.jpg"), previewPath)
+        with Image.open(previewPath) as preview:
+            self.assertEqual((320, 160), preview.size)
+
+    def test_spawned_process_pool(self):
+        self.imagePreviews.getPreview(self.imagePath, "hash", 320)
+
+        self.assertIsInstance(self.imagePreviews._executor, ProcessPoolExecutor)
+        self.assertEqual("spawn", self.imagePreviews._executor._mp_context.get_start_method())
+
+    def test_shared_work(self):
+        firstPreview = self.imagePreviews._preview(self.imagePath, "hash", 320)
+        secondPreview = self.imagePreviews._preview(self.imagePath, "hash", 320)
+
+        self.assertIs(firstPreview, secondPreview)
+        self.assertEqual(os.path.join(self.cacheDirectory, "hash-w320.jpg"), firstPreview.result(timeout=30))
+
+    def test_cached(self):
+        self.imagePreviews.getPreview(self.imagePath, "hash", 320)
+
+        with patch("randomBackgroundChanger.fileHandler.imagePreviews.createStill") as createStill:
+            self.imagePreviews.getPreview(self.imagePath, "hash", 320)
+
+        createStill.assert_not_called()
+
+    def test_cache_loaded_from_disk(self):
+        self.imagePreviews.getPreview(self.imagePath, "hash", 320)
+        imagePreviews = self.createImagePreviews(self.cacheDirectory)
+
+        with patch("randomBackgroundChanger.fileHandler.imagePreviews.createStill") as createStill:
+            imagePreviews.getPreview(self.imagePath, "hash", 320)
+
+        createStill.assert_not_called()
+        self.assertEqual(os.path.getsize(os.path.join(self.cacheDirectory, "hash-w320.jpg")), imagePreviews.cachedBytes)
+
+    def test_evicted(self):
+        imagePreviews = self.createImagePreviews(self.cacheDirectory, maxBytes=1)
+
+        imagePreviews.getPreview(self.imagePath, "hash", 320)
+        imagePreviews.getPreview(self.imagePath, "hash", 160)
+
+        self.assertEqual(["hash-w160.jpg"], os.listdir(self.cacheDirectory))
+
+    def test_invalid_width(self):
+        with self.assertRaises(ValueError):
+            self.imagePreviews.getPreview(self.imagePath, "hash", 0)
+
+    def test_not_an_image(self):
+        notAnImagePath = os.path.join(self.directory, "notAnImage")
+        with open(notAnImagePath, "wb") as notAnImage:
+            notAnImage.write(b"NotAnImage")
+
+        with self.assertRaises(PreviewUnavailable):
+            self.imagePreviews.getPreview(notAnImagePath, "hash", 320)
+
+        self.assertEqual([], os.listdir(self.cacheDirectory))
+
+    def test_placeholder(self):
+        placeholder = self.imagePreviews.getPlaceholder(self.imagePath, "hash")
+
+        self.assertTrue(placeholder.startswith("data:image/jpeg;base64,"))
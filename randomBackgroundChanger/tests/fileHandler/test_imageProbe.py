@@ -0,0 +1,89 @@
+
+import struct
+from unittest import TestCase
+
+from randomBackgroundChanger.fileHandler.imageProbe import (
+    ImageHeader, ImageRejected, ImageRules, parseImageHeader
+)
+
+
+def pngHeader(width, height):
+    return b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\x0dIHDR" + struct.pack(">II", width, height) + b"\x08\x06"
+
+
+def gifHeader(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\xf7\x00"
+
+
+def jpegHeader(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width) + b"\x03"
+    return b"\xff\xd8" + app0 + sof0
+
+
+class Test_parseImageHeader(TestCase):
+
+    def test_png(self):
+        self.assertEqual(ImageHeader("image/png", 1920, 1080), parseImageHeader(pngHeader(1920, 1080)))
+
+    def test_gif(self):
+        self.assertEqual(ImageHeader("image/gif", 320, 240), parseImageHeader(gifHeader(320, 240)))
+
+    def test_jpeg(self):
+        self.assertEqual(ImageHeader("image/jpeg", 4000, 3000), parseImageHeader(jpegHeader(4000, 3000)))
+
+    def test_webp(self):
+        data = b"RIFF\x00\x00\x00\x00WEBPVP8X" + b"\x00" * 8 + (1919).to_bytes(3, "little") + (1079).to_bytes(3, "little")
+
+        self.assertEqual(ImageHeader("image/webp", 1920, 1080), parseImageHeader(data))
+
+    def test_incomplete(self):
+        self.assertIsNone(parseImageHeader(pngHeader(1920, 1080)[:20]))
+        self.assertIsNone(parseImageHeader(jpegHeader(1920, 1080)[:22]))
+
+    def test_unknown_format(self):
+        self.assertIsNone(parseImageHeader(b"<html></html>"))
+
+
+class Test_ImageRules_checkImage(TestCase):
+
+    def setUp(self):
+        self.imageRules = ImageRules(
+            minWidth=640, minHeight=480, minAspectRatio=0.5, maxAspectRatio=3.0, maxGifBytes=1000
+        )
+
+    def test_ok(self):
+        self.imageRules.checkImage(ImageHeader("image/jpeg", 1920, 1080), 5000)
+
+    def test_unknown_image(self):
+        self.imageRules.checkImage(None, 5000)
+
+    def test_too_small(self):
+        with self.assertRaisesRegex(ImageRejected, "too small"):
+            self.imageRules.checkImage(ImageHeader("image/png", 160, 160))
+
+    def test_aspect_ratio(self):
+        with self.assertRaisesRegex(ImageRejected, "aspect ratio"):
+            self.imageRules.checkImage(ImageHeader("image/png", 4000, 1000))
+
+        with self.assertRaisesRegex(ImageRejected, "aspect ratio"):
+            self.imageRules.checkImage(ImageHeader("image/png", 700, 2000))
+
+    def test_large_gif(self):
+        with self.assertRaisesRegex(ImageRejected, "GIF"):
+            self.imageRules.checkImage(ImageHeader("image/gif", 1920, 1080), 1001)
+
+        self.imageRules.checkImage(ImageHeader("image/png", 1920, 1080), 1001)
+
+    def test_large_gif_streamed(self):
+        self.imageRules.checkSize(ImageHeader("image/gif", 1920, 1080), 1000)
+
+        with self.assertRaisesRegex(ImageRejected, "GIF"):
+            self.imageRules.checkSize(ImageHeader("image/gif", 1920, 1080), 1001)
+
+    def test_defaults_accept_everything(self):
+        imageRules = ImageRules()
+
+        imageRules.checkImage(ImageHeader("image/png", 16, 16))
+        imageRules.checkImage(ImageHeader("image/png", 4000, 100))
+        imageRules.checkImage(ImageHeader("image/gif", 1920, 1080), 500 * 1024 * 1024)
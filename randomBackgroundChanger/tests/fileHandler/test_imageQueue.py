@@ -0,0 +1,78 @@
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from randomBackgroundChanger.fileHandler.imageQueue import ImageDirectoryWatcher, ImageQueue
+
+MODULE_PATH = "randomBackgroundChanger.fileHandler.imageQueue."
+
+
+@patch(f"{MODULE_PATH}os.listdir", return_value=["b.png", ".gitkeep", ".partial", "a.png"])
+class Test_ImageQueue(TestCase):
+
+    def setUp(self):
+        self.imageQueue = ImageQueue("/foo")
+
+    def test_lazy_scan(self, listdir):
+        listdir.assert_not_called()
+
+        self.assertEqual(["/foo/a.png", "/foo/b.png"], self.imageQueue.paths)
+        self.assertEqual("/foo/a.png", self.imageQueue.first)
+        self.assertEqual(2, len(self.imageQueue))
+
+        listdir.assert_called_once_with("/foo")
+
+    def test_add(self, listdir):
+        self.imageQueue.add("/foo/0.png")
+        self.imageQueue.add("/foo/c.png")
+        self.imageQueue.add("/foo/c.png")
+
+        self.assertEqual(["/foo/0.png", "/foo/a.png", "/foo/b.png", "/foo/c.png"], self.imageQueue.paths)
+        self.assertIn("/foo/c.png", self.imageQueue)
+        listdir.assert_called_once_with("/foo")
+
+    def test_remove(self, listdir):
+        self.imageQueue.remove("/foo/a.png")
+        self.imageQueue.remove("/foo/missing.png")
+
+        self.assertEqual(["/foo/b.png"], self.imageQueue.paths)
+        self.assertNotIn("/foo/a.png", self.imageQueue)
+
+    def test_empty(self, listdir):
+        listdir.return_value = []
+
+        self.assertIsNone(self.imageQueue.first)
+        self.assertEqual(0, len(self.imageQueue))
+
+
+@patch(f"{MODULE_PATH}os.stat")
+class Test_ImageDirectoryWatcher_checkDirectory(TestCase):
+
+    def setUp(self):
+        self.imageQueue = MagicMock(directoryPath="/foo")
+        self.imageDirectoryWatcher = ImageDirectoryWatcher(self.imageQueue)
+        self.imageDirectoryWatcher._lastModified = 100
+
+    def test_unchanged(self, stat):
+        stat.return_value = MagicMock(st_mtime_ns=100)
+
+        self.imageDirectoryWatcher.checkDirectory()
+
+        self.imageQueue.rescan.assert_not_called()
+
+    def test_changed(self, stat):
+        stat.return_value = MagicMock(st_mtime_ns=200)
+
+        self.imageDirectoryWatcher.checkDirectory()
+        self.imageDirectoryWatcher.checkDirectory()
+
+        self.imageQueue.rescan.assert_called_once_with()
+
+    @patch(f"{MODULE_PATH}print")
+    def test_missing_directory(self, print, stat):
+        stat.side_effect = FileNotFoundError("No such directory")
+
+        self.imageDirectoryWatcher.checkDirectory()
+
+        self.imageQueue.rescan.assert_not_called()
+        print.assert_called_with("No such directory")
@@ -0,0 +1,102 @@
+
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from PIL import Image
+
+from randomBackgroundChanger.fileHandler.imageScaler import ImageScaler, ScaleSettings, scaleImage
+
+MODULE_PATH = "randomBackgroundChanger.fileHandler.imageScaler."
+
+
+class Test_ScaleSettings_scaledSize(TestCase):
+
+    def test_cover(self):
+        scaleSettings = ScaleSettings(1920, 1080, fitMode="cover")
+
+        self.assertEqual((2400, 1080), scaleSettings.scaledSize(4000, 1800))
+
+    def test_contain(self):
+        scaleSettings = ScaleSettings(1920, 1080, fitMode="contain")
+
+        self.assertEqual((1920, 864), scaleSettings.scaledSize(4000, 1800))
+
+    def test_already_small_enough(self):
+        scaleSettings = ScaleSettings(1920, 1080)
+
+        self.assertIsNone(scaleSettings.scaledSize(1280, 720))
+
+    def test_invalid_gif_policy(self):
+        with self.assertRaises(ValueError):
+            ScaleSettings(1920, 1080, gifPolicy="drop")
+
+
+class Test_scaleImage(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.imagePath = os.path.join(directory.name, "image")
+
+    def saveGif(self):
+        frames = [Image.new("RGB", (400, 200), colour) for colour in ((255, 0, 0), (0, 0, 255))]
+        frames[0].save(self.imagePath, "GIF", save_all=True, append_images=frames[1:], duration=50)
+
+    def test_ok(self):
+        Image.new("RGB", (800, 400)).save(self.imagePath, "JPEG")
+
+        scaled = scaleImage(self.imagePath, ScaleSettings(200, 200, fitMode="contain"))
+
+        self.assertTrue(scaled)
+        with Image.open(self.imagePath) as image:
+            self.assertEqual(("JPEG", (200, 100)), (image.format, image.size))
+
+    def test_not_scaled_up(self):
+        Image.new("RGB", (100, 50)).save(self.imagePath, "PNG")
+
+        scaled = scaleImage(self.imagePath, ScaleSettings(200, 200))
+
+        self.assertFalse(scaled)
+
+    def test_gif_kept(self):
+        self.saveGif()
+
+        scaled = scaleImage(self.imagePath, ScaleSettings(100, 100))
+
+        self.assertFalse(scaled)
+        with Image.open(self.imagePath) as image:
+            self.assertEqual((400, 200), image.size)
+
+    def test_gif_first_frame(self):
+        self.saveGif()
+
+        scaleImage(self.imagePath, ScaleSettings(100, 100, fitMode="contain", gifPolicy="firstFrame"))
+
+        with Image.open(self.imagePath) as image:
+            self.assertEqual(("PNG", (100, 50)), (image.format, image.size))
+
+    def test_gif_scaled(self):
+        self.saveGif()
+
+        scaleImage(self.imagePath, ScaleSettings(100, 100, fitMode="contain", gifPolicy="scale"))
+
+        with Image.open(self.imagePath) as image:
+            self.assertEqual(("GIF", (100, 50), 2), (image.format, image.size, image.n_frames))
+
+
+class Test_ImageScaler_scaleImage(TestCase):
+
+    @patch(f"{MODULE_PATH}print")
+    def test_not_an_image(self, print):
+        with tempfile.NamedTemporaryFile() as notAnImage:
+            notAnImage.write(b"NotAnImage")
+            notAnImage.flush()
+            imageScaler = ImageScaler(ScaleSettings(100, 100), workers=1)
+            self.addCleanup(lambda: imageScaler._executor.shutdown())
+
+            scaled = imageScaler.scaleImage(notAnImage.name)
+
+        self.assertFalse(scaled)
+        print.assert_any_call(f"Could not scale {notAnImage.name}")
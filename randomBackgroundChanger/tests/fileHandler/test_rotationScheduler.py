@@ -0,0 +1,182 @@
+
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from randomBackgroundChanger.fileHandler.rotationScheduler import (
+    CronExpression, RotationSchedule, RotationScheduler
+)
+
+MODULE_PATH = "randomBackgroundChanger.fileHandler.rotationScheduler."
+
+
+class Test_CronExpression_nextTime(TestCase):
+
+    def test_every_five_minutes(self):
+        cronExpression = CronExpression("*/5 * * * *")
+
+        nextTime = cronExpression.nextTime(datetime(2026, 1, 1, 10, 7, 30))
+
+        self.assertEqual(datetime(2026, 1, 1, 10, 10), nextTime)
+
+    def test_on_the_minute(self):
+        cronExpression = CronExpression("10 * * * *")
+
+        nextTime = cronExpression.nextTime(datetime(2026, 1, 1, 10, 10))
+
+        self.assertEqual(datetime(2026, 1, 1, 11, 10), nextTime)
+
+    def test_hour_range_and_list(self):
+        cronExpression = CronExpression("0,30 9-17 * * *")
+
+        nextTime = cronExpression.nextTime(datetime(2026, 1, 1, 17, 45))
+
+        self.assertEqual(datetime(2026, 1, 2, 9, 0), nextTime)
+
+    def test_weekday(self):
+        # 2026-01-01 is a Thursday, cron counts Monday as 1
+        cronExpression = CronExpression("0 8 * * 1")
+
+        nextTime = cronExpression.nextTime(datetime(2026, 1, 1, 12, 0))
+
+        self.assertEqual(datetime(2026, 1, 5, 8, 0), nextTime)
+
+    def test_day_of_month_or_weekday(self):
+        cronExpression = CronExpression("0 0 15 * 1")
+
+        nextTime = cronExpression.nextTime(datetime(2026, 1, 6, 12, 0))
+
+        self.assertEqual(datetime(2026, 1, 12, 0, 0), nextTime)
+
+    def test_invalid(self):
+        for expression in ["* * * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *"]:
+            with self.assertRaises(ValueError):
+                CronExpression(expression)
+
+    def test_never_matches(self):
+        with self.assertRaises(ValueError):
+            CronExpression("0 0 31 2 *").nextTime(datetime(2026, 1, 1))
+
+
+class Test_RotationSchedule(TestCase):
+
+    def test_interval(self):
+        schedule = RotationSchedule(interval=60)
+
+        self.assertEqual(datetime(2026, 1, 1, 0, 1), schedule.nextRun(datetime(2026, 1, 1)))
+
+    @patch(f"{MODULE_PATH}random.uniform", return_value=5)
+    def test_jitter(self, uniform):
+        schedule = RotationSchedule(cron="0 * * * *", jitter=30)
+
+        nextRun = schedule.nextRun(datetime(2026, 1, 1, 0, 30))
+
+        uniform.assert_called_once_with(0, 30)
+        self.assertEqual(datetime(2026, 1, 1, 1, 0, 5), nextRun)
+
+    def test_invalid(self):
+        for scheduleArgs in [{}, {"interval": 60, "cron": "* * * * *"}, {"interval": 0}, {"interval": 60, "jitter": -1}]:
+            with self.assertRaises(ValueError):
+                RotationSchedule(**scheduleArgs)
+
+    def test_never_matches(self):
+        with self.assertRaises(ValueError):
+            RotationSchedule(cron="0 0 30 2 *")
+
+    def test_cron_not_string(self):
+        with self.assertRaises(TypeError):
+            RotationSchedule(cron=5)
+
+    def test_toJson(self):
+        self.assertEqual(
+            {"interval": None, "cron": "0 * * * *", "jitter": 10},
+            RotationSchedule(cron="0 * * * *", jitter=10).toJson()
+        )
+
+
+class Test_RotationScheduler(TestCase):
+
+    def setUp(self):
+        self.fileHandler = MagicMock()
+        self.rotationScheduler = RotationScheduler(self.fileHandler, prefetchLead=0.05)
+
+    def tearDown(self):
+        self.rotationScheduler.setSchedule(None)
+
+    def test_rotates_on_schedule(self):
+        self.rotationScheduler.setSchedule(RotationSchedule(interval=0.1))
+        self.rotationScheduler.start()
+
+        for _ in range(100):
+            if self.fileHandler.cycleBackgroundImage.called:
+                break
+            self.rotationScheduler._scheduleChanged.wait(0.01)
+
+        self.fileHandler.prefetchImages.assert_called()
+        self.fileHandler.cycleBackgroundImage.assert_called()
+
+    def test_no_schedule(self):
+        self.rotationScheduler.start()
+        self.rotationScheduler._scheduleChanged.wait(0.05)
+
+        self.assertIsNone(self.rotationScheduler.nextRun)
+        self.fileHandler.cycleBackgroundImage.assert_not_called()
+
+    def test_clock(self):
+        # the clock moves on to each wait's end, so the run doesn't sleep
+        clock = MagicMock(side_effect=[datetime(2026, 1, 1), datetime(2026, 1, 1, 0, 59), datetime(2026, 1, 1, 1)])
+        rotationScheduler = RotationScheduler(
+            self.fileHandler, schedule=RotationSchedule(interval=3600), prefetchLead=60, clock=clock
+        )
+
+        rotationScheduler._runOnce()
+
+        self.assertEqual(datetime(2026, 1, 1, 1), rotationScheduler.nextRun)
+        self.fileHandler.prefetchImages.assert_called_once()
+        self.fileHandler.cycleBackgroundImage.assert_called_once()
+
+    def test_schedule_changed_while_waiting(self):
+        clock = MagicMock(return_value=datetime(2026, 1, 1))
+        rotationScheduler = RotationScheduler(
+            self.fileHandler, schedule=RotationSchedule(interval=3600), prefetchLead=60, clock=clock
+        )
+        rotationScheduler._scheduleChanged.set()
+
+        rotationScheduler._runOnce()
+
+        self.fileHandler.prefetchImages.assert_not_called()
+        self.fileHandler.cycleBackgroundImage.assert_not_called()
+
+    def test_background_cycler(self):
+        backgroundCycler = MagicMock()
+        self.rotationScheduler.setBackgroundCycler(backgroundCycler)
+
+        self.rotationScheduler.rotate()
+
+        backgroundCycler.cycleBackgroundImage.assert_called_once_with()
+        self.fileHandler.cycleBackgroundImage.assert_not_called()
+
+    @patch(f"{MODULE_PATH}print")
+    def test_schedule_exception(self, print):
+        self.rotationScheduler.errorRetryDelay = 0.01
+        schedule = MagicMock()
+        schedule.nextRun.side_effect = [Exception("Boom!"), datetime.now(), datetime(2100, 1, 1)]
+        self.rotationScheduler.setSchedule(schedule)
+        self.rotationScheduler.start()
+
+        for _ in range(100):
+            if self.fileHandler.cycleBackgroundImage.called:
+                break
+            self.rotationScheduler._scheduleChanged.wait(0.01)
+
+        print.assert_any_call("Boom!")
+        self.assertTrue(self.rotationScheduler.running)
+        self.fileHandler.cycleBackgroundImage.assert_called()
+
+    @patch(f"{MODULE_PATH}print")
+    def test_rotate_exception(self, print):
+        self.fileHandler.cycleBackgroundImage.side_effect = Exception("Boom!")
+
+        self.rotationScheduler.rotate()
+
+        print.assert_called_with("Boom!")
@@ -0,0 +1,111 @@
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from randomBackgroundChanger.DAL.queries import InvalidToken
+from randomBackgroundChanger.fileHandler.tokenSigner import TokenSigner
+
+MODULE_PATH = "randomBackgroundChanger.fileHandler.tokenSigner."
+
+
+@patch(f"{MODULE_PATH}queries")
+class Test_TokenSigner_validToken(TestCase):
+
+    def setUp(self):
+        self.tokenSigner = TokenSigner("clientSecret123")
+
+    def test_ok(self, queries):
+        token = self.tokenSigner.createToken(30)
+
+        self.assertTrue(self.tokenSigner.isSignedToken(token))
+        self.assertTrue(self.tokenSigner.validToken(token))
+
+    def test_tampered_expiry(self, queries):
+        version, keyId, expiry, nonce, signature = self.tokenSigner.createToken(1).split(".")
+
+        token = ".".join([version, keyId, str(int(expiry) + 100 * 24 * 60 * 60), nonce, signature])
+
+        self.assertFalse(self.tokenSigner.validToken(token))
+
+    def test_different_secret(self, queries):
+        token = TokenSigner("otherSecret").createToken(30)
+
+        self.assertFalse(self.tokenSigner.validToken(token))
+
+    def test_different_key_id(self, queries):
+        token = TokenSigner("clientSecret123", keyId="2").createToken(30)
+
+        self.assertFalse(self.tokenSigner.validToken(token))
+
+    def test_expired(self, queries):
+        token = self.tokenSigner.createToken(-1)
+
+        self.assertFalse(self.tokenSigner.validToken(token))
+
+    def test_malformed(self, queries):
+        self.assertFalse(self.tokenSigner.validToken("s1.1.abc"))
+        self.assertFalse(self.tokenSigner.validToken("s1.1.abc.nonce.signature"))
+
+    def test_non_ascii(self, queries):
+        self.assertFalse(self.tokenSigner.validToken("s1.1.99999999999.nonce.é"))
+
+    def test_no_database_query(self, queries):
+        token = self.tokenSigner.createToken(30)
+
+        self.tokenSigner.validToken(token)
+
+        queries.revokedTokenSignatures.assert_not_called()
+
+
+@patch(f"{MODULE_PATH}queries")
+class Test_TokenSigner_refreshRevocations(TestCase):
+
+    def setUp(self):
+        self.tokenSigner = TokenSigner("clientSecret123")
+
+    def test_revoked_by_another_worker(self, queries):
+        token = self.tokenSigner.createToken(30)
+        queries.revokedTokenSignatures.return_value = {token.split(".")[-1]}
+
+        self.tokenSigner.refreshRevocations()
+
+        self.assertFalse(self.tokenSigner.validToken(token))
+
+    @patch(f"{MODULE_PATH}print")
+    def test_database_error(self, print, queries):
+        queries.revokedTokenSignatures.side_effect = Exception("Boom!")
+
+        self.tokenSigner.refreshRevocations()
+
+        print.assert_called_with("Boom!")
+
+    @patch(f"{MODULE_PATH}threading")
+    def test_started_in_background(self, threading, queries):
+        self.tokenSigner.start()
+
+        threading.Thread.assert_called_once_with(target=self.tokenSigner._run, daemon=True)
+        threading.Thread.return_value.start.assert_called_once_with()
+
+
+@patch(f"{MODULE_PATH}queries")
+class Test_TokenSigner_revokeToken(TestCase):
+
+    def setUp(self):
+        self.tokenSigner = TokenSigner("clientSecret123")
+
+    def test_ok(self, queries):
+        token = self.tokenSigner.createToken(30)
+        self.tokenSigner.validToken(token)
+
+        self.tokenSigner.revokeToken(token)
+
+        self.assertFalse(self.tokenSigner.validToken(token))
+        queries.addRevokedToken.assert_called_once()
+
+    def test_not_signed(self, queries):
+        queries.InvalidToken = InvalidToken
+
+        with self.assertRaises(InvalidToken):
+            self.tokenSigner.revokeToken("s1.1.123.nonce.signature")
+
+        queries.addRevokedToken.assert_not_called()
@@ -0,0 +1,167 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest import TestCase
+from unittest.mock import patch
+
+from randomBackgroundChanger.imgur.creditBudget import CreditBudget, CreditBudgetExceeded
+
+MODULE_PATH = "randomBackgroundChanger.imgur.creditBudget."
+
+# six hours before midnight UTC
+NOW = datetime(2024, 5, 1, 18, tzinfo=timezone.utc).timestamp()
+
+
+class CreditBudgetTestCommon(TestCase):
+
+    def setUp(self):
+        stateDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(stateDirectory.cleanup)
+        self.stateFile = os.path.join(stateDirectory.name, "imgurCredits.json")
+
+        timePatcher = patch(MODULE_PATH + "time")
+        self.time = timePatcher.start()
+        self.addCleanup(timePatcher.stop)
+        self.time.time.return_value = NOW
+
+        self.creditBudget = CreditBudget(self.stateFile, reserveFraction=0.1)
+
+    def recordRateLimits(self, clientRemaining=1000, userRemaining=400, userReset=NOW + 1800):
+        self.creditBudget.recordRateLimits({
+            "x-ratelimit-clientlimit": "12500",
+            "x-ratelimit-clientremaining": str(clientRemaining),
+            "x-ratelimit-userlimit": "500",
+            "x-ratelimit-userremaining": str(userRemaining),
+            "x-ratelimit-userreset": str(int(userReset))
+        })
+
+
+class Test_CreditBudget_galleryCallsPerHour(CreditBudgetTestCommon):
+
+    def test_unknown(self):
+        self.assertIsNone(self.creditBudget.galleryCallsPerHour)
+        self.creditBudget.checkGalleryCall()
+
+    def test_client_credits_spread_over_day(self):
+        # 3250 credits after the 1250 reserve over the 6 hours left in the day
+        self.recordRateLimits(clientRemaining=4500)
+
+        self.assertEqual(541, self.creditBudget.galleryCallsPerHour)
+
+    def test_user_credits_limit(self):
+        # 100 credits after the 50 reserve over the half hour until the reset
+        self.recordRateLimits(clientRemaining=12000, userRemaining=150)
+
+        self.assertEqual(200, self.creditBudget.galleryCallsPerHour)
+
+    def test_client_credits_spent(self):
+        self.recordRateLimits(clientRemaining=1000)
+
+        self.assertEqual(0, self.creditBudget.galleryCallsPerHour)
+        with self.assertRaises(CreditBudgetExceeded):
+            self.creditBudget.checkGalleryCall()
+
+    def test_credits_topped_up(self):
+        self.recordRateLimits(clientRemaining=1000, userRemaining=0)
+        # the next day, after both limits reset
+        self.time.time.return_value = NOW + 7 * 3600
+
+        self.assertIsNone(self.creditBudget.galleryCallsPerHour)
+        self.creditBudget.checkGalleryCall()
+
+    def test_downloads_per_hour(self):
+        self.recordRateLimits(clientRemaining=4500)
+        self.creditBudget.recordGalleryCall(60)
+        self.creditBudget.recordGalleryCall(50)
+
+        self.assertEqual(57, self.creditBudget._state.imagesPerCall)
+        self.assertEqual(541 * 57, self.creditBudget.downloadsPerHour)
+
+
+class Test_CreditBudget_checkGalleryCall(CreditBudgetTestCommon):
+
+    def test_calls_spaced(self):
+        # about 10 calls an hour, so one every 6 minutes
+        self.recordRateLimits(clientRemaining=1310)
+        self.creditBudget.checkGalleryCall()
+        self.creditBudget.recordGalleryCall(50)
+
+        self.time.time.return_value = NOW + 300
+        with self.assertRaisesRegex(CreditBudgetExceeded, "55 seconds"):
+            self.creditBudget.checkGalleryCall()
+
+        self.time.time.return_value = NOW + 360
+        self.creditBudget.checkGalleryCall()
+
+
+class Test_CreditBudget_state(CreditBudgetTestCommon):
+
+    def test_persisted(self):
+        self.recordRateLimits(clientRemaining=4500)
+        self.creditBudget.recordGalleryCall(60)
+
+        creditBudget = CreditBudget(self.stateFile, reserveFraction=0.1)
+
+        self.assertEqual(4500, creditBudget._state.clientRemaining)
+        self.assertEqual([NOW], creditBudget._state.galleryCalls)
+        self.assertEqual(541, creditBudget.galleryCallsPerHour)
+
+    def test_saves_throttled(self):
+        self.recordRateLimits(clientRemaining=4500)
+        self.time.time.return_value = NOW + 30
+        self.recordRateLimits(clientRemaining=4400)
+
+        self.assertEqual(4500, CreditBudget(self.stateFile)._state.clientRemaining)
+
+        self.time.time.return_value = NOW + 60
+        self.recordRateLimits(clientRemaining=4300)
+
+        self.assertEqual(4300, CreditBudget(self.stateFile)._state.clientRemaining)
+
+    @patch(f"{MODULE_PATH}print")
+    def test_unwritable_state_directory(self, print):
+        creditBudget = CreditBudget(os.path.join(self.stateFile, "missing", "imgurCredits.json"))
+
+        creditBudget.recordRateLimits({"x-ratelimit-clientremaining": "4500"})
+
+        self.assertEqual(4500, creditBudget._state.clientRemaining)
+        print.assert_any_call("Could not save the Imgur credit state")
+
+    @patch(f"{MODULE_PATH}print")
+    @patch(f"{MODULE_PATH}os.replace", side_effect=OSError("Read-only file system"))
+    def test_temporary_file_removed(self, replace, print):
+        self.recordRateLimits()
+
+        self.assertEqual([], os.listdir(os.path.dirname(self.stateFile)))
+
+    def test_corrupt_state_file(self):
+        with open(self.stateFile, "w") as stateFile:
+            stateFile.write("{not json")
+
+        creditBudget = CreditBudget(self.stateFile)
+
+        self.assertIsNone(creditBudget.galleryCallsPerHour)
+
+    def test_unknown_state_keys(self):
+        with open(self.stateFile, "w") as stateFile:
+            json.dump({"unknown": 1}, stateFile)
+
+        creditBudget = CreditBudget(self.stateFile)
+
+        self.assertIsNone(creditBudget._state.clientRemaining)
+
+    def test_toJson(self):
+        self.recordRateLimits(clientRemaining=4500)
+
+        creditJson = self.creditBudget.toJson()
+
+        self.assertEqual(4500, creditJson["clientRemaining"])
+        self.assertEqual(541, creditJson["galleryCallsPerHour"])
+        self.assertEqual(0, creditJson["galleryCallsLastHour"])
+        self.assertIsNone(creditJson["downloadsPerHour"])
+        self.assertEqual("2024-05-01T18:00:00+00:00", creditJson["nextGalleryCall"])
+
+    def test_invalid_reserve(self):
+        with self.assertRaises(ValueError):
+            CreditBudget(self.stateFile, reserveFraction=1)
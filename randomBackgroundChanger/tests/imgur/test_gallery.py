@@ -0,0 +1,76 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from randomBackgroundChanger.imgur.gallery import GalleryCursor
+
+MODULE_PATH = "randomBackgroundChanger.imgur.gallery."
+
+
+class Test_GalleryCursor_advance(TestCase):
+
+    def test_pages_then_sections(self):
+        galleryCursor = GalleryCursor(
+            sections=("hot", "top"), sort="top", window="week", maxPages=2,
+            restSeconds=0
+        )
+        urls = []
+        for _ in range(5):
+            urls.append(galleryCursor.url)
+            galleryCursor.advance()
+
+        self.assertEqual(
+            [
+                "https://api.imgur.com/3/gallery/hot/top/week/0",
+                "https://api.imgur.com/3/gallery/hot/top/week/1",
+                "https://api.imgur.com/3/gallery/top/top/week/0",
+                "https://api.imgur.com/3/gallery/top/top/week/1",
+                "https://api.imgur.com/3/gallery/hot/top/week/0"
+            ],
+            urls
+        )
+
+    def test_page_without_new_images_ends_section(self):
+        galleryCursor = GalleryCursor(sections=("hot", "user"), maxPages=5)
+
+        galleryCursor.advance(newImages=False)
+
+        self.assertEqual("user", galleryCursor.section)
+        self.assertEqual(0, galleryCursor.page)
+
+    def test_invalid_settings(self):
+        for settings in (
+                {"sections": ()}, {"sections": ("random",)}, {"sort": "newest"}, {"window": "hour"},
+                {"maxPages": 0}, {"restSeconds": -1}
+        ):
+            with self.subTest(settings=settings), self.assertRaises(ValueError):
+                GalleryCursor(**settings)
+
+
+@patch(MODULE_PATH + "time")
+class Test_GalleryCursor_nextURL(TestCase):
+
+    def test_resting_section_skipped(self, time):
+        time.monotonic.return_value = 100
+        galleryCursor = GalleryCursor(sections=("hot", "top"), maxPages=1, restSeconds=60)
+        galleryCursor.advance()
+        galleryCursor.advance()
+
+        time.monotonic.return_value = 159
+        self.assertIsNone(galleryCursor.nextURL())
+
+        time.monotonic.return_value = 160
+        self.assertEqual("https://api.imgur.com/3/gallery/hot/viral/day/0", galleryCursor.nextURL())
+
+    def test_walked_section_rests(self, time):
+        time.monotonic.return_value = 100
+        galleryCursor = GalleryCursor(sections=("hot", "top", "user"), maxPages=5, restSeconds=60)
+        galleryCursor.advance(newImages=False)
+        galleryCursor.advance(newImages=False)
+
+        time.monotonic.return_value = 130
+        # hot and top both rest until 160
+        self.assertEqual("https://api.imgur.com/3/gallery/user/viral/day/0", galleryCursor.nextURL())
+        galleryCursor.advance(newImages=False)
+
+        time.monotonic.return_value = 160
+        self.assertEqual("https://api.imgur.com/3/gallery/hot/viral/day/0", galleryCursor.nextURL())
@@ -1,9 +1,11 @@
 
 from unittest import TestCase
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock, call
 
 import requests
 
+from randomBackgroundChanger.imgur.creditBudget import CreditBudgetExceeded
+from randomBackgroundChanger.imgur.gallery import GalleryCursor
 from randomBackgroundChanger.imgur.imgur import ImgurController
 
 MODULE_PATH = "randomBackgroundChanger.imgur.imgur."
@@ -111,60 +113,178 @@ class Test_ImgurController__parseImageUrls(TestCase):
         self.assertEqual(1, len(parsedImages))
 
 
-@patch(f"{MODULE_PATH}requests")
 class Test_ImgurController__makeRequest(TestCase):
 
-    def test_ok(self, mockRequests):
-        mockRequests.HTTPError = requests.HTTPError
-        data = {"testData": "testData1"}
-        expectedHeaders = {"Authorization": f"Bearer accessToken123"}
-        imgurAuthenticator = MagicMock(accessToken="accessToken123")
-        imgurController = ImgurController(imgurAuthenticator)
+    def setUp(self):
+        self.data = {"testData": "testData1"}
+        self.expectedHeaders = {"Authorization": f"Bearer accessToken123"}
+        self.imgurAuthenticator = MagicMock(accessToken="accessToken123")
+        self.imgurClient = MagicMock()
+        self.imgurController = ImgurController(self.imgurAuthenticator, self.imgurClient)
 
-        imgurController._makeRequest("http://api.imgur/endpoint", data=data)
+    @staticmethod
+    def createResponse(statusCode):
+        response = MagicMock(status_code=statusCode)
+        if statusCode >= 400:
+            response.raise_for_status.side_effect = requests.HTTPError(f"{statusCode} Error")
+        return response
 
-        mockRequests.get.assert_called_once_with(
-            "http://api.imgur/endpoint", data, headers=expectedHeaders
+    def test_ok(self):
+        response = self.createResponse(200)
+        self.imgurClient.get.return_value = response
+
+        returnedResponse = self.imgurController._makeRequest("http://api.imgur/endpoint", data=self.data)
+
+        self.assertEqual(response, returnedResponse)
+        self.imgurClient.get.assert_called_once_with(
+            "http://api.imgur/endpoint", params=self.data, headers=self.expectedHeaders
         )
-        imgurAuthenticator.refreshToken.assert_not_called()
+        self.imgurAuthenticator.refreshToken.assert_not_called()
 
-    def test_refresh_success(self, mockRequests):
-        mockRequests.HTTPError = requests.HTTPError
-        data = {"testData": "testData1"}
-        expectedHeaders = {"Authorization": f"Bearer accessToken123"}
-        imgurAuthenticator = MagicMock(accessToken="accessToken123")
-        imgurController = ImgurController(imgurAuthenticator)
-        mockRequests.get.return_value.raise_for_status.side_effect = [requests.HTTPError, None]
+    def test_refresh_success(self):
+        retriedResponse = self.createResponse(200)
+        self.imgurClient.get.side_effect = [self.createResponse(403), retriedResponse]
 
-        imgurController._makeRequest("http://api.imgur/endpoint", data=data)
+        returnedResponse = self.imgurController._makeRequest("http://api.imgur/endpoint", data=self.data)
 
-        mockRequests.get.assert_has_calls(
+        self.assertEqual(retriedResponse, returnedResponse)
+        self.imgurClient.get.assert_has_calls(
             [
-                call("http://api.imgur/endpoint", data, headers=expectedHeaders),
-                call().raise_for_status(),
-                call("http://api.imgur/endpoint", data, headers=expectedHeaders),
-                call().raise_for_status()
+                call("http://api.imgur/endpoint", params=self.data, headers=self.expectedHeaders),
+                call("http://api.imgur/endpoint", params=self.data, headers=self.expectedHeaders)
             ]
         )
-        imgurAuthenticator.refreshToken.assert_called_once_with()
+        self.imgurAuthenticator.refreshToken.assert_called_once_with()
+
+    def test_refresh_failure(self):
+        self.imgurClient.get.side_effect = [self.createResponse(401), self.createResponse(401)]
+
+        with self.assertRaises(requests.HTTPError):
+            self.imgurController._makeRequest("http://api.imgur/endpoint", data=self.data)
 
-    def test_refresh_failure(self, mockRequests):
-        mockRequests.HTTPError = requests.HTTPError
-        data = {"testData": "testData1"}
-        expectedHeaders = {"Authorization": f"Bearer accessToken123"}
-        imgurAuthenticator = MagicMock(accessToken="accessToken123")
-        imgurController = ImgurController(imgurAuthenticator)
-        mockRequests.get.return_value.raise_for_status.side_effect = requests.HTTPError
+        self.assertEqual(2, self.imgurClient.get.call_count)
+        self.imgurAuthenticator.refreshToken.assert_called_once_with()
+
+    def test_other_error_not_refreshed(self):
+        self.imgurClient.get.return_value = self.createResponse(503)
 
         with self.assertRaises(requests.HTTPError):
-            imgurController._makeRequest("http://api.imgur/endpoint", data=data)
+            self.imgurController._makeRequest("http://api.imgur/endpoint", data=self.data)
+
+        self.imgurClient.get.assert_called_once()
+        self.imgurAuthenticator.refreshToken.assert_not_called()
+
+    def test_shares_authenticator_client(self):
+        imgurController = ImgurController(self.imgurAuthenticator)
+
+        self.assertEqual(self.imgurAuthenticator.imgurClient, imgurController._imgurClient)
+
+
+class Test_ImgurController_requestNewImages(TestCase):
+
+    def setUp(self):
+        self.imgurClient = MagicMock()
+        self.pages = {}
+        self.imgurClient.get.side_effect = self.galleryPage
+        self.creditBudget = MagicMock()
+        self.galleryCursor = GalleryCursor(sections=("hot", "top"), maxPages=2)
+        self.imgurController = ImgurController(
+            MagicMock(), self.imgurClient, creditBudget=self.creditBudget, galleryCursor=self.galleryCursor,
+            batchSize=2
+        )
+
+    def galleryPage(self, url, **kwargs):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"data": [
+            {"title": f"image{index}", "type": "image/jpeg", "link": f"https://i.imgur.com/{index}.jpg"}
+            for index in self.pages.get(url, [])
+        ]}
+        return response
+
+    def test_page_feeds_several_batches(self):
+        self.pages["https://api.imgur.com/3/gallery/hot/viral/day/0"] = [1, 2, 3, 4]
+
+        firstBatch = self.imgurController.requestNewImages()
+        secondBatch = self.imgurController.requestNewImages()
+
+        self.assertEqual(["image1", "image2"], [image.imageTitle for image in firstBatch])
+        self.assertEqual(["image3", "image4"], [image.imageTitle for image in secondBatch])
+        self.imgurClient.get.assert_called_once()
+        self.creditBudget.checkGalleryCall.assert_called_once_with()
+        self.creditBudget.recordGalleryCall.assert_called_once_with(4)
+        self.imgurClient.addRateLimitListener.assert_called_once_with(self.creditBudget.recordRateLimits)
+
+    def test_cursor_walks_pages_and_sections(self):
+        self.pages["https://api.imgur.com/3/gallery/hot/viral/day/0"] = [1]
+        self.pages["https://api.imgur.com/3/gallery/hot/viral/day/1"] = [2]
+
+        batch = self.imgurController.requestNewImages()
 
-        mockRequests.get.assert_has_calls(
+        self.assertEqual(["image1", "image2"], [image.imageTitle for image in batch])
+        self.assertEqual("top", self.galleryCursor.section)
+        self.assertEqual(0, self.galleryCursor.page)
+
+    def test_seen_images_skipped(self):
+        self.pages["https://api.imgur.com/3/gallery/hot/viral/day/0"] = [1, 2]
+        self.pages["https://api.imgur.com/3/gallery/hot/viral/day/1"] = [2, 3]
+        self.pages["https://api.imgur.com/3/gallery/top/viral/day/0"] = [3, 4]
+
+        firstBatch = self.imgurController.requestNewImages()
+        secondBatch = self.imgurController.requestNewImages()
+
+        self.assertEqual(["image1", "image2"], [image.imageTitle for image in firstBatch])
+        self.assertEqual(["image3", "image4"], [image.imageTitle for image in secondBatch])
+
+    def test_page_without_new_images_ends_section(self):
+        self.pages["https://api.imgur.com/3/gallery/hot/viral/day/0"] = [1, 2]
+        self.pages["https://api.imgur.com/3/gallery/top/viral/day/0"] = [1, 2, 3, 4]
+        galleryCursor = GalleryCursor(sections=("hot", "top"), maxPages=5)
+        imgurController = ImgurController(
+            MagicMock(), self.imgurClient, creditBudget=self.creditBudget, galleryCursor=galleryCursor,
+            batchSize=2
+        )
+
+        firstBatch = imgurController.requestNewImages()
+        secondBatch = imgurController.requestNewImages()
+
+        self.assertEqual(["image1", "image2"], [image.imageTitle for image in firstBatch])
+        self.assertEqual(["image3", "image4"], [image.imageTitle for image in secondBatch])
+        # hot page 1 was empty, so hot rests and top page 0 is next
+        self.assertEqual(
             [
-                call("http://api.imgur/endpoint", data, headers=expectedHeaders),
-                call().raise_for_status(),
-                call("http://api.imgur/endpoint", data, headers=expectedHeaders),
-                call().raise_for_status()
-            ]
+                "https://api.imgur.com/3/gallery/hot/viral/day/0", "https://api.imgur.com/3/gallery/hot/viral/day/1",
+                "https://api.imgur.com/3/gallery/top/viral/day/0"
+            ],
+            [call.args[0] for call in self.imgurClient.get.call_args_list]
+        )
+
+    def test_resting_section_not_requested(self):
+        self.pages["https://api.imgur.com/3/gallery/hot/viral/day/0"] = [1, 2]
+        galleryCursor = GalleryCursor(sections=("hot",), maxPages=1)
+        imgurController = ImgurController(
+            MagicMock(), self.imgurClient, creditBudget=self.creditBudget, galleryCursor=galleryCursor,
+            batchSize=2
         )
-        imgurAuthenticator.refreshToken.assert_called_once_with()
+
+        imgurController.requestNewImages()
+        batch = imgurController.requestNewImages()
+
+        self.assertEqual([], batch)
+        self.imgurClient.get.assert_called_once()
+        self.creditBudget.recordGalleryCall.assert_called_once_with(2)
+
+    def test_over_budget(self):
+        self.creditBudget.checkGalleryCall.side_effect = CreditBudgetExceeded
+
+        with self.assertRaises(CreditBudgetExceeded):
+            self.imgurController.requestNewImages()
+
+        self.imgurClient.get.assert_not_called()
+
+    def test_over_budget_with_candidates(self):
+        self.pages["https://api.imgur.com/3/gallery/hot/viral/day/0"] = [1]
+        self.creditBudget.checkGalleryCall.side_effect = [None, CreditBudgetExceeded]
+
+        batch = self.imgurController.requestNewImages()
+
+        self.assertEqual(["image1"], [image.imageTitle for image in batch])
@@ -15,16 +15,16 @@ class AuthenticatorTest(_ImgurAuthenticator):
         pass
 
 
-@patch(f"{MODULE_PATH}requests")
+@patch(f"{MODULE_PATH}ImgurClient")
 @patch.object(AuthenticatorTest, "_saveTokensToDisk")
 @patch.object(AuthenticatorTest, "_startAuthentication", return_value=MagicMock())
 class Test_ImgurAuthenticator_refreshToken(TestCase):
 
     def test_correct_post_parameters(
-            self, ImgurAuthenticator_startAuthentication, ImgurAuthenticator_saveTokensToDisk, requests
+            self, ImgurAuthenticator_startAuthentication, ImgurAuthenticator_saveTokensToDisk, ImgurClient
     ):
-        requests.post.return_value = MagicMock()
-        requests.post.return_value.json.return_value = {
+        ImgurClient.return_value.post.return_value = MagicMock()
+        ImgurClient.return_value.post.return_value.json.return_value = {
             "refresh_token": "refresh_token234",
             "access_token": "access_token234"
         }
@@ -33,14 +33,15 @@ class Test_ImgurAuthenticator_refreshToken(TestCase):
 
         imgurAuthenticator.refreshToken()
 
-        requests.post.assert_called_once_with(
+        ImgurClient.return_value.post.assert_called_once_with(
             imgurAuthenticator.accessTokenURL,
             data={
                 "client_id": "client_id123",
                 "client_secret": "client_secret123",
                 "refresh_token": "refresh_token123",
                 "grant_type": "refresh_token"
-            }
+            },
+            retry=True
         )
         self.assertEqual("refresh_token234", imgurAuthenticator._refreshToken)
         self.assertEqual("access_token234", imgurAuthenticator._accessToken)
@@ -92,16 +93,16 @@ class Test_ImgurAuthentictor_startAuthentication(TestCase):
         self.assertIsNone(imgurAuthenticator._refreshToken)
 
 
-@patch(f"{MODULE_PATH}requests")
+@patch(f"{MODULE_PATH}ImgurClient")
 @patch.object(PinImgurAuthenticator, "_saveTokensToDisk")
 @patch.object(PinImgurAuthenticator, "_startAuthentication", return_value=MagicMock())
 class Test_PinImgurAuthenticator__getAccessTokenFromPin(TestCase):
 
     def test_correct_post_parameters(
-            self, ImgurAuthenticator_pinBasedAuthentication, ImgurAuthenticator_saveTokensToDisk, requests
+            self, ImgurAuthenticator_pinBasedAuthentication, ImgurAuthenticator_saveTokensToDisk, ImgurClient
     ):
-        requests.post.return_value = MagicMock()
-        requests.post.return_value.json.return_value = {
+        ImgurClient.return_value.post.return_value = MagicMock()
+        ImgurClient.return_value.post.return_value.json.return_value = {
             "refresh_token": "refresh_token234",
             "access_token": "access_token234"
         }
@@ -111,7 +112,7 @@ class Test_PinImgurAuthenticator__getAccessTokenFromPin(TestCase):
 
         imgurAuthenticator._getAccessTokenFromPin()
 
-        requests.post.assert_called_once_with(
+        ImgurClient.return_value.post.assert_called_once_with(
             imgurAuthenticator.accessTokenURL,
             data={
                 "client_id": "client_id123",
@@ -125,9 +126,9 @@ class Test_PinImgurAuthenticator__getAccessTokenFromPin(TestCase):
         ImgurAuthenticator_saveTokensToDisk.assert_called_once_with()
 
     def test_invalid_pin(
-            self, ImgurAuthenticator_pinBasedAuthentication, ImgurAuthenticator_saveTokensToDisk, requests
+            self, ImgurAuthenticator_pinBasedAuthentication, ImgurAuthenticator_saveTokensToDisk, ImgurClient
     ):
-        requests.post.return_value.raise_for_status.side_effect = HTTPError("400 Bad Request")
+        ImgurClient.return_value.post.return_value.raise_for_status.side_effect = HTTPError("400 Bad Request")
         imgurAuthenticator = PinImgurAuthenticator("client_id123", "client_secret123")
         imgurAuthenticator._refreshToken = "refresh_token123"
         imgurAuthenticator._pin = "pin123"
@@ -138,9 +139,9 @@ class Test_PinImgurAuthenticator__getAccessTokenFromPin(TestCase):
         ImgurAuthenticator_saveTokensToDisk.assert_not_called()
 
     def test_other_exception_string(
-            self, ImgurAuthenticator_pinBasedAuthentication, ImgurAuthenticator_saveTokensToDisk, requests
+            self, ImgurAuthenticator_pinBasedAuthentication, ImgurAuthenticator_saveTokensToDisk, ImgurClient
     ):
-        requests.post.return_value.raise_for_status.side_effect = HTTPError("401 Unauthorised")
+        ImgurClient.return_value.post.return_value.raise_for_status.side_effect = HTTPError("401 Unauthorised")
         imgurAuthenticator = PinImgurAuthenticator("client_id123", "client_secret123")
         imgurAuthenticator._refreshToken = "refresh_token123"
         imgurAuthenticator._pin = "pin123"
@@ -151,9 +152,9 @@ class Test_PinImgurAuthenticator__getAccessTokenFromPin(TestCase):
         ImgurAuthenticator_saveTokensToDisk.assert_not_called()
 
     def test_other_exception_type(
-            self, ImgurAuthenticator_pinBasedAuthentication, ImgurAuthenticator_saveTokensToDisk, requests
+            self, ImgurAuthenticator_pinBasedAuthentication, ImgurAuthenticator_saveTokensToDisk, ImgurClient
     ):
-        requests.post.return_value.raise_for_status.side_effect = Exception("Boom!")
+        ImgurClient.return_value.post.return_value.raise_for_status.side_effect = Exception("Boom!")
         imgurAuthenticator = PinImgurAuthenticator("client_id123", "client_secret123")
         imgurAuthenticator._refreshToken = "refresh_token123"
         imgurAuthenticator._pin = "pin123"
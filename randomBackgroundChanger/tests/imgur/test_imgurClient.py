@@ -0,0 +1,173 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from randomBackgroundChanger.imgur.imgurClient import ImgurClient, ImgurRateLimited
+
+MODULE_PATH = "randomBackgroundChanger.imgur.imgurClient."
+
+
+def createResponse(statusCode=200, headers=None):
+    return MagicMock(status_code=statusCode, headers=headers or {})
+
+
+class ImgurClientTestCommon(TestCase):
+
+    def setUp(self):
+        timePatcher = patch(MODULE_PATH + "time")
+        self.time = timePatcher.start()
+        self.addCleanup(timePatcher.stop)
+        self.time.time.return_value = 1000
+
+        self.imgurClient = ImgurClient(connectTimeout=1, readTimeout=2)
+        self.session = MagicMock()
+        self.imgurClient._session = self.session
+
+
+class Test_ImgurClient_request(ImgurClientTestCommon):
+
+    def test_ok(self):
+        response = createResponse()
+        self.session.request.return_value = response
+
+        returnedResponse = self.imgurClient.get("https://api.imgur.com/3/endpoint", params={"a": 1})
+
+        self.assertEqual(response, returnedResponse)
+        self.session.request.assert_called_once_with(
+            "GET", "https://api.imgur.com/3/endpoint", timeout=(1, 2), params={"a": 1}
+        )
+        self.time.sleep.assert_not_called()
+
+    def test_server_error_retried(self):
+        response = createResponse()
+        self.session.request.side_effect = [createResponse(503), createResponse(500), response]
+
+        returnedResponse = self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.assertEqual(response, returnedResponse)
+        self.assertEqual(3, self.session.request.call_count)
+        self.assertEqual(2, self.time.sleep.call_count)
+
+    def test_post_not_retried(self):
+        response = createResponse(503)
+        self.session.request.return_value = response
+
+        returnedResponse = self.imgurClient.post("https://api.imgur.com/oauth2/token")
+
+        self.assertEqual(response, returnedResponse)
+        self.session.request.assert_called_once()
+        self.time.sleep.assert_not_called()
+
+    def test_post_connection_error_not_retried(self):
+        self.session.request.side_effect = requests.ConnectionError
+
+        with self.assertRaises(requests.ConnectionError):
+            self.imgurClient.post("https://api.imgur.com/oauth2/token")
+
+        self.session.request.assert_called_once()
+
+    def test_post_retried_when_safe(self):
+        response = createResponse()
+        self.session.request.side_effect = [createResponse(502), response]
+
+        returnedResponse = self.imgurClient.post("https://api.imgur.com/oauth2/token", retry=True)
+
+        self.assertEqual(response, returnedResponse)
+        self.assertEqual(2, self.session.request.call_count)
+
+    def test_client_error_not_retried(self):
+        response = createResponse(403)
+        self.session.request.return_value = response
+
+        returnedResponse = self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.assertEqual(response, returnedResponse)
+        self.session.request.assert_called_once()
+
+    def test_retries_exhausted(self):
+        response = createResponse(502)
+        self.session.request.return_value = response
+
+        returnedResponse = self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.assertEqual(response, returnedResponse)
+        self.assertEqual(ImgurClient.maxRetries + 1, self.session.request.call_count)
+
+    def test_retry_after_honoured(self):
+        self.session.request.side_effect = [
+            createResponse(429, {"Retry-After": "7"}), createResponse()
+        ]
+
+        self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.time.sleep.assert_called_once_with(7)
+
+    def test_connection_error_retried(self):
+        response = createResponse()
+        self.session.request.side_effect = [requests.ConnectionError, response]
+
+        returnedResponse = self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.assertEqual(response, returnedResponse)
+        self.time.sleep.assert_called_once()
+
+    def test_connection_error_raised(self):
+        self.session.request.side_effect = requests.Timeout
+
+        with self.assertRaises(requests.Timeout):
+            self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.assertEqual(ImgurClient.maxRetries + 1, self.session.request.call_count)
+
+
+class Test_ImgurClient_rateLimits(ImgurClientTestCommon):
+
+    def test_rate_limits_recorded(self):
+        self.session.request.return_value = createResponse(headers={
+            "X-RateLimit-ClientRemaining": "12000", "Content-Type": "application/json"
+        })
+
+        self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.assertEqual({"x-ratelimit-clientremaining": "12000"}, self.imgurClient.rateLimits)
+
+    def test_short_pause_before_limit(self):
+        self.session.request.return_value = createResponse(headers={
+            "X-RateLimit-UserRemaining": "3", "X-RateLimit-UserReset": "1030"
+        })
+
+        self.imgurClient.get("https://api.imgur.com/3/endpoint")
+        self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.time.sleep.assert_called_once_with(30)
+
+    def test_long_pause_raises(self):
+        self.session.request.return_value = createResponse(headers={
+            "X-RateLimit-UserRemaining": "0", "X-RateLimit-UserReset": "4600"
+        })
+        self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        with self.assertRaises(ImgurRateLimited):
+            self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.session.request.assert_called_once()
+
+    def test_no_pause_with_requests_left(self):
+        self.session.request.return_value = createResponse(headers={
+            "X-RateLimit-UserRemaining": "400", "X-RateLimit-UserReset": "4600"
+        })
+
+        self.imgurClient.get("https://api.imgur.com/3/endpoint")
+        self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        self.time.sleep.assert_not_called()
+
+    def test_listeners_called(self):
+        listener = MagicMock()
+        self.imgurClient.addRateLimitListener(listener)
+        self.session.request.return_value = createResponse(headers={"X-RateLimit-UserRemaining": "400"})
+
+        self.imgurClient.get("https://api.imgur.com/3/endpoint")
+
+        listener.assert_called_once_with({"x-ratelimit-userremaining": "400"})
@@ -20,6 +20,7 @@ setup(
         # fixed but not yet a release
         "eventlet==0.24.1",
         "gevent",
+        "Pillow",
         "dnspython==1.16.0"
     ],
     entry_points={